@@ -7,4 +7,5 @@ export FLASK_APP=run.py # <-- Add this line
 pip install -r requirements.txt
 
 flask db upgrade
+flask backfill-ticket-timestamps # Idempotent: only fills lifecycle timestamps still NULL
 flask seed-db # Run our seeder command after migrations
\ No newline at end of file
@@ -30,13 +30,6 @@ def format_datetime_pht(utc_dt):
     return pht_dt.strftime("%Y-%m-%d %H:%M")
 
 
-def strip_timestamp_filter(ticket_name):
-    """Removes the Unix timestamp suffix from the ticket name."""
-    if not ticket_name:
-        return ""
-    return ticket_name.rsplit("_", 1)[0]
-
-
 def sla_class_filter(created_at):
     """Returns a Bootstrap color class based on ticket age."""
     if not created_at:
@@ -66,7 +59,6 @@ def create_app(config_class=Config):
 
     # --- REGISTER FILTERS ---
     app.jinja_env.filters["pht"] = format_datetime_pht
-    app.jinja_env.filters["no_stamp"] = strip_timestamp_filter
     app.jinja_env.filters["sla"] = sla_class_filter
 
     # Initialize extensions with the app
@@ -100,6 +92,10 @@ def create_app(config_class=Config):
 
     app.register_blueprint(rebate_bp)
 
+    from .jobs import jobs as jobs_blueprint
+
+    app.register_blueprint(jobs_blueprint)
+
     with app.app_context():
         from . import models
 
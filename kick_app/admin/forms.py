@@ -1,15 +1,9 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed, FileRequired
-from wtforms import StringField, SubmitField, SelectField, TextAreaField, FloatField, PasswordField
+from wtforms import StringField, SubmitField, SelectField, TextAreaField, FloatField, PasswordField, BooleanField
 from wtforms.fields import DateField
 from wtforms.validators import DataRequired, Length, NumberRange, Email, Optional, EqualTo
-from wtforms_sqlalchemy.fields import QuerySelectField
-from kick_app.models import Region
-
-
-def get_regions():
-    """Helper function to query all regions for the form."""
-    return Region.query.all()
+from kick_app.refdata import RefSelectField, regions
 
 
 class ClientForm(FlaskForm):
@@ -30,9 +24,9 @@ class ClientForm(FlaskForm):
         ],
     )
     
-    region = QuerySelectField(
+    region = RefSelectField(
         "Region",
-        query_factory=get_regions,
+        query_factory=regions,
         get_label="name",
         allow_blank=False,
         validators=[DataRequired()],
@@ -46,11 +40,14 @@ class ClientForm(FlaskForm):
 
 
 class ExcelUploadForm(FlaskForm):
-    """Form for uploading an Excel file of clients."""
+    """Form for uploading an Excel (.xlsx) or CSV file of clients."""
 
     excel_file = FileField(
-        "Client Excel File",
-        validators=[FileRequired(), FileAllowed(["xlsx", "xls"], "Excel files only!")],
+        "Client File",
+        validators=[
+            FileRequired(),
+            FileAllowed(["xlsx", "csv"], "Excel (.xlsx) or CSV files only!"),
+        ],
     )
     submit = SubmitField("Upload")
 
@@ -69,6 +66,12 @@ class ReportForm(FlaskForm):
 
     start_date = DateField("Start Date", validators=[DataRequired()])
     end_date = DateField("End Date", validators=[DataRequired()])
+    export_format = SelectField(
+        "File Format",
+        choices=[("xlsx", "Excel (.xlsx)"), ("csv", "CSV (.csv)")],
+        default="xlsx",
+    )
+    include_archived = BooleanField("Include archived tickets")
     submit_tickets = SubmitField("Generate Ticket Report")
     # --- ADD THIS LINE ---
     submit_tsr = SubmitField("Generate TSR Performance Report")
@@ -0,0 +1,447 @@
+"""
+Bulk client import engine (the client master file upload).
+
+Files are streamed (openpyxl read-only for XLSX, the csv module for CSV),
+validated and written in fixed-size batches, so memory stays flat for any
+file size. Rows that fail validation are handed to an `on_reject` callback
+(the import job writes them to a downloadable rejects file) instead of
+aborting the import.
+
+Regions are resolved once, existing clients are loaded into a dict in ONE
+query, and rows are written in batches: an INSERT ... ON CONFLICT upsert
+for new accounts and an executemany UPDATE by id for changed ones.
+Unchanged rows cost nothing. Nothing here commits; the caller does.
+
+Uploads are previewed first: a dry run (`run(..., dry_run=True)`) writes
+nothing and reports each new, changed (field by field) and rejected row,
+which the admin reviews before the import applies just those rows.
+"""
+
+import csv
+import json
+import math
+import os
+from openpyxl import load_workbook
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .. import db
+from ..cache import invalidate_on_commit
+from ..models import Client, Region
+from ..refdata import REGIONS_SCOPE
+from ..sqlutils import bulk_update_by_id
+from ..tickets.search import reindex_all_tickets
+from ..tickets.events import clients_region_changed
+
+CLIENT_IMPORT_COLUMNS = [
+    "account_number",
+    "account_name",
+    "region_name",
+    "status",
+    "plan_rate",
+]
+
+# Columns compared against (and written to) the clients table
+CLIENT_FIELDS = ("account_name", "region_id", "status", "plan_rate")
+
+# Columns of a dry-run diff file (jobs/tasks.py writes it, the preview page
+# and the approved import read it); "changes" is {field: [before, after]}
+CLIENT_IMPORT_DIFF_COLUMNS = [
+    "row",
+    "change",
+    *CLIENT_IMPORT_COLUMNS,
+    "changes",
+    "error",
+]
+
+# Fields shown in a dry-run diff (region by name rather than id)
+CLIENT_DIFF_FIELDS = ("account_name", "region_name", "status", "plan_rate")
+
+# Column sizes (models.Client / models.Region)
+CLIENT_TEXT_LIMITS = {"account_number": 100, "account_name": 200, "region_name": 100}
+
+IMPORT_BATCH_SIZE = 1000
+
+# Upload formats ClientFileReader streams
+CLIENT_IMPORT_EXTENSIONS = ("xlsx", "csv")
+
+
+def _clean(value):
+    """Blank spreadsheet cells (None / NaN / whitespace) become None."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+def _text(value):
+    """Cell value as text; whole-number floats (Excel numbers) lose the '.0'."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- FILE READERS ---
+
+
+class ClientFileReader:
+    """
+    Streams (row_number, {column: value}) pairs out of an uploaded .xlsx or
+    .csv file without loading it. `columns` is the header row;
+    `fraction_done()` estimates progress for job reporting.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        if extension not in CLIENT_IMPORT_EXTENSIONS:
+            raise ValueError("Client files must be .xlsx or .csv")
+        self._is_csv = extension == "csv"
+        self._file = None
+        self._workbook = None
+        self._rows_read = 0
+
+        if self._is_csv:
+            self._file = open(path, newline="", encoding="utf-8-sig")
+            self._rows = csv.reader(self._file)
+            self._size = os.path.getsize(path) or 1
+        else:
+            self._workbook = load_workbook(path, read_only=True, data_only=True)
+            sheet = self._workbook.active
+            self._rows = sheet.iter_rows(values_only=True)
+            self._max_row = sheet.max_row or 0
+
+        header = next(self._rows, None) or ()
+        self.columns = [_text(name) if name is not None else "" for name in header]
+
+    def __iter__(self):
+        width = len(self.columns)
+        for row_number, values in enumerate(self._rows, start=2):
+            self._rows_read = row_number
+            if not any(_clean(value) is not None for value in values):
+                continue  # blank line
+            values = list(values[:width]) + [None] * (width - len(values))
+            yield row_number, dict(zip(self.columns, values))
+
+    def fraction_done(self):
+        if self._is_csv:
+            return min(self._file.buffer.tell() / self._size, 1.0)
+        if self._max_row:
+            return min(self._rows_read / self._max_row, 1.0)
+        return 0.0
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        if self._workbook:
+            self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- DRY-RUN DIFFS ---
+
+IMPORT_CHANGES = ("new", "changed", "rejected")
+
+
+def read_import_diff(path, change=None, page=1, per_page=50):
+    """
+    Returns ({change: row count}, rows) for a dry-run diff file: one page of
+    its rows, optionally only those of one kind of change. Each row's
+    "changes" is decoded to {field: [before, after]}.
+    """
+    counts = dict.fromkeys(IMPORT_CHANGES, 0)
+    first = (page - 1) * per_page
+    rows = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            counts[row["change"]] += 1
+            if change and row["change"] != change:
+                continue
+            position = counts[change] if change else sum(counts.values())
+            if first < position <= first + per_page:
+                row["changes"] = json.loads(row["changes"]) if row["changes"] else {}
+                rows.append(row)
+    return counts, rows
+
+
+class ClientImporter:
+    """
+    Applies client rows (dicts keyed by CLIENT_IMPORT_COLUMNS) to the clients
+    table. Later rows for the same account number win, as they always have.
+    Counts end up in `added`, `updated`, `unchanged` and `rejected`.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+
+        self.region_ids = {
+            name: region_id
+            for region_id, name in db.session.execute(select(Region.id, Region.name))
+        }
+        self.region_names = {
+            region_id: name for name, region_id in self.region_ids.items()
+        }
+        # account_number -> (id, account_name, region_id, status, plan_rate).
+        # Accounts inserted by this import are tracked with id None.
+        self.existing = {
+            row[0]: tuple(row[1:])
+            for row in db.session.execute(
+                select(
+                    Client.account_number,
+                    Client.id,
+                    Client.account_name,
+                    Client.region_id,
+                    Client.status,
+                    Client.plan_rate,
+                )
+            )
+        }
+        self._reindex_ids = set()
+        self._region_changes = {}
+        # A number repeated across batches is counted once (within a batch,
+        # apply_batch keeps only its last row)
+        self._seen = set()
+        self._updated_ids = set()
+
+    # --- ROW HANDLING ---
+
+    def normalize(self, row):
+        """
+        Validates one raw row and returns the clients-table values it maps
+        to. Raises ValueError describing the first problem found.
+        """
+        values = {}
+        for column in ("account_number", "account_name", "region_name"):
+            value = _clean(row.get(column))
+            if value is None:
+                raise ValueError(f"{column} is required")
+            values[column] = _text(value)
+            if len(values[column]) > CLIENT_TEXT_LIMITS[column]:
+                raise ValueError(
+                    f"{column} is longer than {CLIENT_TEXT_LIMITS[column]} characters"
+                )
+
+        status = _clean(row.get("status"))
+        values["status"] = _text(status)[:50] if status is not None else None
+
+        plan_rate = _clean(row.get("plan_rate"))
+        if plan_rate is None:
+            values["plan_rate"] = 0.0
+            return values
+        try:
+            values["plan_rate"] = float(str(plan_rate).replace(",", ""))
+        except ValueError:
+            raise ValueError(f"plan_rate '{plan_rate}' is not a number") from None
+        if not math.isfinite(values["plan_rate"]):
+            raise ValueError(f"plan_rate '{plan_rate}' is not a number")
+        return values
+
+    def _resolve_regions(self, names, dry_run=False):
+        """
+        Creates any regions not seen before (one INSERT per batch). A dry run
+        gives them negative placeholder ids instead.
+        """
+        missing = sorted({name for name in names if name not in self.region_ids})
+        if not missing:
+            return
+        if dry_run:
+            for name in missing:
+                self.region_ids[name] = -len(self.region_ids) - 1
+                self.region_names[self.region_ids[name]] = name
+            return
+        db.session.execute(Region.__table__.insert(), [{"name": n} for n in missing])
+        invalidate_on_commit(REGIONS_SCOPE)
+        for region_id, name in db.session.execute(
+            select(Region.id, Region.name).where(Region.name.in_(missing))
+        ):
+            self.region_ids[name] = region_id
+            self.region_names[region_id] = name
+
+    def _changed_fields(self, current, new_state):
+        """{field: (before, after)} for the CLIENT_DIFF_FIELDS that differ."""
+        before = dict(zip(CLIENT_DIFF_FIELDS, current[1:]))
+        after = dict(zip(CLIENT_DIFF_FIELDS, new_state))
+        before["region_name"] = self.region_names.get(before["region_name"])
+        after["region_name"] = self.region_names.get(after["region_name"])
+        return {
+            field: (before[field], after[field])
+            for field in CLIENT_DIFF_FIELDS
+            if before[field] != after[field]
+        }
+
+    def _upsert(self, rows):
+        if not rows:
+            return
+        if db.session.get_bind().dialect.name == "postgresql":
+            insert = pg_insert
+        else:
+            insert = sqlite_insert
+        stmt = insert(Client.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["account_number"],
+            set_={field: stmt.excluded[field] for field in CLIENT_FIELDS},
+        )
+        db.session.execute(stmt, rows)
+
+    def apply_batch(self, rows, dry_run=False):
+        """
+        Writes one batch of normalized rows (nothing, with dry_run=True).
+        Returns a (change, row, fields) triple for each row that differs from
+        the table: change is "new" or "changed", and fields maps each changed
+        field to its (before, after) values.
+        """
+        if not rows:
+            return []
+        self._resolve_regions((row["region_name"] for row in rows), dry_run)
+
+        # Later rows for the same account win: keep only the last one, at
+        # its own position, so a repeated account is diffed and counted once
+        latest = {}
+        for row in rows:
+            latest.pop(row["account_number"], None)
+            latest[row["account_number"]] = row
+
+        diffs = []
+        inserts = {}
+        updates = {}
+        for row in latest.values():
+            values = {
+                "account_name": row["account_name"],
+                "region_id": self.region_ids[row["region_name"]],
+                "status": row["status"],
+                "plan_rate": row["plan_rate"],
+            }
+            account_number = row["account_number"]
+            current = self.existing.get(account_number)
+            new_state = tuple(values[field] for field in CLIENT_FIELDS)
+
+            seen = account_number in self._seen
+            self._seen.add(account_number)
+
+            if current is None:
+                self.added += 1
+                inserts[account_number] = values
+                diffs.append(("new", row, {}))
+            elif current[1:] == new_state:
+                if not seen:
+                    self.unchanged += 1
+                continue
+            elif current[0] is None:
+                # Repeated in the file after being added by this import
+                inserts[account_number] = values
+                diffs.append(("new", row, {}))
+            else:
+                diffs.append(("changed", row, self._changed_fields(current, new_state)))
+                client_id = current[0]
+                if client_id not in self._updated_ids:
+                    self._updated_ids.add(client_id)
+                    self.updated += 1
+                updates[client_id] = {"id": client_id, **values}
+                # Ticket search documents embed the client's name and region
+                if current[1] != values["account_name"]:
+                    self._reindex_ids.add(client_id)
+                if current[2] != values["region_id"]:
+                    self._reindex_ids.add(client_id)
+                    first_seen = self._region_changes.get(client_id, (current[2],))
+                    self._region_changes[client_id] = (
+                        first_seen[0],
+                        values["region_id"],
+                    )
+            self.existing[account_number] = (
+                current[0] if current else None,
+                *new_state,
+            )
+
+        if not dry_run:
+            self._upsert(
+                [
+                    {"account_number": number, **values}
+                    for number, values in inserts.items()
+                ]
+            )
+            bulk_update_by_id(db.session, Client, list(updates.values()))
+        return diffs
+
+    def run(self, rows, on_batch=None, on_reject=None, on_diff=None, dry_run=False):
+        """
+        Imports (row_number, raw row) pairs, validating and writing one batch
+        at a time. `on_batch(rows_done)` is called after each batch (job
+        progress); `on_reject(row_number, row, error)` gets each invalid row,
+        which is counted in `rejected` and skipped; `on_diff(row_number,
+        change, row, fields)` gets each new or changed row (see apply_batch).
+        With dry_run=True nothing is written.
+        """
+        done = 0
+        for batch in _batches(rows, self.batch_size):
+            valid = []
+            for row_number, row in batch:
+                try:
+                    values = self.normalize(row)
+                except ValueError as e:
+                    self.rejected += 1
+                    if on_reject:
+                        on_reject(row_number, row, str(e))
+                else:
+                    values["row_number"] = row_number
+                    valid.append(values)
+            diffs = self.apply_batch(valid, dry_run)
+            if on_diff:
+                for change, values, fields in diffs:
+                    on_diff(values["row_number"], change, values, fields)
+            done += len(batch)
+            if on_batch:
+                on_batch(done)
+        if not dry_run:
+            self.finish()
+        return self
+
+    def finish(self):
+        """Brings ticket search documents and the status rollup in line."""
+        if self._region_changes:
+            clients_region_changed(
+                {
+                    client_id: (old, new)
+                    for client_id, (old, new) in self._region_changes.items()
+                    if old != new
+                }
+            )
+        ids = sorted(self._reindex_ids)
+        for start in range(0, len(ids), self.batch_size):
+            batch_ids = ids[start : start + self.batch_size]
+            reindex_all_tickets(lambda model: (model.client_id.in_(batch_ids),))
+
+    def summary(self, dry_run=False):
+        if dry_run:
+            summary = (
+                f"{self.added} new clients, {self.updated} changed, "
+                f"{self.unchanged} unchanged"
+            )
+        else:
+            summary = (
+                f"{self.added} new clients added, {self.updated} existing clients "
+                f"updated, {self.unchanged} unchanged"
+            )
+        if self.rejected:
+            summary += f", {self.rejected} rows rejected"
+        return summary
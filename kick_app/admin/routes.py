@@ -1,17 +1,36 @@
-import pandas as pd
+import os
+import uuid
 from flask import (
     render_template,
     flash,
     redirect,
     url_for,
     request,
+    abort,
 )
 from flask_login import login_required, current_user
 from . import admin
 from .forms import ClientForm, ExcelUploadForm, AnnouncementForm, ReportForm, UserForm
 from .. import db  # Use relative import
-from ..models import Client, Region, User, UserRole, Announcement  # Use relative import
+from ..models import (
+    Client,
+    Region,
+    User,
+    UserRole,
+    Announcement,
+    ArchivedTicket,
+    Job,
+    JobStatus,
+)
 from ..decorators import admin_required  # Use relative import
+from ..tickets.search import reindex_all_tickets
+from ..tickets.assignment import ensure_workloads
+from ..tickets import events as ticket_events
+from ..cache import invalidate_on_commit, ADMIN_DASHBOARD_SCOPE
+from ..refdata import TSRS_SCOPE
+from ..pagination import KeysetPagination
+from ..jobs.runner import enqueue_job, job_files_dir
+from .importer import IMPORT_CHANGES, read_import_diff
 from werkzeug.utils import secure_filename
 
 
@@ -20,103 +39,52 @@ from werkzeug.utils import secure_filename
 @admin_required
 def client_list():
     """
-    Display client list, handle search, and handle Excel upload (with UPDATE).
+    Display client list, handle search, and queue Excel uploads for import.
     """
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     search_query = request.args.get("search", "")
 
     upload_form = ExcelUploadForm()
 
-    # Handle Excel Upload
+    # Handle client file upload
     if upload_form.validate_on_submit():
-        try:
-            f = upload_form.excel_file.data
-            filename = secure_filename(f.filename)
-
-            df = pd.read_excel(f)
-
-            required_columns = [
-                "account_number",
-                "account_name",
-                "region_name",
-                "status",
-                "plan_rate",
-            ]
-
-            if not all(col in df.columns for col in required_columns):
-                flash(
-                    "Excel file is missing required columns: "
-                    f'{", ".join(required_columns)}',
-                    "danger",
-                )
-                return redirect(url_for("admin.client_list"))
-
-            # --- START: MODIFIED LOGIC ---
-            clients_added = 0
-            clients_updated = 0
-            for index, row in df.iterrows():
-                # Find the region by name
-                region = Region.query.filter_by(name=row["region_name"]).first()
-                if not region:
-                    # If region doesn't exist, create it
-                    region = Region(name=row["region_name"])
-                    db.session.add(region)
-                    # We commit here to get the region.id
-                    db.session.commit()
-
-                # Check if client already exists
-                existing_client = Client.query.filter_by(
-                    account_number=str(row["account_number"])
-                ).first()
-
-                if existing_client:
-                    # --- CLIENT EXISTS: UPDATE IT ---
-                    existing_client.account_name = row["account_name"]
-                    existing_client.region_id = region.id
-                    existing_client.status = row["status"]
-                    existing_client.plan_rate = row["plan_rate"]
-                    clients_updated += 1
-                else:
-                    # --- CLIENT IS NEW: ADD IT ---
-                    client = Client(
-                        account_number=str(row["account_number"]),
-                        account_name=row["account_name"],
-                        region_id=region.id,
-                        status=row["status"],
-                        plan_rate=row["plan_rate"],
-                    )
-                    db.session.add(client)
-                    clients_added += 1
-
-            db.session.commit()
-            flash(
-                f"Import complete: {clients_added} new clients added, {clients_updated} existing clients updated.",
-                "success",
-            )
-            # --- END: MODIFIED LOGIC ---
-
-        except Exception as e:
-            db.session.rollback()
-            flash(f"An error occurred during import: {e}", "danger")
-
-        return redirect(url_for("admin.client_list"))
+        f = upload_form.excel_file.data
+        filename = secure_filename(f.filename)
+
+        # Large files take minutes, so the file is compared against the
+        # clients table in a background job; the admin reviews the changes
+        # (client_import_preview) before anything is written.
+        upload_path = os.path.join(
+            job_files_dir(), f"upload_{uuid.uuid4().hex}_{filename}"
+        )
+        f.save(upload_path)
+        job = enqueue_job(
+            "preview_client_import",
+            {"path": upload_path, "filename": filename},
+            current_user.id,
+        )
+        db.session.commit()
+        flash(
+            f"'{filename}' is being compared with the client list. "
+            "Review the changes when the preview is ready.",
+            "info",
+        )
+        return redirect(url_for("admin.client_list", job=job.id))
 
     # Handle Search
+    query = Client.query
     if search_query:
         search_term = f"%{search_query}%"
-        clients = (
-            Client.query.join(Region)
-            .filter(
-                db.or_(
-                    Client.account_number.like(search_term),
-                    Client.account_name.like(search_term),
-                    Region.name.like(search_term),
-                )
+        query = query.join(Region).filter(
+            db.or_(
+                Client.account_number.like(search_term),
+                Client.account_name.like(search_term),
+                Region.name.like(search_term),
             )
-            .paginate(page=page, per_page=10)
         )
-    else:
-        clients = Client.query.paginate(page=page, per_page=10)
+
+    # Cursor pagination on id (no OFFSET / COUNT over the whole table)
+    clients = KeysetPagination(query, [(Client.id, False)], cursor=cursor, per_page=10)
 
     return render_template(
         "client_list.html",
@@ -124,9 +92,71 @@ def client_list():
         clients=clients,
         upload_form=upload_form,
         search_query=search_query,
+        job_id=request.args.get("job", type=int),
+    )
+
+
+def _get_import_preview(job_id):
+    """A finished preview_client_import job whose diff file is still there."""
+    job = db.get_or_404(Job, job_id)
+    if job.kind != "preview_client_import":
+        abort(404)
+    if (
+        job.status != JobStatus.SUCCEEDED
+        or not job.result_path
+        or not os.path.exists(job.result_path)
+    ):
+        return None
+    return job
+
+
+@admin.route("/clients/import/<int:job_id>")
+@login_required
+@admin_required
+def client_import_preview(job_id):
+    """Paginated review of an upload's new, changed and rejected rows."""
+    job = _get_import_preview(job_id)
+    if job is None:
+        flash("That import preview is not available.", "warning")
+        return redirect(url_for("admin.client_list"))
+
+    change = request.args.get("change")
+    if change not in IMPORT_CHANGES:
+        change = None
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = 50
+    counts, rows = read_import_diff(job.result_path, change, page, per_page)
+    total = counts[change] if change else sum(counts.values())
+
+    return render_template(
+        "client_import_preview.html",
+        title="Review Client Import",
+        job=job,
+        counts=counts,
+        rows=rows,
+        change=change,
+        page=page,
+        has_next=page * per_page < total,
     )
 
 
+@admin.route("/clients/import/<int:job_id>/approve", methods=["POST"])
+@login_required
+@admin_required
+def approve_client_import(job_id):
+    """Queues the import of a reviewed preview's new and changed rows."""
+    job = _get_import_preview(job_id)
+    if job is None:
+        flash("That import preview is not available.", "warning")
+        return redirect(url_for("admin.client_list"))
+    import_job = enqueue_job(
+        "import_clients", {"preview_job_id": job.id}, current_user.id
+    )
+    db.session.commit()
+    flash("Import approved and queued. Progress is shown below.", "info")
+    return redirect(url_for("admin.client_list", job=import_job.id))
+
+
 @admin.route("/client/add", methods=["GET", "POST"])
 @login_required
 @admin_required
@@ -143,7 +173,7 @@ def add_client():
             client = Client(
                 account_number=form.account_number.data,
                 account_name=form.account_name.data,
-                region=form.region.data,
+                region_id=form.region.data.id,
                 status=form.status.data,
                 plan_rate=form.plan_rate.data,
             )
@@ -173,11 +203,26 @@ def edit_client(id):
                     "client_form.html", title="Edit Client", form=form
                 )
 
+        # Ticket search documents embed the client's name, number and region
+        needs_reindex = (
+            client.account_number != form.account_number.data
+            or client.account_name != form.account_name.data
+            or client.region_id != form.region.data.id
+        )
+        old_region_id = client.region_id
+
         client.account_number = form.account_number.data
         client.account_name = form.account_name.data
-        client.region = form.region.data
+        client.region_id = form.region.data.id
         client.status = form.status.data
         client.plan_rate = form.plan_rate.data
+        if needs_reindex:
+            db.session.flush()
+            reindex_all_tickets(lambda model: (model.client_id == client.id,))
+        if client.region_id != old_region_id:
+            ticket_events.client_region_changed(
+                client.id, old_region_id, client.region_id
+            )
         db.session.commit()
         flash("Client details have been updated.", "success")
         return redirect(url_for("admin.client_list"))
@@ -195,7 +240,12 @@ def delete_client(id):
     """Handle deleting a client."""
     client = Client.query.get_or_404(id)
 
-    if client.tickets.first():
+    # Archived tickets (tickets/archive.py) still reference the client
+    has_tickets = (
+        client.tickets.first()
+        or ArchivedTicket.query.filter_by(client_id=client.id).first()
+    )
+    if has_tickets:
         flash(
             f"Cannot delete client '{client.account_name}'. They have existing tickets. "
             "Please resolve or reassign their tickets first.",
@@ -243,6 +293,10 @@ def add_user():
             )
             user.set_password(form.password.data)
             db.session.add(user)
+            if user.role == UserRole.TSR:
+                db.session.flush()  # assigns user.id
+                ensure_workloads(user.id)
+            invalidate_on_commit(TSRS_SCOPE)
             db.session.commit()
             flash(f"User {user.full_name} added successfully.", "success")
             return redirect(url_for("admin.user_list"))
@@ -267,6 +321,14 @@ def edit_user(id):
         elif existing_email and existing_email.id != user.id:
             flash("Email already in use by another user.", "danger")
         else:
+            # Ticket search documents embed the assigned TSR's name
+            name_changed = user.full_name != form.full_name.data
+            # The admin dashboard bar chart is keyed on TSR name and role
+            if name_changed or user.role != UserRole[form.role.data]:
+                invalidate_on_commit(ADMIN_DASHBOARD_SCOPE)
+            # The TSR dropdowns list active TSRs by name
+            invalidate_on_commit(TSRS_SCOPE)
+
             user.employee_id = form.employee_id.data
             user.full_name = form.full_name.data
             user.email = form.email.data
@@ -277,6 +339,12 @@ def edit_user(id):
             if form.password.data:
                 user.set_password(form.password.data)
 
+            if name_changed:
+                db.session.flush()
+                reindex_all_tickets(lambda model: (model.assigned_to_id == user.id,))
+            if user.role == UserRole.TSR:
+                ensure_workloads(user.id)
+
             db.session.commit()
             flash(f"User {user.full_name} updated successfully.", "success")
             return redirect(url_for("admin.user_list"))
@@ -299,12 +367,25 @@ def delete_user(id):
     # Prevent admin from deleting themselves
     if user.id == current_user.id:
         flash("You cannot delete your own account.", "danger")
+    elif ArchivedTicket.query.filter(
+        db.or_(
+            ArchivedTicket.assigned_to_id == user.id,
+            ArchivedTicket.created_by_id == user.id,
+        )
+    ).first():
+        # Archived tickets (tickets/archive.py) still reference the user
+        flash(
+            f"Cannot delete user '{user.full_name}'. They have existing tickets. "
+            "Please resolve or reassign their tickets first.",
+            "danger",
+        )
     else:
         # Clean up related data? (Optional: decide if you want to keep logs/tickets)
         # For now, assuming cascade or simple delete.
         # Note: If user has tickets, this might fail depending on DB constraints.
         # Usually safer to deactivate, but user asked for delete.
         db.session.delete(user)
+        invalidate_on_commit(ADMIN_DASHBOARD_SCOPE, TSRS_SCOPE)
         db.session.commit()
         flash(f"User {user.full_name} has been deleted.", "success")
 
@@ -319,6 +400,8 @@ def approve_user(id):
     user = User.query.get_or_404(id)
     if user.role == UserRole.TSR and not user.is_active:
         user.is_active = True
+        ensure_workloads(user.id)
+        invalidate_on_commit(TSRS_SCOPE)
         db.session.commit()
         flash(
             f"User {user.full_name} ({user.employee_id}) has been approved.", "success"
@@ -403,20 +486,24 @@ def reports():
     form = ReportForm()
 
     if form.validate_on_submit():
-        start_date = form.start_date.data
-        end_date = form.end_date.data
+        params = {
+            "start_date": form.start_date.data.isoformat(),
+            "end_date": form.end_date.data.isoformat(),
+        }
 
+        # Reports are built by a background worker; the page polls for them
         if form.submit_tickets.data:
-            return redirect(
-                url_for("api.export_tickets", start_date=start_date, end_date=end_date)
-            )
-        elif form.submit_tsr.data:
-            return redirect(
-                url_for(
-                    "api.export_tsr_performance",
-                    start_date=start_date,
-                    end_date=end_date,
-                )
-            )
+            params["format"] = form.export_format.data
+            params["include_archived"] = form.include_archived.data
+            job = enqueue_job("export_tickets", params, current_user.id)
+        else:
+            job = enqueue_job("export_tsr_performance", params, current_user.id)
+        db.session.commit()
+        return redirect(url_for("admin.reports", job=job.id))
 
-    return render_template("reports.html", title="Reporting Tools", form=form)
+    return render_template(
+        "reports.html",
+        title="Reporting Tools",
+        form=form,
+        job_id=request.args.get("job", type=int),
+    )
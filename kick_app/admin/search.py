@@ -0,0 +1,87 @@
+"""
+Client lookup for the async client picker (create ticket form).
+
+Prefix matches on account number or name come first, then substring
+matches fill the remaining slots. Both are index backed:
+
+PostgreSQL: lower(column) text_pattern_ops btrees serve the prefix LIKE,
+lower(column) trigram GIN indexes serve the substring LIKE.
+SQLite (local runs): NOCASE indexes serve the (case-insensitive) prefix
+LIKE; substrings fall back to a scan.
+"""
+
+from sqlalchemy import DDL, event, func, or_, select
+from .. import db
+from ..models import Client, Region
+
+CLIENT_SEARCH_LIMIT = 20
+
+# Trigram indexes can't serve substring patterns shorter than this.
+MIN_SUBSTRING_TERM_LENGTH = 3
+
+# Created by the client search index migration on real databases
+for _column in ("account_number", "account_name"):
+    event.listen(
+        Client.__table__,
+        "after_create",
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS ix_clients_{_column}_nocase "
+            f"ON clients ({_column} COLLATE NOCASE)"
+        ).execute_if(dialect="sqlite"),
+    )
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like(column, pattern, sqlite):
+    # Expressions must match the indexes in the client search migration.
+    if sqlite:
+        return column.like(pattern, escape="\\")
+    return func.lower(column).like(pattern.lower(), escape="\\")
+
+
+def search_clients(term, limit=CLIENT_SEARCH_LIMIT):
+    """
+    Returns up to `limit` clients matching `term` as dicts (id, account
+    number and name, region, label): prefix matches first, then substring
+    matches, each ordered by account name.
+    """
+    term = (term or "").strip()
+    if not term:
+        return []
+
+    sqlite = db.session.get_bind().dialect.name == "sqlite"
+    escaped = _escape_like(term)
+    columns = (Client.account_number, Client.account_name)
+    base = (
+        select(Client.id, Client.account_number, Client.account_name, Region.name)
+        .join(Region, Client.region_id == Region.id)
+        .order_by(Client.account_name, Client.id)
+    )
+
+    prefix = f"{escaped}%"
+    rows = db.session.execute(
+        base.where(or_(*(_like(col, prefix, sqlite) for col in columns))).limit(limit)
+    ).all()
+
+    if len(rows) < limit and len(term) >= MIN_SUBSTRING_TERM_LENGTH:
+        substring = f"%{escaped}%"
+        rows += db.session.execute(
+            base.where(
+                or_(*(_like(col, substring, sqlite) for col in columns)),
+                Client.id.notin_([row[0] for row in rows]),
+            ).limit(limit - len(rows))
+        ).all()
+
+    return [
+        {
+            "id": client_id,
+            "account_number": account_number,
+            "account_name": account_name,
+            "region": region,
+            "label": f"{account_name} ({account_number})",
+        }
+        for client_id, account_number, account_name, region in rows
+    ]
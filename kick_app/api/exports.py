@@ -0,0 +1,219 @@
+"""
+Streaming report writers.
+
+Rows are fetched from a server-side cursor in fixed-size batches and written
+straight out (CSV chunks, or an openpyxl write-only workbook) to the export
+job's result file (jobs/tasks.py), so memory stays flat however long the date
+range is.
+"""
+
+import csv
+import io
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from sqlalchemy import func
+from .. import db, format_datetime_pht
+from ..models import Ticket, ArchivedTicket, Client, Region, User, UserRole
+from .stats import resolution_metrics, format_minutes
+from ..tickets.queries import TicketAssignee, TicketCreator
+
+# Rows per server-side cursor fetch
+EXPORT_BATCH_SIZE = 1000
+
+TICKET_REPORT_HEADERS = [
+    "Ticket ID",
+    "Ticket Name",
+    "Concern Title",
+    "Status",
+    "Created At (PHT)",
+    "Last Updated (PHT)",
+    "Assigned TSR",
+    "Client Name",
+    "Account Number",
+    "Region",
+    "Created By",
+]
+
+
+# --- ROW SOURCES ---
+
+
+def _report_models(include_archived):
+    return (Ticket, ArchivedTicket) if include_archived else (Ticket,)
+
+
+def _ticket_report_query(start_date, end_date, model=Ticket):
+    return (
+        db.session.query(
+            model.id,
+            model.ticket_name,
+            model.concern_title,
+            model.status,
+            model.created_at,
+            model.updated_at,
+            TicketAssignee.full_name,
+            Client.account_name,
+            Client.account_number,
+            Region.name,
+            TicketCreator.full_name,
+        )
+        .join(Client, model.client_id == Client.id)
+        .join(Region, Client.region_id == Region.id)
+        .outerjoin(TicketAssignee, model.assigned_to_id == TicketAssignee.id)
+        .outerjoin(TicketCreator, model.created_by_id == TicketCreator.id)
+        .filter(model.created_at.between(start_date, end_date))
+    )
+
+
+def count_ticket_report_rows(start_date, end_date, include_archived=False):
+    """Row total for progress reporting."""
+    return sum(
+        db.session.query(func.count(model.id))
+        .filter(model.created_at.between(start_date, end_date))
+        .scalar()
+        for model in _report_models(include_archived)
+    )
+
+
+def ticket_report_rows(
+    start_date, end_date, include_archived=False, batch_size=EXPORT_BATCH_SIZE
+):
+    """
+    Yields one formatted row per ticket created in the range, oldest first.
+    With include_archived, archived tickets are unioned in (UNION ALL).
+    """
+    query = _ticket_report_query(start_date, end_date)
+    if include_archived:
+        query = query.union_all(
+            _ticket_report_query(start_date, end_date, ArchivedTicket)
+        )
+    query = query.order_by(Ticket.created_at.asc(), Ticket.id.asc()).yield_per(
+        batch_size
+    )  # server-side cursor, batch_size rows at a time
+    for (
+        ticket_id,
+        ticket_name,
+        concern_title,
+        status,
+        created_at,
+        updated_at,
+        tsr_name,
+        account_name,
+        account_number,
+        region_name,
+        creator_name,
+    ) in query:
+        yield (
+            ticket_id,
+            ticket_name,
+            concern_title,
+            status.value,
+            format_datetime_pht(created_at),
+            format_datetime_pht(updated_at),
+            tsr_name or "Unassigned",
+            account_name,
+            account_number,
+            region_name,
+            creator_name or "N/A",
+        )
+
+
+TSR_PERFORMANCE_HEADERS = [
+    "TSR Name",
+    "Tickets Assigned",
+    "Tickets Resolved",
+    "Resolution Rate (%)",
+    "Avg Resolution Time (Minutes)",
+    "Median Resolution Time (Minutes)",
+    "P90 Resolution Time (Minutes)",
+    "P95 Resolution Time (Minutes)",
+]
+
+
+def tsr_performance_rows(start_date, end_date):
+    """
+    One row per active TSR (by name): tickets assigned (created in range),
+    tickets resolved (resolved_at in range) and the resolution-time metrics
+    of those resolved tickets. Two grouped queries, however many TSRs or
+    tickets there are.
+    """
+    resolved_in_range = Ticket.resolved_at.between(start_date, end_date)
+    rows = (
+        db.session.query(
+            User.id,
+            User.full_name,
+            func.count(Ticket.id).filter(
+                Ticket.created_at.between(start_date, end_date)
+            ),
+            func.count(Ticket.id).filter(resolved_in_range),
+        )
+        .outerjoin(Ticket, Ticket.assigned_to_id == User.id)
+        .filter(User.role == UserRole.TSR, User.is_active == True)
+        .group_by(User.id, User.full_name)
+        .order_by(User.full_name, User.id)
+        .all()
+    )
+    metrics_by_tsr = resolution_metrics(
+        resolved_in_range, group_by=Ticket.assigned_to_id
+    )
+
+    for tsr_id, full_name, assigned_count, resolved_count in rows:
+        resolution_rate = (
+            (resolved_count / assigned_count * 100) if assigned_count > 0 else 0
+        )
+        metrics = metrics_by_tsr.get(tsr_id) or {}
+        yield (
+            full_name,
+            assigned_count,
+            resolved_count,
+            f"{resolution_rate:.2f}%",
+            format_minutes(metrics.get("avg")),
+            format_minutes(metrics.get("median")),
+            format_minutes(metrics.get("p90")),
+            format_minutes(metrics.get("p95")),
+        )
+
+
+# --- WRITERS ---
+
+
+def write_xlsx(fileobj, sheet_name, headers, rows):
+    """
+    Writes rows through a write-only workbook (rows go to disk as they are
+    appended, not kept as cell objects) into `fileobj`.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True)
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def iter_csv(headers, rows, chunk_rows=500):
+    """Yields the CSV as text chunks of about `chunk_rows` rows each."""
+    buffer = io.StringIO()
+    buffer.write("\ufeff")  # BOM, so Excel opens the UTF-8 file correctly
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_csv(fileobj, headers, rows):
+    """Writes the same CSV iter_csv() streams into a text file object."""
+    for chunk in iter_csv(headers, rows):
+        fileobj.write(chunk)
@@ -1,22 +1,20 @@
-from flask import jsonify, request, send_file, flash, redirect, url_for
+from flask import jsonify, request
 from flask_login import login_required, current_user
 from . import api
-from .. import db
-from kick_app.models import (
-    Ticket,
-    User,
-    TicketStatus,
-    UserRole,
-    Announcement,
-    Client,
-    Region,
-    ActivityLog,
-)  #
-from kick_app.__init__ import format_datetime_pht  #
-from sqlalchemy import func
-from datetime import datetime, date, timedelta
-import io
-import pandas as pd  # Ensure pandas is imported
+from .. import db, format_datetime_pht
+from kick_app.models import Ticket, UserRole
+from .stats import (
+    admin_dashboard_stats,
+    tsr_dashboard_stats,
+    resolved_series,
+    pick_granularity,
+    cached_dashboard,
+    time_in_status_report,
+    TIME_IN_STATUS_GROUPS,
+)
+from ..admin.search import search_clients
+from ..tickets.queries import ticket_timeline
+from datetime import datetime, date
 
 
 # --- HELPER FOR DATES ---
@@ -63,322 +61,97 @@ def dashboard_stats():
         start_date_str, end_date_str
     )  # Get parsed dates
 
-    if current_user.role == UserRole.ADMIN:  #
-        # --- Admin Stats ---
-
-        # 1. Stat Cards
-        # Filter "Created" and "Resolved" by the selected date range
-        total_created_range = Ticket.query.filter(
-            Ticket.created_at.between(start_date, end_date)  #
-        ).count()
-
-        resolved_range = Ticket.query.filter(
-            Ticket.status == TicketStatus.RESOLVED,  #
-            Ticket.updated_at.between(start_date, end_date),  #
-        ).count()
-
-        # Counts not dependent on date range (keep as 'all time')
-        total_new = Ticket.query.filter(Ticket.status == TicketStatus.NEW).count()  #
-        total_open = Ticket.query.filter(Ticket.status == TicketStatus.OPEN).count()  #
-        total_inprogress = Ticket.query.filter(
-            Ticket.status == TicketStatus.IN_PROGRESS  #
-        ).count()
-        total_pending = Ticket.query.filter(
-            Ticket.status == TicketStatus.PENDING
-        ).count()  #
+    # Payloads are served from the shared cache; ticket writes bump the
+    # cache version of the affected dashboards (see tickets/events.py)
+    params = (start_date.date(), end_date.date())
 
-        admin_stats = {
-            "total_created": total_created_range,  # Renamed key
-            "total_new": total_new,
-            "total_open": total_open,
-            "total_inprogress": total_inprogress,
-            "total_pending": total_pending,
-            "total_resolved": resolved_range,  # Use range count
-        }
-
-        # 2. Pie Chart (All Time - typically not filtered by date)
-        status_query = (
-            db.session.query(Ticket.status, func.count(Ticket.id))  #
-            .group_by(Ticket.status)  #
-            .all()
-        )
-        pie_data = {
-            "labels": [status.value for status, count in status_query],  #
-            "data": [count for status, count in status_query],
-        }
-
-        # 3. Bar Chart (Open/In-Progress - typically not filtered by date)
-        tsr_query = (
-            db.session.query(User.full_name, func.count(Ticket.id))  #
-            .join(Ticket, User.id == Ticket.assigned_to_id)  #
-            .filter(
-                User.role == UserRole.TSR,  #
-                Ticket.status.in_([TicketStatus.OPEN, TicketStatus.IN_PROGRESS]),  #
+    if current_user.role == UserRole.ADMIN:  #
+        # --- Admin Stats (one aggregate pass + one TSR GROUP BY) ---
+        def compute_admin():
+            admin_stats, pie_data, bar_data = admin_dashboard_stats(
+                start_date, end_date
+            )
+            return dict(
+                role="admin", stats=admin_stats, pie_chart=pie_data, bar_chart=bar_data
             )
-            .group_by(User.full_name)  #
-            .order_by(func.count(Ticket.id).desc())
-            .all()
-        )
-        bar_data = {
-            "labels": [name for name, count in tsr_query],
-            "data": [count for name, count in tsr_query],
-        }
 
         return jsonify(
-            role="admin", stats=admin_stats, pie_chart=pie_data, bar_chart=bar_data
+            cached_dashboard("admin", current_user.id, params, compute_admin)
         )
 
     else:
         # --- TSR Stats ---
         my_id = current_user.id
+        granularity = pick_granularity(
+            start_date, end_date, request.args.get("granularity")
+        )
 
-        # 1. Stat Cards
-        # Use date range for Resolved count
-        resolved_range = Ticket.query.filter(
-            Ticket.assigned_to_id == my_id,
-            Ticket.status == TicketStatus.RESOLVED,  #
-            Ticket.updated_at.between(start_date, end_date),  #
-        ).count()
-
-        # Counts not dependent on date range (current snapshot)
-        total_new = Ticket.query.filter(
-            Ticket.assigned_to_id == my_id, Ticket.status == TicketStatus.NEW  #
-        ).count()
-        total_open = Ticket.query.filter(
-            Ticket.assigned_to_id == my_id, Ticket.status == TicketStatus.OPEN  #
-        ).count()
-        total_inprogress = Ticket.query.filter(
-            Ticket.assigned_to_id == my_id, Ticket.status == TicketStatus.IN_PROGRESS  #
-        ).count()
-        total_pending = Ticket.query.filter(
-            Ticket.assigned_to_id == my_id, Ticket.status == TicketStatus.PENDING  #
-        ).count()
-
-        # Avg Resolution Time (remains 'all time' for TSR dashboard simplicity)
-        resolved_tickets_all_time = Ticket.query.filter(  #
-            Ticket.assigned_to_id == my_id, Ticket.status == TicketStatus.RESOLVED  #
-        ).all()
-        total_resolution_time_tsr = timedelta(0)
-        resolved_count_tsr = len(resolved_tickets_all_time)
-        avg_resolution_minutes_tsr = 0
-        if resolved_count_tsr > 0:
-            for ticket in resolved_tickets_all_time:
-                resolution_time = ticket.updated_at - ticket.created_at  #
-                total_resolution_time_tsr += resolution_time
-            avg_resolution_seconds_tsr = (
-                total_resolution_time_tsr.total_seconds() / resolved_count_tsr
-            )
-            avg_resolution_minutes_tsr = avg_resolution_seconds_tsr / 60
-
-        tsr_stats = {
-            "total_new": total_new,
-            "total_open": total_open,
-            "total_inprogress": total_inprogress,
-            "total_pending": total_pending,
-            "total_resolved": resolved_range,  # Use range count
-            "avg_resolution_time": f"{avg_resolution_minutes_tsr:.2f}",
-        }
-
-        # --- UPDATE Line Chart to use date range ---
-        labels = []
-        data = []
-        # Calculate number of days in the range
-        delta = end_date.date() - start_date.date()
-        num_days = delta.days + 1  # Include both start and end day
-
-        for i in range(num_days):
-            day = start_date.date() + timedelta(days=i)
-            day_start_dt = datetime.combine(day, datetime.min.time())
-            day_end_dt = datetime.combine(day, datetime.max.time())
-
-            labels.append(day.strftime("%a, %b %d"))  # Format label
+        def compute_tsr():
+            # 1. Stat Cards (one aggregate pass over my tickets)
+            tsr_stats = tsr_dashboard_stats(my_id, start_date, end_date)
 
-            count = Ticket.query.filter(
-                Ticket.assigned_to_id == my_id,
-                Ticket.status == TicketStatus.RESOLVED,  #
-                Ticket.updated_at.between(day_start_dt, day_end_dt),  #
-            ).count()
-            data.append(count)
+            # 2. Line Chart: one bucketed GROUP BY over PHT-local days/weeks/months
+            line_data = resolved_series(my_id, start_date, end_date, granularity)
 
-        line_data = {"labels": labels, "data": data}
-        # --- END Line Chart Update ---
+            return dict(role="tsr", stats=tsr_stats, line_chart=line_data)
 
         return jsonify(
-            role="tsr",
-            stats=tsr_stats,
-            line_chart=line_data,
+            cached_dashboard("tsr", my_id, params + (granularity,), compute_tsr)
         )
 
 
-# --- Other API routes (export_tickets, export_tsr_performance) remain below ---
-@api.route("/export/tickets")  #
+@api.route("/clients/search")
 @login_required
-def export_tickets():
+def client_search():
     """
-    Handles the generation and download of the ticket report.
+    Client picker lookup (create ticket form): top matches for ?q= by
+    account number or name, prefix matches first.
     """
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
-
-    if not start_date_str or not end_date_str:
-        flash("Date range is required for reports.", "danger")
-        return redirect(url_for("admin.reports"))
-
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-    end_date = datetime.combine(
-        datetime.strptime(end_date_str, "%Y-%m-%d"), datetime.max.time()
-    )
-
-    tickets_query = (
-        Ticket.query.filter(Ticket.created_at.between(start_date, end_date))  #
-        .order_by(Ticket.created_at.asc())  #
-        .all()
-    )
-
-    if not tickets_query:
-        flash("No tickets found for the selected date range.", "warning")
-        return redirect(url_for("admin.reports"))
-
-    data = []
-    for ticket in tickets_query:
-        data.append(
-            {
-                "Ticket ID": ticket.id,  #
-                "Ticket Name": ticket.ticket_name,  #
-                "Concern Title": ticket.concern_title,  #
-                "Status": ticket.status.value,  #
-                "Created At (PHT)": format_datetime_pht(ticket.created_at),  #
-                "Last Updated (PHT)": format_datetime_pht(ticket.updated_at),  #
-                "Assigned TSR": (
-                    ticket.assigned_tsr.full_name  #
-                    if ticket.assigned_tsr  #
-                    else "Unassigned"
-                ),
-                "Client Name": ticket.client.account_name,  #
-                "Account Number": ticket.client.account_number,  #
-                "Region": ticket.client.region.name,  #
-                "Created By": ticket.creator.full_name if ticket.creator else "N/A",  #
-            }
-        )
+    if current_user.role != UserRole.ADMIN:
+        return jsonify(error="Admins only."), 403
+    return jsonify(results=search_clients(request.args.get("q", "")))
 
-    df = pd.DataFrame(data)
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Ticket_Report", index=False)
-
-    output.seek(0)
-    filename = f"Kick_Ticket_Report_{start_date_str}_to_{end_date_str}.xlsx"
-
-    return send_file(
-        output,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename,
-    )
-
-
-@api.route("/export/tsr-performance")  #
+@api.route("/time-in-status")
 @login_required
-def export_tsr_performance():
+def time_in_status():
     """
-    Generates and downloads the TSR Performance Report.
+    Time-in-status distributions (seconds) for ?start_date=&end_date=,
+    grouped by ?group_by=tsr (default) or region. Admins only.
     """
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
-
-    if not start_date_str or not end_date_str:
-        flash("Date range is required for reports.", "danger")
-        return redirect(url_for("admin.reports"))
-
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-    end_date_dt = datetime.strptime(end_date_str, "%Y-%m-%d")
-    end_date = datetime.combine(end_date_dt, datetime.max.time())
-
-    active_tsrs = (
-        User.query.filter(User.role == UserRole.TSR, User.is_active == True)  #
-        .order_by(User.full_name)  #
-        .all()
+    if current_user.role != UserRole.ADMIN:
+        return jsonify(error="Admins only."), 403
+    group_by = request.args.get("group_by", "tsr")
+    if group_by not in TIME_IN_STATUS_GROUPS:
+        return jsonify(error="group_by must be 'tsr' or 'region'."), 400
+    start_date, end_date = get_start_end_dates(
+        request.args.get("start_date"), request.args.get("end_date")
     )
+    return jsonify(time_in_status_report(start_date, end_date, group_by))
 
-    if not active_tsrs:
-        flash("No active TSRs found to generate a report for.", "warning")
-        return redirect(url_for("admin.reports"))
-
-    report_data = []
-    for tsr in active_tsrs:
-        assigned_count = Ticket.query.filter(
-            Ticket.assigned_to_id == tsr.id,  #
-            Ticket.created_at.between(start_date, end_date),  #
-        ).count()
-
-        resolved_tickets = Ticket.query.filter(
-            Ticket.assigned_to_id == tsr.id,  #
-            Ticket.status == TicketStatus.RESOLVED,  #
-            Ticket.updated_at.between(start_date, end_date),  #
-        ).all()
-        resolved_count = len(resolved_tickets)
-
-        resolution_rate = (
-            (resolved_count / assigned_count * 100) if assigned_count > 0 else 0
-        )
-
-        total_resolution_time = timedelta(0)
-        if resolved_count > 0:
-            for ticket in resolved_tickets:
-                resolved_log = (
-                    ActivityLog.query.filter(  #
-                        ActivityLog.ticket_id == ticket.id,  #
-                        ActivityLog.action.like("%Status changed% to Resolved%"),  #
-                    )
-                    .order_by(ActivityLog.timestamp.desc())  #
-                    .first()
-                )
-
-                resolution_time = timedelta(0)
-                if resolved_log:
-                    resolution_time = resolved_log.timestamp - ticket.created_at  #
-                else:
-                    resolution_time = ticket.updated_at - ticket.created_at  #
-
-                total_resolution_time += resolution_time
-
-            avg_resolution_seconds = (
-                total_resolution_time.total_seconds() / resolved_count
-            )
-            avg_resolution_minutes = avg_resolution_seconds / 60
-        else:
-            avg_resolution_minutes = 0
 
-        report_data.append(
+@api.route("/tickets/<int:ticket_id>/timeline")
+@login_required
+def ticket_timeline_page(ticket_id):
+    """
+    "Load older" on view_ticket: the ticket's activity entries after
+    ?cursor=, newest first, plus the cursor for the next page (null at the end).
+    """
+    row = db.session.query(Ticket.assigned_to_id).filter(Ticket.id == ticket_id).first()
+    if row is None:
+        return jsonify(error="Ticket not found."), 404
+    if current_user.role != UserRole.ADMIN and row.assigned_to_id != current_user.id:
+        return jsonify(error="You do not have permission to view this ticket."), 403
+
+    page = ticket_timeline(ticket_id, cursor=request.args.get("cursor"))
+    return jsonify(
+        entries=[
             {
-                "TSR Name": tsr.full_name,  #
-                "Tickets Assigned": assigned_count,
-                "Tickets Resolved": resolved_count,
-                "Resolution Rate (%)": f"{resolution_rate:.2f}%",
-                "Avg Resolution Time (Minutes)": f"{avg_resolution_minutes:.2f}",
+                "id": log.id,
+                "timestamp": format_datetime_pht(log.timestamp),
+                "action": log.describe(),
             }
-        )
-
-    if not report_data:
-        flash(
-            "No relevant ticket data found for active TSRs in the selected date range.",
-            "warning",
-        )
-        return redirect(url_for("admin.reports"))
-
-    df = pd.DataFrame(report_data)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="TSR_Performance", index=False)
-
-    output.seek(0)
-    filename = f"Kick_TSR_Performance_{start_date_str}_to_{end_date_str}.xlsx"
-
-    return send_file(
-        output,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename,
+            for log in page.items
+        ],
+        next_cursor=page.next_cursor,
     )
@@ -0,0 +1,454 @@
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from .. import db
+from ..models import (
+    Ticket,
+    Client,
+    User,
+    TicketStatus,
+    UserRole,
+    TicketStatusRollup,
+    TicketStatusHistory,
+)
+from ..refdata import regions
+from ..cache import get_shared_cache, ADMIN_DASHBOARD_SCOPE, tsr_dashboard_scope
+from ..sqlutils import (
+    seconds_between,
+    pht_bucket,
+    pht_day_range,
+    bucket_to_date,
+)
+
+
+# Pie chart / card order (matches the colour order in dashboard.html)
+STATUS_DISPLAY_ORDER = [
+    TicketStatus.NEW,
+    TicketStatus.OPEN,
+    TicketStatus.IN_PROGRESS,
+    TicketStatus.PENDING,
+    TicketStatus.RESOLVED,
+]
+
+# Statuses counted on the admin "Tickets per TSR" bar chart
+ACTIVE_WORK_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+
+def _resolved_between(start_date, end_date):
+    """
+    Tickets resolved on the PHT dates of start_date through end_date (the
+    days resolved_series buckets by), as criteria on the naive-UTC column.
+    """
+    # resolved_at is cleared on reopen, so it's only set on resolved tickets
+    range_start, range_end = pht_day_range(start_date.date(), end_date.date())
+    return (Ticket.resolved_at.between(range_start, range_end),)
+
+
+def _rollup_status_totals(*criteria):
+    """All-time ticket count per status, summed from the rollup table."""
+    totals = dict.fromkeys(STATUS_DISPLAY_ORDER, 0)
+    rows = (
+        db.session.query(
+            TicketStatusRollup.status, func.sum(TicketStatusRollup.ticket_count)
+        )
+        .filter(*criteria)
+        .group_by(TicketStatusRollup.status)
+        .all()
+    )
+    for status, count in rows:
+        totals[status] = count or 0
+    return totals
+
+
+def admin_dashboard_stats(start_date, end_date):
+    """
+    Admin stat cards, pie chart and per-TSR bar chart from ONE aggregate over
+    the status rollup (cost grows with rollup rows, not tickets), plus one
+    count of the tickets resolved in the range.
+    """
+    rollup = TicketStatusRollup
+    rows = (
+        db.session.query(
+            rollup.status,
+            User.full_name,
+            User.role,
+            func.sum(rollup.ticket_count),
+            func.sum(rollup.ticket_count).filter(
+                rollup.created_day.between(start_date.date(), end_date.date())
+            ),
+        )
+        .outerjoin(User, User.id == rollup.assigned_to_id)
+        .group_by(rollup.status, rollup.assigned_to_id, User.full_name, User.role)
+        .all()
+    )
+
+    status_totals = dict.fromkeys(STATUS_DISPLAY_ORDER, 0)
+    created_range = 0
+    tsr_active = {}
+    for status, full_name, role, total, created in rows:
+        status_totals[status] += total or 0
+        created_range += created or 0
+        if role == UserRole.TSR and status in ACTIVE_WORK_STATUSES and total:
+            tsr_active[full_name] = tsr_active.get(full_name, 0) + total
+
+    resolved_range = (
+        db.session.query(func.count(Ticket.id))
+        .filter(*_resolved_between(start_date, end_date))
+        .scalar()
+    )
+
+    stats = {
+        "total_created": created_range,
+        "total_new": status_totals[TicketStatus.NEW],
+        "total_open": status_totals[TicketStatus.OPEN],
+        "total_inprogress": status_totals[TicketStatus.IN_PROGRESS],
+        "total_pending": status_totals[TicketStatus.PENDING],
+        "total_resolved": resolved_range,
+    }
+
+    # Pie Chart (All Time) - same rollup result, no extra query
+    pie_data = {
+        "labels": [status.value for status in STATUS_DISPLAY_ORDER],
+        "data": [status_totals[status] for status in STATUS_DISPLAY_ORDER],
+    }
+
+    # Bar Chart (Open/In-Progress per TSR) - same rollup result
+    tsr_counts = sorted(tsr_active.items(), key=lambda item: item[1], reverse=True)
+    bar_data = {
+        "labels": [name for name, count in tsr_counts],
+        "data": [count for name, count in tsr_counts],
+    }
+
+    return stats, pie_data, bar_data
+
+
+# --- RESOLUTION METRICS ---
+
+# (name, fraction) pairs reported alongside the mean
+RESOLUTION_PERCENTILES = (("median", 0.5), ("p90", 0.9), ("p95", 0.95))
+RESOLUTION_METRICS = ("count", "avg") + tuple(
+    name for name, _ in RESOLUTION_PERCENTILES
+)
+
+
+def _empty_metrics():
+    return dict.fromkeys(RESOLUTION_METRICS, 0.0) | {"count": 0}
+
+
+def _numpy_metrics(seconds):
+    percentiles = np.percentile(seconds, [q * 100 for _, q in RESOLUTION_PERCENTILES])
+    metrics = {"count": int(seconds.size), "avg": float(seconds.mean())}
+    for (name, _), value in zip(RESOLUTION_PERCENTILES, percentiles):
+        metrics[name] = float(value)
+    return metrics
+
+
+def resolution_metrics(*criteria, group_by=None):
+    """
+    Resolution time (created_at -> resolved_at, in seconds) of the resolved
+    tickets matching `criteria`: count, avg, median, p90 and p95.
+
+    Returns one metrics dict, or {group value: metrics} when `group_by` (a
+    column, e.g. Ticket.assigned_to_id; NULL groups are skipped) is given.
+    PostgreSQL computes
+    everything in SQL with percentile_cont; elsewhere only the raw seconds
+    are fetched and NumPy does the maths (same linear interpolation).
+    """
+    seconds = seconds_between(Ticket.created_at, Ticket.resolved_at)
+    keys = [group_by] if group_by is not None else []
+    criteria = (Ticket.resolved_at.isnot(None), *criteria)
+    if group_by is not None:
+        criteria += (group_by.isnot(None),)
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        rows = (
+            db.session.query(
+                *keys,
+                func.count(Ticket.id),
+                func.avg(seconds),
+                *[
+                    # EXTRACT yields numeric on PG 14+; percentile_cont wants float8
+                    func.percentile_cont(q).within_group(cast(seconds, Float))
+                    for _, q in RESOLUTION_PERCENTILES
+                ],
+            )
+            .filter(*criteria)
+            .group_by(*keys)
+            .all()
+        )
+        grouped = {}
+        for row in rows:
+            key, values = (row[0], row[1:]) if keys else (None, row)
+            if values[0]:
+                grouped[key] = {"count": values[0]} | {
+                    name: float(value or 0)
+                    for name, value in zip(RESOLUTION_METRICS[1:], values[1:])
+                }
+    else:
+        rows = db.session.query(*keys, seconds).filter(*criteria).all()
+        grouped = {}
+        if rows and keys:
+            groups = np.array([row[0] for row in rows])
+            values = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+            order = np.argsort(groups, kind="stable")
+            names, starts = np.unique(groups[order], return_index=True)
+            for name, chunk in zip(names, np.split(values[order], starts[1:])):
+                grouped[name.item()] = _numpy_metrics(chunk)
+        elif rows:
+            grouped[None] = _numpy_metrics(
+                np.fromiter((row[0] for row in rows), dtype=float, count=len(rows))
+            )
+
+    if group_by is None:
+        return grouped.get(None, _empty_metrics())
+    return grouped
+
+
+# --- TIME IN STATUS ---
+
+# Statuses whose dwell time is reported (Resolved is where tickets end up)
+TIME_IN_STATUS_STATUSES = (
+    TicketStatus.NEW,
+    TicketStatus.OPEN,
+    TicketStatus.IN_PROGRESS,
+    TicketStatus.PENDING,
+)
+
+# group_by name -> column (tickets are grouped by current assignee / region)
+TIME_IN_STATUS_GROUPS = {"tsr": Ticket.assigned_to_id, "region": Client.region_id}
+
+
+def time_in_status_metrics(start_date, end_date, group_by="tsr"):
+    """
+    How long tickets stayed in each open status, per TSR or region: count,
+    avg, median, p90 and p95 seconds of the stays that ENDED between
+    start_date and end_date. A stay runs from one status_history row to the
+    ticket's next one (LEAD over the ticket's transitions); stays still in
+    progress are left out.
+
+    Returns {group id: {TicketStatus: metrics}}. PostgreSQL aggregates in
+    SQL; elsewhere the durations are fetched ordered by group and status and
+    NumPy does the maths, as in resolution_metrics.
+    """
+    history = TicketStatusHistory
+    # Only tickets with a transition in the range can have a stay ending there
+    active_tickets = select(history.ticket_id).where(
+        history.changed_at.between(start_date, end_date)
+    )
+    stays = (
+        select(
+            history.ticket_id,
+            history.to_status.label("status"),
+            history.changed_at.label("entered_at"),
+            func.lead(history.changed_at)
+            .over(
+                partition_by=history.ticket_id,
+                order_by=(history.changed_at, history.id),
+            )
+            .label("left_at"),
+        )
+        .where(
+            history.ticket_id.in_(active_tickets), history.changed_at <= end_date
+        )
+        .subquery()
+    )
+
+    group = TIME_IN_STATUS_GROUPS[group_by]
+    seconds = seconds_between(stays.c.entered_at, stays.c.left_at)
+    keys = [group, stays.c.status]
+    criteria = (
+        stays.c.left_at.between(start_date, end_date),
+        stays.c.status.in_(TIME_IN_STATUS_STATUSES),
+        group.isnot(None),
+    )
+
+    def stays_query(*columns):
+        return (
+            db.session.query(*columns)
+            .select_from(stays)
+            .join(Ticket, Ticket.id == stays.c.ticket_id)
+            .join(Client, Client.id == Ticket.client_id)
+            .filter(*criteria)
+        )
+
+    grouped = {}
+    if db.session.get_bind().dialect.name == "postgresql":
+        rows = (
+            stays_query(
+                *keys,
+                func.count(),
+                func.avg(seconds),
+                *[
+                    func.percentile_cont(q).within_group(cast(seconds, Float))
+                    for _, q in RESOLUTION_PERCENTILES
+                ],
+            )
+            .group_by(*keys)
+            .all()
+        )
+        for group_id, status, *values in rows:
+            grouped.setdefault(group_id, {})[status] = {"count": values[0]} | {
+                name: float(value or 0)
+                for name, value in zip(RESOLUTION_METRICS[1:], values[1:])
+            }
+    else:
+        rows = stays_query(*keys, seconds).order_by(*keys)
+        for (group_id, status), chunk in groupby(rows, key=itemgetter(0, 1)):
+            grouped.setdefault(group_id, {})[status] = _numpy_metrics(
+                np.fromiter((row[2] for row in chunk), dtype=float)
+            )
+    return grouped
+
+
+def time_in_status_report(start_date, end_date, group_by="tsr"):
+    """time_in_status_metrics as a JSON-ready payload with group names."""
+    metrics = time_in_status_metrics(start_date, end_date, group_by)
+    if group_by == "region":
+        names = {region.id: region.name for region in regions()}
+    else:
+        names = dict(
+            db.session.query(User.id, User.full_name).filter(User.id.in_(metrics))
+        )
+    return {
+        "group_by": group_by,
+        "start_date": start_date.date().isoformat(),
+        "end_date": end_date.date().isoformat(),
+        "statuses": [status.value for status in TIME_IN_STATUS_STATUSES],
+        "groups": [
+            {
+                "id": group_id,
+                "name": names.get(group_id, "Unknown"),
+                "metrics": {
+                    status.value: by_status.get(status, _empty_metrics())
+                    for status in TIME_IN_STATUS_STATUSES
+                },
+            }
+            for group_id, by_status in sorted(
+                metrics.items(), key=lambda item: names.get(item[0], "")
+            )
+        ],
+    }
+
+
+def format_minutes(seconds):
+    return f"{(seconds or 0) / 60:.2f}"
+
+
+def tsr_dashboard_stats(user_id, start_date, end_date):
+    """
+    A TSR's stat cards: the status snapshot from the rollup, the resolved in
+    range count, and all-time resolution-time metrics (avg, median, p90, p95).
+    """
+    status_totals = _rollup_status_totals(TicketStatusRollup.assigned_to_id == user_id)
+
+    resolved_range = (
+        db.session.query(func.count(Ticket.id))
+        .filter(
+            Ticket.assigned_to_id == user_id, *_resolved_between(start_date, end_date)
+        )
+        .scalar()
+    )
+    metrics = resolution_metrics(Ticket.assigned_to_id == user_id)
+
+    return {
+        "total_new": status_totals[TicketStatus.NEW],
+        "total_open": status_totals[TicketStatus.OPEN],
+        "total_inprogress": status_totals[TicketStatus.IN_PROGRESS],
+        "total_pending": status_totals[TicketStatus.PENDING],
+        "total_resolved": resolved_range,
+        "avg_resolution_time": format_minutes(metrics["avg"]),
+        "median_resolution_time": format_minutes(metrics["median"]),
+        "p90_resolution_time": format_minutes(metrics["p90"]),
+        "p95_resolution_time": format_minutes(metrics["p95"]),
+    }
+
+
+# --- CACHING ---
+# Dashboard payloads are cached per (role, user, date range, granularity) and
+# keyed on the scope version, so ticket writes (see tickets/events.py) retire
+# only the admin view and the dashboards of the TSRs involved.
+
+
+def cached_dashboard(role, user_id, params, compute):
+    """
+    Returns compute() through the shared cross-worker cache. `params` is the
+    tuple of request inputs the payload depends on.
+    """
+    cache = get_shared_cache()
+    scope = ADMIN_DASHBOARD_SCOPE if role == "admin" else tsr_dashboard_scope(user_id)
+    version = cache.version(scope)
+    key = ":".join(["dashboard", role, str(user_id), *map(str, params), f"v{version}"])
+    payload = cache.get(key)
+    if payload is None:
+        payload = compute()
+        cache.set(key, payload)  # the cache's TTL is DASHBOARD_CACHE_TTL
+    return payload
+
+
+# --- LINE CHART SERIES ---
+
+SERIES_LABEL_FORMATS = {
+    "day": "%a, %b %d",
+    "week": "Week of %b %d",
+    "month": "%b %Y",
+}
+
+
+def pick_granularity(start_date, end_date, requested=None):
+    """Honours an explicit day/week/month, else keeps long ranges compact."""
+    if requested in SERIES_LABEL_FORMATS:
+        return requested
+    days = (end_date.date() - start_date.date()).days + 1
+    if days <= 62:
+        return "day"
+    if days <= 366:
+        return "week"
+    return "month"
+
+
+def _bucket_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(bucket, granularity):
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if granularity == "month":
+        return (bucket + timedelta(days=32)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+def resolved_series(user_id, start_date, end_date, granularity="day"):
+    """
+    Tickets a TSR resolved per PHT-local day/week/month between the PHT dates
+    of start_date and end_date: ONE bucketed GROUP BY, gaps zero-filled here.
+    """
+    first_day, last_day = start_date.date(), end_date.date()
+
+    bucket = pht_bucket(Ticket.resolved_at, granularity)
+    rows = (
+        db.session.query(bucket, func.count(Ticket.id))
+        .filter(
+            Ticket.assigned_to_id == user_id, *_resolved_between(start_date, end_date)
+        )
+        .group_by(bucket)
+        .all()
+    )
+    counts = {bucket_to_date(key): count for key, count in rows}
+
+    labels = []
+    data = []
+    label_format = SERIES_LABEL_FORMATS[granularity]
+    current = _bucket_start(first_day, granularity)
+    while current <= last_day:
+        labels.append(current.strftime(label_format))
+        data.append(counts.get(current, 0))
+        current = _next_bucket(current, granularity)
+
+    return {"labels": labels, "data": data, "granularity": granularity}
@@ -0,0 +1,155 @@
+"""
+Small cross-process cache shared by every gunicorn worker on the host.
+
+Backed by one SQLite file (in /dev/shm by default, so it lives in RAM).
+Entries have a TTL and are evicted least-recently-used past a size cap.
+A hit only writes its last_access back when the stored one is older than
+LRU_TOUCH_FRACTION of the TTL, so a hot key does not take the file's write
+lock on every read; recency is exact to within that window.
+Invalidation is by version counters: callers fold `version(scope)` into their
+keys, and a write bumps the scope so old entries are simply never read again
+(they age out through TTL/LRU).
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import db
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Fraction of the TTL a hit's last_access may lag before get() rewrites it
+LRU_TOUCH_FRACTION = 0.25
+
+
+class SharedCache:
+    """JSON values in a SQLite file, with TTL, LRU eviction and version scopes."""
+
+    def __init__(self, path, ttl=60, max_entries=2000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = ttl * LRU_TOUCH_FRACTION
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A fresh autocommit connection per call: cheap for SQLite and safe
+        # across threads and forked workers.
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("PRAGMA synchronous=OFF")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, last_access FROM entries "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] >= self.touch_interval:
+                conn.execute(
+                    "UPDATE entries SET last_access = ? WHERE key = ?", (now, key)
+                )
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            # LRU: keep only the most recently used max_entries
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def version(self, scope):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM versions WHERE scope = ?", (scope,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, *scopes):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO versions (scope, version) VALUES (?, 1) "
+                "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+                [(scope,) for scope in scopes],
+            )
+
+
+def get_shared_cache():
+    """The app's SharedCache (one instance per process, per app)."""
+    cache = current_app.extensions.get("kick_shared_cache")
+    if cache is None:
+        cache = SharedCache(
+            current_app.config["SHARED_CACHE_PATH"],
+            # The dashboards are the cache's entries; their TTL also sets
+            # how stale a hit's last_access may get (touch_interval)
+            ttl=current_app.config["DASHBOARD_CACHE_TTL"],
+            max_entries=current_app.config["SHARED_CACHE_MAX_ENTRIES"],
+        )
+        current_app.extensions["kick_shared_cache"] = cache
+    return cache
+
+
+# --- TRANSACTIONAL INVALIDATION ---
+# Writers call invalidate_on_commit(); the bump only happens once the DB
+# transaction commits, so a reader can never cache pre-commit data under
+# the new version. A rollback discards the pending scopes.
+
+_PENDING_KEY = "kick_cache_pending_scopes"
+
+ADMIN_DASHBOARD_SCOPE = "dashboard:admin"
+
+
+def tsr_dashboard_scope(user_id):
+    return f"dashboard:tsr:{user_id}"
+
+
+def invalidate_on_commit(*scopes):
+    db.session.info.setdefault(_PENDING_KEY, set()).update(scopes)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_pending_scopes(session):
+    scopes = session.info.pop(_PENDING_KEY, None)
+    if scopes:
+        get_shared_cache().bump(*scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_scopes(session):
+    session.info.pop(_PENDING_KEY, None)
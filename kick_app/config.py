@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -36,3 +37,27 @@ class Config:
     # --- END OF REVISION ---
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # --- SHARED CACHE (dashboard stats, reference data) ---
+    # One SQLite file shared by every gunicorn worker on the host.
+    # /dev/shm keeps it in RAM where available.
+    SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH") or os.path.join(
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+        "kick_shared_cache.sqlite3",
+    )
+    SHARED_CACHE_MAX_ENTRIES = int(os.environ.get("SHARED_CACHE_MAX_ENTRIES", 5000))
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 120))  # seconds
+    # Regions / active TSR dropdowns (refdata.py) reload at least this often
+    REFDATA_MAX_AGE = int(os.environ.get("REFDATA_MAX_AGE", 300))  # seconds
+
+    # --- BACKGROUND JOBS (`flask run-jobs`) ---
+    # Uploaded import files and finished export files live here.
+    JOB_RESULTS_DIR = os.environ.get("JOB_RESULTS_DIR") or os.path.join(
+        basedir, "job_files"
+    )
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2))  # seconds
+    # A running job whose worker has not checked in for this long is failed
+    JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 600))  # seconds
+    # Result files of finished jobs are deleted after this long
+    JOB_FILES_MAX_AGE = int(os.environ.get("JOB_FILES_MAX_AGE", 7 * 24 * 3600))
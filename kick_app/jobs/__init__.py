@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+# Background job status / download endpoints
+jobs = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+from . import routes
@@ -0,0 +1,55 @@
+import os
+from flask import jsonify, send_file, flash, redirect, url_for, abort
+from flask_login import login_required, current_user
+from . import jobs
+from .. import db
+from ..models import Job, JobStatus, UserRole
+
+# Job kinds whose result is reviewed on a page: kind -> endpoint taking job_id
+JOB_REVIEW_PAGES = {"preview_client_import": "admin.client_import_preview"}
+
+
+def _get_own_job(id):
+    """The job, if the current user queued it (admins see every job)."""
+    job = db.get_or_404(Job, id)
+    if current_user.role != UserRole.ADMIN and job.created_by_id != current_user.id:
+        abort(404)
+    return job
+
+
+@jobs.route("/<int:id>")
+@login_required
+def job_status(id):
+    """Polled by the job status panel (templates/_job_status.html)."""
+    job = _get_own_job(id)
+    has_file = job.status == JobStatus.SUCCEEDED and bool(job.result_path)
+    review_page = JOB_REVIEW_PAGES.get(job.kind) if has_file else None
+    return jsonify(
+        id=job.id,
+        kind=job.kind,
+        status=job.status.name,
+        status_label=job.status.value,
+        progress=job.progress,
+        progress_message=job.progress_message,
+        result_message=job.result_message,
+        error=job.error,
+        download_url=url_for("jobs.download_job", id=job.id) if has_file else None,
+        review_url=url_for(review_page, job_id=job.id) if review_page else None,
+        finished=job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED),
+    )
+
+
+@jobs.route("/<int:id>/download")
+@login_required
+def download_job(id):
+    job = _get_own_job(id)
+    if (
+        job.status != JobStatus.SUCCEEDED
+        or not job.result_path
+        or not os.path.exists(job.result_path)
+    ):
+        flash("That file is not available.", "warning")
+        return redirect(url_for("main.index"))
+    return send_file(
+        job.result_path, as_attachment=True, download_name=job.result_filename
+    )
@@ -0,0 +1,366 @@
+"""
+DB-backed background job runner.
+
+Web requests enqueue a Job row and return immediately; `flask run-jobs`
+starts a pool of worker processes that claim queued jobs one at a time,
+run the registered handler for the job's kind, and record progress and a
+result file the browser polls for and downloads (see jobs/routes.py).
+
+A running job's heartbeat_at is refreshed every HEARTBEAT_INTERVAL seconds;
+workers periodically fail jobs whose heartbeat is older than JOB_STALE_AFTER
+(their process died) and delete result files older than JOB_FILES_MAX_AGE.
+"""
+
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+from .. import db
+from ..models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(ctx, params); handlers live in jobs/tasks.py
+JOB_HANDLERS = {}
+
+# Minimum seconds between progress writes
+PROGRESS_INTERVAL = 1.0
+
+# Seconds between heartbeat writes for a running job (well under JOB_STALE_AFTER)
+HEARTBEAT_INTERVAL = 30.0
+
+# Minimum seconds between an idle worker's housekeeping passes
+MAINTENANCE_INTERVAL = 300.0
+
+
+def job_handler(kind):
+    """Registers a function as the handler for jobs of `kind`."""
+
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+def enqueue_job(kind, params, user_id):
+    """Adds a queued job to the session. The caller commits."""
+    job = Job(kind=kind, params=json.dumps(params), created_by_id=user_id)
+    db.session.add(job)
+    return job
+
+
+def job_files_dir():
+    path = current_app.config["JOB_RESULTS_DIR"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_job(engine, job_id, **values):
+    """
+    Updates a job row on a separate connection, so pollers see it while the
+    handler's own transaction is still open. Best effort: a locked SQLite
+    file just skips the update.
+    """
+    stmt = update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values)
+    try:
+        with engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql("PRAGMA busy_timeout = 50")
+            try:
+                conn.execute(stmt)
+            finally:
+                if conn.dialect.name == "sqlite":
+                    conn.exec_driver_sql("PRAGMA busy_timeout = 5000")
+    except OperationalError:
+        pass
+
+
+class _Heartbeat(threading.Thread):
+    """Refreshes a running job's heartbeat_at until stopped."""
+
+    def __init__(self, engine, job_id, interval=HEARTBEAT_INTERVAL):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.job_id = job_id
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            _write_job(self.engine, self.job_id, heartbeat_at=datetime.utcnow())
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class JobContext:
+    """What a handler gets: progress reporting and its result file."""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.result_path = None
+        self.result_filename = None
+        self._last_progress = 0.0
+
+    def progress(self, percent, message=None):
+        """
+        Records progress (0-100), visible to pollers at once (see _write_job).
+        Throttled; also counts as a heartbeat.
+        """
+        now = time.monotonic()
+        if now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        _write_job(
+            db.engine,
+            self.job_id,
+            progress=max(0, min(int(percent), 99)),
+            progress_message=message,
+            heartbeat_at=datetime.utcnow(),
+        )
+
+    def track(self, rows, total, message="Processing"):
+        """Passes `rows` through, reporting progress against `total`."""
+        for done, row in enumerate(rows, start=1):
+            yield row
+            if total:
+                self.progress(done * 100 / total, f"{message} {done:,} of {total:,}")
+
+    def result_file(self, filename):
+        """Path to write the job's downloadable result to."""
+        self.result_filename = filename
+        self.result_path = os.path.join(
+            job_files_dir(), f"job_{self.job_id}_{filename}"
+        )
+        return self.result_path
+
+
+# --- WORKER SIDE ---
+
+
+def _worker_id(pool_id):
+    """'host:pool:pid', e.g. 'web-1:3fa2c91b:4211'."""
+    return f"{socket.gethostname()}:{pool_id}:{os.getpid()}"
+
+
+def claim_job(worker_name):
+    """
+    Atomically moves the oldest queued job to RUNNING and returns its id
+    (None when the queue is empty). PostgreSQL skips rows other workers
+    have locked (FOR UPDATE SKIP LOCKED); SQLite serializes writers, so
+    the single UPDATE ... RETURNING is already atomic there.
+    """
+    next_job = (
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED)
+        .order_by(Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Job)
+        .where(Job.id == next_job, Job.status == JobStatus.QUEUED)
+        .values(
+            status=JobStatus.RUNNING,
+            worker=worker_name,
+            started_at=datetime.utcnow(),
+            heartbeat_at=datetime.utcnow(),
+            progress=0,
+        )
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    )
+    job_id = db.session.execute(stmt).scalar()
+    db.session.commit()
+    return job_id
+
+
+def run_job(job_id):
+    """Runs one claimed job and records how it ended."""
+    from . import tasks  # noqa: F401  (registers the handlers)
+
+    job = db.session.get(Job, job_id)
+    ctx = JobContext(job)
+    heartbeat = _Heartbeat(db.engine, job_id)
+    heartbeat.start()
+    try:
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{job.kind}'")
+        message = handler(ctx, json.loads(job.params))
+        db.session.commit()  # the handler's own writes (e.g. an import)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Job %s (%s) failed", job_id, job.kind)
+        if ctx.result_path:
+            _remove_file(ctx.result_path)  # a partial result is of no use
+        job = db.session.get(Job, job_id)
+        job.status = JobStatus.FAILED
+        job.error = str(e)
+    else:
+        job.status = JobStatus.SUCCEEDED
+        job.progress = 100
+        job.result_message = message
+        job.result_path = ctx.result_path
+        job.result_filename = ctx.result_filename
+    heartbeat.stop()
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+# --- HOUSEKEEPING ---
+
+
+def fail_abandoned_jobs(stale_after, pool_id=None):
+    """
+    Marks RUNNING jobs whose worker has not checked in for `stale_after`
+    seconds as failed (the process that held them is gone) and deletes their
+    upload and any partial result. Jobs held by the workers of `pool_id` are
+    left alone. Returns the number of jobs failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    stale = [
+        Job.status == JobStatus.RUNNING,
+        func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff,
+    ]
+    if pool_id:
+        stale.append(Job.worker.notlike(f"%:{pool_id}:%"))
+    stmt = (
+        update(Job)
+        .where(*stale)
+        .values(
+            status=JobStatus.FAILED,
+            error="The worker stopped before the job finished.",
+            finished_at=datetime.utcnow(),
+        )
+        .returning(Job.id, Job.params)
+        .execution_options(synchronize_session=False)
+    )
+    failed = db.session.execute(stmt).all()
+    db.session.commit()
+
+    for job_id, params in failed:
+        upload = json.loads(params).get("path")
+        if upload:
+            _remove_file(upload)
+        for path in glob.glob(os.path.join(job_files_dir(), f"job_{job_id}_*")):
+            _remove_file(path)
+    return len(failed)
+
+
+def expire_job_files(max_age):
+    """
+    Deletes the result files of jobs that finished over `max_age` seconds
+    ago and clears their result_path (so no download link is offered).
+    Returns the number of files removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    expired = db.session.execute(
+        select(Job.id, Job.result_path).where(
+            Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]),
+            Job.finished_at < cutoff,
+            Job.result_path.isnot(None),
+        )
+    ).all()
+    if not expired:
+        return 0
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_([job_id for job_id, _ in expired]))
+        .values(result_path=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    for _, path in expired:
+        _remove_file(path)
+    return len(expired)
+
+
+def maintain_jobs(pool_id=None):
+    """One housekeeping pass: fail abandoned jobs, expire old result files."""
+    config = current_app.config
+    failed = fail_abandoned_jobs(config["JOB_STALE_AFTER"], pool_id)
+    expired = expire_job_files(config["JOB_FILES_MAX_AGE"])
+    if failed or expired:
+        logger.info("Failed %s abandoned jobs, expired %s job files", failed, expired)
+
+
+def work(worker_name, poll_interval, once=False, pool_id=None):
+    """
+    Claim-and-run loop. With once=True, returns when the queue is empty.
+    While idle, runs maintain_jobs at most every MAINTENANCE_INTERVAL seconds.
+    """
+    last_maintenance = time.monotonic()
+    while True:
+        job_id = claim_job(worker_name)
+        if job_id is None:
+            if once:
+                return
+            if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                last_maintenance = time.monotonic()
+                try:
+                    maintain_jobs(pool_id)
+                except OperationalError:
+                    db.session.rollback()  # e.g. a locked SQLite file: next time
+            time.sleep(poll_interval)
+            continue
+        logger.info("%s running job %s", worker_name, job_id)
+        run_job(job_id)
+        db.session.remove()
+
+
+def _worker_process(index, poll_interval, once, pool_id):
+    # Each process builds its own app (and DB connections)
+    from .. import create_app
+
+    app = create_app()
+    with app.app_context():
+        work(_worker_id(pool_id), poll_interval, once, pool_id)
+
+
+def run_worker_pool(workers, poll_interval, once=False):
+    """Starts `workers` worker processes and waits for them."""
+    # Identifies this pool's workers, so housekeeping never fails their jobs
+    pool_id = uuid.uuid4().hex[:8]
+    maintain_jobs(pool_id)
+    if workers <= 1:
+        work(_worker_id(pool_id), poll_interval, once, pool_id)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_worker_process,
+            args=(index, poll_interval, once, pool_id),
+            daemon=True,
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
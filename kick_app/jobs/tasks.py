@@ -0,0 +1,165 @@
+"""
+Job handlers. Each takes (ctx, params), writes any result file to
+ctx.result_file(...), and returns the message shown when the job finishes.
+"""
+
+import csv
+import json
+import os
+from datetime import datetime
+from .runner import job_handler
+from .. import db
+from ..models import Job
+from ..api.exports import (
+    TICKET_REPORT_HEADERS,
+    TSR_PERFORMANCE_HEADERS,
+    count_ticket_report_rows,
+    ticket_report_rows,
+    tsr_performance_rows,
+    write_csv,
+    write_xlsx,
+)
+from ..admin.importer import (
+    CLIENT_IMPORT_COLUMNS,
+    CLIENT_IMPORT_DIFF_COLUMNS,
+    ClientFileReader,
+    ClientImporter,
+)
+
+
+def _date_range(params):
+    start_date = datetime.strptime(params["start_date"], "%Y-%m-%d")
+    end_date = datetime.combine(
+        datetime.strptime(params["end_date"], "%Y-%m-%d"), datetime.max.time()
+    )
+    return start_date, end_date
+
+
+@job_handler("export_tickets")
+def export_tickets_job(ctx, params):
+    start_date, end_date = _date_range(params)
+    include_archived = params.get("include_archived", False)
+    total = count_ticket_report_rows(start_date, end_date, include_archived)
+    if not total:
+        return "No tickets found for the selected date range."
+
+    export_format = params.get("format", "xlsx")
+    rows = ctx.track(
+        ticket_report_rows(start_date, end_date, include_archived), total, "Exported"
+    )
+    path = ctx.result_file(
+        f"Kick_Ticket_Report_{params['start_date']}_to_{params['end_date']}"
+        f".{export_format}"
+    )
+    if export_format == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            write_csv(f, TICKET_REPORT_HEADERS, rows)
+    else:
+        with open(path, "wb") as f:
+            write_xlsx(f, "Ticket_Report", TICKET_REPORT_HEADERS, rows)
+    return f"Ticket report ready: {total:,} tickets."
+
+
+@job_handler("export_tsr_performance")
+def export_tsr_performance_job(ctx, params):
+    start_date, end_date = _date_range(params)
+    report_data = list(tsr_performance_rows(start_date, end_date))
+    if not report_data:
+        return "No active TSRs found to generate a report for."
+
+    path = ctx.result_file(
+        f"Kick_TSR_Performance_{params['start_date']}_to_{params['end_date']}.xlsx"
+    )
+    with open(path, "wb") as f:
+        write_xlsx(f, "TSR_Performance", TSR_PERFORMANCE_HEADERS, report_data)
+    return f"TSR performance report ready: {len(report_data)} TSRs."
+
+
+class _ImportDiffWriter:
+    """
+    Writes a dry-run import's new, changed and rejected rows to the job's
+    result file (CLIENT_IMPORT_DIFF_COLUMNS). The preview page pages
+    through it and the approved import applies its new and changed rows.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(CLIENT_IMPORT_DIFF_COLUMNS)
+
+    def diff(self, row_number, change, row, fields):
+        self._writer.writerow(
+            [
+                row_number,
+                change,
+                *(row.get(col) for col in CLIENT_IMPORT_COLUMNS),
+                json.dumps(fields) if fields else "",
+                "",
+            ]
+        )
+
+    def reject(self, row_number, row, error):
+        self._writer.writerow(
+            [
+                row_number,
+                "rejected",
+                *(row.get(col) for col in CLIENT_IMPORT_COLUMNS),
+                "",
+                error,
+            ]
+        )
+
+    def close(self):
+        self._file.close()
+
+
+@job_handler("preview_client_import")
+def preview_client_import_job(ctx, params):
+    """Dry run of an uploaded client file: writes the diff, changes nothing."""
+    path = params["path"]
+    base_name = os.path.splitext(params.get("filename") or "clients")[0]
+    try:
+        ctx.progress(0, "Reading file")
+        with ClientFileReader(path) as reader:
+            missing = [c for c in CLIENT_IMPORT_COLUMNS if c not in reader.columns]
+            if missing:
+                raise ValueError(
+                    f"File is missing required columns: {', '.join(missing)}"
+                )
+            writer = _ImportDiffWriter(ctx.result_file(f"{base_name}_changes.csv"))
+            try:
+                importer = ClientImporter().run(
+                    reader,
+                    on_batch=lambda done: ctx.progress(
+                        reader.fraction_done() * 100, f"Compared {done:,} rows"
+                    ),
+                    on_reject=writer.reject,
+                    on_diff=writer.diff,
+                    dry_run=True,
+                )
+            finally:
+                writer.close()
+    finally:
+        os.remove(path)  # the preview keeps everything the import needs
+    return f"Preview ready: {importer.summary(dry_run=True)}."
+
+
+@job_handler("import_clients")
+def import_clients_job(ctx, params):
+    """Applies the new and changed rows of an approved preview."""
+    preview = db.session.get(Job, params["preview_job_id"])
+    if preview is None or not preview.result_path:
+        raise ValueError("The import preview is no longer available.")
+    with ClientFileReader(preview.result_path) as reader:
+        rows = (
+            (row_number, row)
+            for row_number, row in reader
+            if row["change"] in ("new", "changed")
+        )
+        importer = ClientImporter().run(
+            rows,
+            on_batch=lambda done: ctx.progress(
+                reader.fraction_done() * 100, f"Imported {done:,} rows"
+            ),
+        )
+    return f"Import complete: {importer.summary()}."
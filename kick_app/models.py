@@ -19,6 +19,27 @@ class TicketStatus(enum.Enum):
     PENDING = "Pending"
 
 
+class ActivityEvent(enum.Enum):
+    NOTE = "Note"  # free text (entries written before event types)
+    CREATED = "Created"
+    AUTO_ASSIGNED = "Auto-assigned"
+    REASSIGNED = "Reassigned"
+    UNASSIGNED = "Unassigned"
+    AUTO_OPENED = "Auto-opened"
+    STATUS_CHANGED = "Status changed"
+    RT_NUMBER_CHANGED = "RT number changed"
+    REMARK_ADDED = "Remark added"
+    EMAIL_LOGGED = "Email logged"
+    ATTACHMENT_ADDED = "Attachment added"
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+
+
 # --- Flask-Login User Loader ---
 @login_manager.user_loader
 def load_user(user_id):
@@ -42,6 +63,7 @@ class User(db.Model, UserMixin):
     role = db.Column(db.Enum(UserRole), default=UserRole.TSR, nullable=False)
     is_active = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Superseded by TsrWorkload.last_assigned_at (copied over by its migration)
     last_assigned_at = db.Column(db.DateTime, nullable=True)
 
     # Relationships
@@ -117,23 +139,60 @@ class Ticket(db.Model):
     """Contains all ticket information."""
 
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Keyset pagination seeks (all_tickets / my_tickets)
+        db.Index("ix_tickets_created_at_id", "created_at", "id"),
+        db.Index(
+            "ix_tickets_assigned_to_id_status_updated_at_id",
+            "assigned_to_id",
+            "status",
+            "updated_at",
+            "id",
+        ),
+        # Per-TSR resolution metrics (dashboard, performance report)
+        db.Index(
+            "ix_tickets_assigned_to_id_resolved_at", "assigned_to_id", "resolved_at"
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    ticket_name = db.Column(db.String(300), unique=True)
+    # Human ticket number, drawn from ticket_number_seq (a counter row on
+    # SQLite) by tickets/numbering.py, so it never collides.
+    ticket_number = db.Column(
+        db.Integer, db.Sequence("ticket_number_seq"), unique=True, nullable=False
+    )
+    # "{region}_{client}_{account}_{concern}", stored so lists render it as is
+    display_name = db.Column(db.String(300), nullable=False)
+    ticket_name = db.Column(db.String(300), unique=True)  # display_name + number
     concern_title = db.Column(db.String(255), nullable=False)
     concern_details = db.Column(db.Text, nullable=False)
     rt_ticket_number = db.Column(db.String(100), nullable=True, index=True)
 
+    # Flattened, lowercased search text (see tickets/search.py).
+    # Indexed with GIN (tsvector + trigram) on PostgreSQL, FTS5 on SQLite.
+    search_document = db.Column(db.Text, nullable=True)
+
     # --- ADDED FOR EMAIL CHECKBOX ---
     email_sent = db.Column(db.Boolean, default=False, nullable=False)
 
     status = db.Column(
         db.Enum(TicketStatus), default=TicketStatus.NEW, nullable=False, index=True
     )
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Not nullable: both are keyset pagination keys (a NULL matches no seek)
+    created_at = db.Column(
+        db.DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    # Lifecycle timestamps, set by tickets/events.py on status changes.
+    # opened_at: first left New. first_response_at: first status change,
+    # remark or email log. resolved_at: last moved to Resolved (cleared if
+    # the ticket is reopened).
+    opened_at = db.Column(db.DateTime, nullable=True, index=True)
+    first_response_at = db.Column(db.DateTime, nullable=True, index=True)
+    resolved_at = db.Column(db.DateTime, nullable=True, index=True)
+
     # Foreign Keys
     client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=False)
     assigned_to_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
@@ -156,16 +215,128 @@ class Ticket(db.Model):
     attachments = db.relationship(
         "TicketAttachment", back_populates="ticket", lazy="dynamic"
     )
+
+    is_archived = False  # see ArchivedTicket
+
     def __repr__(self):
         return f"<Ticket {self.id} - {self.status.value}>"
 
 
+class TicketStatusRollup(db.Model):
+    """
+    Ticket counts per (status, assigned TSR, region, creation day).
+    Kept in step with `tickets` by tickets/events.py; rebuilt from scratch by
+    `flask rebuild-rollup`. Dashboard totals read this instead of counting tickets.
+    """
+
+    __tablename__ = "ticket_status_rollup"
+    status = db.Column(db.Enum(TicketStatus), primary_key=True)
+    # 0 = unassigned (a NULL can't take part in the ON CONFLICT key)
+    assigned_to_id = db.Column(db.Integer, primary_key=True, default=0)
+    region_id = db.Column(db.Integer, primary_key=True)
+    created_day = db.Column(db.Date, primary_key=True)  # PHT date of created_at
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Rollup {self.status.value} tsr={self.assigned_to_id} {self.ticket_count}>"
+
+
+class TicketStatusHistory(db.Model):
+    """
+    Append-only record of ticket status transitions, written by
+    tickets/events.py (from_status is NULL on the creation row). Time-in-status
+    analytics (api/stats.py) read this instead of replaying activity logs.
+    """
+
+    __tablename__ = "ticket_status_history"
+    __table_args__ = (
+        # Per-ticket ordering for the LEAD() window (next transition)
+        db.Index(
+            "ix_ticket_status_history_ticket_id_changed_at",
+            "ticket_id",
+            "changed_at",
+            "id",
+        ),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(
+        db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False
+    )
+    from_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    to_status = db.Column(db.Enum(TicketStatus), nullable=False)
+    changed_at = db.Column(
+        db.DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+    changed_by_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    def __repr__(self):
+        return (
+            f"<TicketStatusHistory ticket={self.ticket_id} "
+            f"{self.from_status} -> {self.to_status}>"
+        )
+
+
+class TicketNumberCounter(db.Model):
+    """
+    Last ticket number handed out, for SQLite, which has no sequences
+    (PostgreSQL uses ticket_number_seq). See tickets/numbering.py.
+    """
+
+    __tablename__ = "ticket_number_counter"
+    name = db.Column(db.String(50), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TicketNumberCounter {self.name}={self.last_value}>"
+
+
+class TsrWorkload(db.Model):
+    """
+    Open ticket count (New, Open, In Progress) per TSR, kept in step by
+    tickets/events.py and rebuilt by `flask rebuild-workloads`. Auto-assignment
+    (tickets/assignment.py) picks and locks TSRs here instead of counting tickets.
+    """
+
+    __tablename__ = "tsr_workloads"
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    open_tickets = db.Column(db.Integer, nullable=False, default=0)
+    last_assigned_at = db.Column(db.DateTime, nullable=True)  # round-robin tie-break
+
+    def __repr__(self):
+        return f"<TsrWorkload user={self.user_id} open={self.open_tickets}>"
+
+
 class ActivityLog(db.Model):
-    """Stores actions taken on tickets and users."""
+    """
+    Stores actions taken on tickets and users, as an event type plus the
+    fields it needs; describe() renders the sentence shown on the ticket page.
+    """
 
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Keyset pagination of a ticket's timeline (view_ticket, newest first)
+        db.Index(
+            "ix_activity_logs_ticket_id_timestamp_id", "ticket_id", "timestamp", "id"
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    action = db.Column(db.String(255), nullable=False)
+    event_type = db.Column(
+        db.Enum(ActivityEvent), default=ActivityEvent.NOTE, nullable=False, index=True
+    )
+    # Event payload (which fields are set depends on event_type)
+    from_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    to_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    from_user = db.Column(db.String(150), nullable=True)  # names, as at the time
+    to_user = db.Column(db.String(150), nullable=True)
+    from_value = db.Column(db.String(255), nullable=True)  # RT numbers, file names
+    to_value = db.Column(db.String(255), nullable=True)
+    remark = db.Column(db.Text, nullable=True)
+    # Stored text, shown as is: NOTEs, and migrated entries whose author is gone
+    action = db.Column(db.String(255), nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Foreign Keys
@@ -176,8 +347,49 @@ class ActivityLog(db.Model):
     user = db.relationship("User", back_populates="activity_logs")
     ticket = db.relationship("Ticket", back_populates="logs")
 
+    def describe(self):
+        """The timeline sentence for this entry (needs `user` loaded)."""
+        if self.action:
+            return self.action
+        actor = self.user.full_name if self.user else "Unknown user"
+        event = self.event_type
+        if event == ActivityEvent.CREATED:
+            return f"Ticket created by {actor}"
+        if event == ActivityEvent.AUTO_ASSIGNED:
+            return f"Ticket auto-assigned to {self.to_user}"
+        if event == ActivityEvent.REASSIGNED:
+            return (
+                f"Ticket reassigned from {self.from_user or 'Unassigned'} "
+                f"to {self.to_user} by {actor}."
+            )
+        if event == ActivityEvent.UNASSIGNED:
+            return f"Ticket unassigned from {self.from_user} by {actor}."
+        if event == ActivityEvent.AUTO_OPENED:
+            return f"Ticket status automatically changed to Open by {actor} viewing it."
+        if event == ActivityEvent.STATUS_CHANGED:
+            return (
+                f"Status changed from {self.from_status.value} "
+                f"to {self.to_status.value} by {actor}."
+            )
+        if event == ActivityEvent.RT_NUMBER_CHANGED:
+            if self.from_value and self.to_value:
+                return (
+                    f"RT Ticket Number changed from '{self.from_value}' "
+                    f"to '{self.to_value}' by {actor}."
+                )
+            if self.to_value:
+                return f"RT Ticket Number '{self.to_value}' added by {actor}."
+            return f"RT Ticket Number '{self.from_value}' removed by {actor}."
+        if event == ActivityEvent.REMARK_ADDED:
+            return f"Remark added by {actor}: {self.remark}"
+        if event == ActivityEvent.EMAIL_LOGGED:
+            return f"Email log added by {actor}."
+        if event == ActivityEvent.ATTACHMENT_ADDED:
+            return f"Uploaded attachment: {self.to_value}"
+        return ""
+
     def __repr__(self):
-        return f"<Log: {self.action}>"
+        return f"<Log: {self.event_type} ticket={self.ticket_id}>"
 
 
 class Announcement(db.Model):
@@ -237,3 +449,158 @@ class TicketAttachment(db.Model):
 
     def __repr__(self):
         return f"<Attachment {self.filename}>"
+
+
+# --- ARCHIVE (cold storage, see tickets/archive.py) ---
+# Same columns as the live tables (so rows move with INSERT ... SELECT), keep
+# them in step. Ids are kept, so a ticket has the same id live or archived.
+
+
+class ArchivedTicket(db.Model):
+    """Resolved tickets moved out of `tickets` by `flask archive-tickets`."""
+
+    __tablename__ = "archived_tickets"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_number = db.Column(db.Integer, unique=True, nullable=False)
+    display_name = db.Column(db.String(300), nullable=False)
+    ticket_name = db.Column(db.String(300))
+    concern_title = db.Column(db.String(255), nullable=False)
+    concern_details = db.Column(db.Text, nullable=False)
+    rt_ticket_number = db.Column(db.String(100), nullable=True, index=True)
+    search_document = db.Column(db.Text, nullable=True)
+    email_sent = db.Column(db.Boolean, default=False, nullable=False)
+    status = db.Column(db.Enum(TicketStatus), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    opened_at = db.Column(db.DateTime, nullable=True)
+    first_response_at = db.Column(db.DateTime, nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Foreign Keys
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=False)
+    assigned_to_id = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=True, index=True
+    )
+    created_by_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+
+    # Relationships (same names as on Ticket, so list templates render either)
+    client = db.relationship("Client")
+    assigned_tsr = db.relationship("User", foreign_keys=[assigned_to_id])
+    creator = db.relationship("User", foreign_keys=[created_by_id])
+
+    is_archived = True
+
+    def __repr__(self):
+        return f"<ArchivedTicket {self.id} - {self.status.value}>"
+
+
+class ArchivedActivityLog(db.Model):
+    """ActivityLog rows of archived tickets."""
+
+    __tablename__ = "archived_activity_logs"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    event_type = db.Column(db.Enum(ActivityEvent), nullable=False)
+    from_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    to_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    from_user = db.Column(db.String(150), nullable=True)
+    to_user = db.Column(db.String(150), nullable=True)
+    from_value = db.Column(db.String(255), nullable=True)
+    to_value = db.Column(db.String(255), nullable=True)
+    remark = db.Column(db.Text, nullable=True)
+    action = db.Column(db.String(255), nullable=True)
+    timestamp = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    ticket_id = db.Column(
+        db.Integer, db.ForeignKey("archived_tickets.id"), nullable=False, index=True
+    )
+
+
+class ArchivedEmailLog(db.Model):
+    """EmailLog rows of archived tickets."""
+
+    __tablename__ = "archived_email_logs"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    email_content = db.Column(db.Text, nullable=False)
+    sent_at = db.Column(db.DateTime)
+    ticket_id = db.Column(
+        db.Integer, db.ForeignKey("archived_tickets.id"), nullable=False, index=True
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+
+class ArchivedTicketAttachment(db.Model):
+    """TicketAttachment records of archived tickets (the files stay on disk)."""
+
+    __tablename__ = "archived_ticket_attachments"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    filename = db.Column(db.String(255), nullable=False)
+    filepath = db.Column(db.String(255), nullable=False)
+    uploaded_at = db.Column(db.DateTime)
+    ticket_id = db.Column(
+        db.Integer, db.ForeignKey("archived_tickets.id"), nullable=False, index=True
+    )
+    uploader_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+
+class ArchivedTicketStatusHistory(db.Model):
+    """TicketStatusHistory rows of archived tickets."""
+
+    __tablename__ = "archived_ticket_status_history"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_id = db.Column(
+        db.Integer,
+        db.ForeignKey("archived_tickets.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    from_status = db.Column(db.Enum(TicketStatus), nullable=True)
+    to_status = db.Column(db.Enum(TicketStatus), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    changed_by_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+
+class Job(db.Model):
+    """
+    A background job (large import/export) run by `flask run-jobs` workers.
+    Workers claim QUEUED jobs, report progress, and leave any result file in
+    JOB_RESULTS_DIR for download.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker claim scan: oldest queued job first
+        db.Index("ix_jobs_status_id", "status", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default="{}")  # JSON
+    status = db.Column(db.Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+
+    progress = db.Column(db.Integer, default=0, nullable=False)  # percent
+    progress_message = db.Column(db.String(255), nullable=True)
+    result_message = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    # Result file on disk (absolute path) and the name it downloads as
+    result_path = db.Column(db.String(500), nullable=True)
+    result_filename = db.Column(db.String(255), nullable=True)
+
+    worker = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # Refreshed by the worker while the job runs (see jobs/runner.py)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Foreign Key
+    created_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+    # Relationship
+    created_by = db.relationship("User")
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} - {self.status.value}>"
@@ -0,0 +1,255 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, literal, or_, select, tuple_, union_all
+
+
+# --- CURSOR ENCODING ---
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values, direction="next"):
+    """Packs the sort-key values of a boundary row into a URL-safe token."""
+    payload = {"k": [_encode_value(v) for v in values], "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Returns (values, direction), or (None, 'next') for a missing/garbled token."""
+    if not token:
+        return None, "next"
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(v) for v in payload["k"]]
+        direction = "prev" if payload.get("d") == "prev" else "next"
+        return values, direction
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None, "next"
+
+
+def _python_type(expr):
+    try:
+        return expr.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _matches_keys(keys, values):
+    """
+    True if a decoded cursor has one value per sort key, each of the key's
+    Python type (an int for an Integer column, a datetime for a DateTime...).
+    A well-formed but tampered or stale token otherwise reaches the database
+    as a mistyped bind parameter and fails the request.
+    """
+    if not isinstance(values, list) or len(values) != len(keys):
+        return False
+    for (expr, _), value in zip(keys, values):
+        expected = _python_type(expr)
+        if expected is None:
+            continue
+        # bool is an int subclass, but never a valid integer sort value
+        if isinstance(value, bool) and expected is not bool:
+            return False
+        if not isinstance(value, expected):
+            return False
+    return True
+
+
+# --- KEYSET PAGINATION ---
+
+
+def _after(keys, values):
+    """WHERE clause selecting rows that sort strictly after `values`."""
+    if all(desc == keys[0][1] for _, desc in keys):
+        # Uniform direction: one row-value comparison (index friendly)
+        row = tuple_(*[expr for expr, _ in keys])
+        bound = tuple_(
+            *[literal(value, expr.type) for (expr, _), value in zip(keys, values)]
+        )
+        return row < bound if keys[0][1] else row > bound
+
+    # Mixed directions: (k1 > v1) OR (k1 = v1 AND k2 < v2) OR ...
+    clauses = []
+    for i, (expr, desc) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = expr < values[i] if desc else expr > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+class KeysetPagination:
+    """
+    Cursor ("keyset") pagination: seeks past the last row of the previous page
+    with WHERE (keys) > (cursor) instead of OFFSET, so page N costs the same as
+    page 1. Mirrors the parts of Flask-SQLAlchemy's Pagination the templates
+    use (items, has_next, has_prev) plus next_cursor / prev_cursor for links.
+
+    `keys` is a list of (sql_expression, descending) pairs that must end in a
+    unique column (e.g. the primary key) so every row has a distinct position.
+    The total is only counted if something actually reads `.total`.
+    """
+
+    def __init__(self, query, keys, cursor=None, per_page=15):
+        self.per_page = per_page
+        self._query = query
+        self._total = None
+
+        values, direction = decode_cursor(cursor)
+        if values is not None and not _matches_keys(keys, values):
+            values, direction = None, "next"  # treat as no cursor: first page
+        backwards = direction == "prev"
+
+        # Walking backwards = same seek with every key direction flipped
+        seek_keys = [(expr, desc != backwards) for expr, desc in keys]
+        labels = [expr.label(f"_cursor_{i}") for i, (expr, _) in enumerate(keys)]
+
+        page_query = query.order_by(None).add_columns(*labels)
+        if values is not None:
+            page_query = page_query.filter(_after(seek_keys, values))
+        page_query = page_query.order_by(
+            *[expr.desc() if desc else expr.asc() for expr, desc in seek_keys]
+        )
+
+        rows = page_query.limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        self.items = [row[0] for row in rows]
+        # Sort-key values of the first and last row, for the prev/next cursors
+        self._boundaries = [list(row[1:]) for row in (rows[0], rows[-1])] if rows else []
+
+        if backwards:
+            self.has_prev = has_more
+            self.has_next = values is not None
+        else:
+            self.has_prev = values is not None
+            self.has_next = has_more
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self._boundaries:
+            return None
+        return encode_cursor(self._boundaries[1], "next")
+
+    @property
+    def prev_cursor(self):
+        if not self.has_prev or not self._boundaries:
+            return None
+        return encode_cursor(self._boundaries[0], "prev")
+
+    @property
+    def total(self):
+        """Lazy COUNT(*) over the filtered query (only runs when accessed)."""
+        if self._total is None:
+            self._total = self._query.order_by(None).count()
+        return self._total
+
+
+class PartitionedKeysetPagination(KeysetPagination):
+    """
+    KeysetPagination for lists ordered first by a short list of partitions
+    (e.g. the statuses of a work queue, New first) and then by `keys`, which
+    must share one direction and end in a unique column.
+
+    A mixed-direction cursor over (partition rank, keys...) is an OR no index
+    serves. Instead every partition at or past the cursor's is seeked on its
+    own with a uniform row-value comparison and LIMIT (one index range scan
+    each, given an index on (filter columns, partition column, keys...)), in
+    ONE UNION ALL query for the page's keys; the rows are then loaded by id.
+    A page costs two queries however deep it is.
+    """
+
+    def __init__(self, query, partitions, keys, cursor=None, per_page=15):
+        self.per_page = per_page
+        self._query = query
+        self._total = None
+
+        values, direction = decode_cursor(cursor)
+        if values is not None and not self._valid_cursor(partitions, keys, values):
+            values, direction = None, "next"  # treat as no cursor: first page
+        backwards = direction == "prev"
+
+        if values is None:
+            start = 0
+            ranks = range(len(partitions))
+        else:
+            start = values[0]
+            ranks = (
+                range(start, -1, -1) if backwards else range(start, len(partitions))
+            )
+
+        seek_keys = [(expr, desc != backwards) for expr, desc in keys]
+        order = [expr.desc() if desc else expr.asc() for expr, desc in seek_keys]
+        labels = [expr.label(f"_cursor_{i}") for i, (expr, _) in enumerate(keys)]
+
+        branches = []
+        for rank in ranks:
+            branch = query.order_by(None).filter(partitions[rank])
+            if values is not None and rank == start:
+                branch = branch.filter(_after(seek_keys, values[1:]))
+            branch = (
+                branch.with_entities(literal(rank).label("_rank"), *labels)
+                .order_by(*order)
+                .limit(per_page + 1)
+                .subquery()
+            )
+            branches.append(select(branch))
+        matches = union_all(*branches).subquery("page_keys")
+
+        rank_order = matches.c._rank.desc() if backwards else matches.c._rank.asc()
+        key_order = [
+            matches.c[label.name].desc() if desc else matches.c[label.name].asc()
+            for label, (_, desc) in zip(labels, seek_keys)
+        ]
+        rows = query.session.execute(
+            select(matches).order_by(rank_order, *key_order).limit(per_page + 1)
+        ).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        # The last key is unique: load the page's rows by it
+        id_column = keys[-1][0]
+        ids = [row[-1] for row in rows]
+        loaded = {}
+        if ids:
+            loaded = {
+                getattr(item, id_column.key): item
+                for item in query.order_by(None).filter(id_column.in_(ids))
+            }
+        self.items = [loaded[item_id] for item_id in ids if item_id in loaded]
+        self._boundaries = [list(row) for row in (rows[0], rows[-1])] if rows else []
+
+        if backwards:
+            self.has_prev = has_more
+            self.has_next = values is not None
+        else:
+            self.has_prev = values is not None
+            self.has_next = has_more
+
+    @staticmethod
+    def _valid_cursor(partitions, keys, values):
+        """A partition rank (int in range) followed by values matching `keys`."""
+        if not isinstance(values, list) or not values:
+            return False
+        rank = values[0]
+        if isinstance(rank, bool) or not isinstance(rank, int):
+            return False
+        return 0 <= rank < len(partitions) and _matches_keys(keys, values[1:])
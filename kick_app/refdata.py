@@ -0,0 +1,104 @@
+"""
+In-process cache of slow-changing reference data (regions, active TSRs)
+used to build form dropdowns.
+
+Each worker process keeps the lists in memory as namedtuples. Writers call
+`invalidate_on_commit(REGIONS_SCOPE / TSRS_SCOPE)` (cache.py); the version
+bump in the shared cache tells every process to reload on its next read,
+so the hot pages (view_ticket) build their dropdowns without touching the
+database. REFDATA_MAX_AGE also reloads periodically, which covers edits
+made outside the app.
+"""
+
+import time
+from collections import namedtuple
+from operator import attrgetter
+from flask import current_app
+from sqlalchemy import select
+from wtforms.validators import ValidationError
+from wtforms_sqlalchemy.fields import QuerySelectField
+from . import db
+from .cache import get_shared_cache
+from .models import Region, User, UserRole
+
+RegionRef = namedtuple("RegionRef", ["id", "name"])
+TsrRef = namedtuple("TsrRef", ["id", "full_name"])
+
+REGIONS_SCOPE = "refdata:regions"
+TSRS_SCOPE = "refdata:tsrs"
+
+_EXTENSION_KEY = "kick_refdata"
+
+
+def _cached(scope, load):
+    entries = current_app.extensions.setdefault(_EXTENSION_KEY, {})
+    version = get_shared_cache().version(scope)
+    now = time.monotonic()
+    entry = entries.get(scope)
+    if (
+        entry is None
+        or entry[0] != version
+        or now - entry[1] > current_app.config["REFDATA_MAX_AGE"]
+    ):
+        entry = (version, now, load())
+        entries[scope] = entry
+    return entry[2]
+
+
+def regions():
+    """All regions as RegionRefs, in id order."""
+    return _cached(
+        REGIONS_SCOPE,
+        lambda: [
+            RegionRef(*row)
+            for row in db.session.execute(
+                select(Region.id, Region.name).order_by(Region.id)
+            )
+        ],
+    )
+
+
+def active_tsrs():
+    """Active TSRs as TsrRefs, ordered by name."""
+    return _cached(
+        TSRS_SCOPE,
+        lambda: [
+            TsrRef(*row)
+            for row in db.session.execute(
+                select(User.id, User.full_name)
+                .where(User.role == UserRole.TSR, User.is_active == True)
+                .order_by(User.full_name)
+            )
+        ],
+    )
+
+
+def active_tsr(user_id):
+    """The TsrRef for `user_id`, or None if it isn't an active TSR."""
+    return next((tsr for tsr in active_tsrs() if tsr.id == user_id), None)
+
+
+class RefSelectField(QuerySelectField):
+    """
+    QuerySelectField over a list of refs (namedtuples with an `id`). `data`
+    is the chosen ref; the current choice is matched by id, so a model
+    instance set from `obj=` still selects the right option.
+    """
+
+    def __init__(self, label=None, validators=None, **kwargs):
+        kwargs.setdefault("get_pk", attrgetter("id"))
+        super().__init__(label, validators, **kwargs)
+
+    def iter_choices(self):
+        selected_id = getattr(self.data, "id", None)
+        if self.allow_blank:
+            yield (self.blank_value, self.blank_text, self.data is None, {})
+        for pk, obj in self._get_object_list():
+            yield (pk, self.get_label(obj), obj.id == selected_id, {})
+
+    def pre_validate(self, form):
+        if self.data is None:
+            if self._formdata or not self.allow_blank:
+                raise ValidationError(self.gettext("Not a valid choice"))
+        elif all(obj.id != self.data.id for _, obj in self._get_object_list()):
+            raise ValidationError(self.gettext("Not a valid choice"))
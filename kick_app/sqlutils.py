@@ -0,0 +1,136 @@
+"""
+Small dialect-aware SQL expressions shared by the reporting queries.
+Production runs on PostgreSQL; local runs fall back to SQLite.
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import Float, bindparam
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class seconds_between(FunctionElement):
+    """Elapsed seconds from `start` to `end` (two DateTime expressions)."""
+
+    type = Float()
+    inherit_cache = True
+    name = "seconds_between"
+
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "EXTRACT(EPOCH FROM (%s - %s))" % (
+        compiler.process(end, **kw),
+        compiler.process(start, **kw),
+    )
+
+
+@compiles(seconds_between, "sqlite")
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "((julianday(%s) - julianday(%s)) * 86400.0)" % (
+        compiler.process(end, **kw),
+        compiler.process(start, **kw),
+    )
+
+
+# Asia/Manila has no DST, so PHT is a fixed UTC+8 offset.
+PHT_UTC_OFFSET_HOURS = 8
+
+BUCKET_GRANULARITIES = ("day", "week", "month")
+
+
+class pht_bucket(FunctionElement):
+    """
+    Start of the PHT-local day / week (Monday) / month containing a naive-UTC
+    DateTime. PostgreSQL returns a timestamp, SQLite a 'YYYY-MM-DD' string;
+    use bucket_to_date() on the result.
+    """
+
+    # granularity isn't part of the clause list, so keep it out of the
+    # compiled-statement cache (otherwise day/week/month would share SQL)
+    inherit_cache = False
+    name = "pht_bucket"
+
+    def __init__(self, column, granularity="day"):
+        if granularity not in BUCKET_GRANULARITIES:
+            raise ValueError(f"Unknown bucket granularity '{granularity}'")
+        self.granularity = granularity
+        super().__init__(column)
+
+
+@compiles(pht_bucket)
+def _pht_bucket_default(element, compiler, **kw):
+    (column,) = list(element.clauses)
+    return "date_trunc('%s', %s + INTERVAL '%d hours')" % (
+        element.granularity,
+        compiler.process(column, **kw),
+        PHT_UTC_OFFSET_HOURS,
+    )
+
+
+@compiles(pht_bucket, "sqlite")
+def _pht_bucket_sqlite(element, compiler, **kw):
+    (column,) = list(element.clauses)
+    modifiers = {
+        "day": "",
+        "week": ", '-6 days', 'weekday 1'",
+        "month": ", 'start of month'",
+    }[element.granularity]
+    return "date(%s, '+%d hours'%s)" % (
+        compiler.process(column, **kw),
+        PHT_UTC_OFFSET_HOURS,
+        modifiers,
+    )
+
+
+def bucket_to_date(value):
+    """Normalizes a pht_bucket() result (datetime, date or ISO string) to a date."""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def pht_date(value):
+    """The PHT calendar date of a naive-UTC datetime (Python-side pht_bucket)."""
+    return (value + timedelta(hours=PHT_UTC_OFFSET_HOURS)).date()
+
+
+def pht_day_range(first_day, last_day):
+    """
+    Naive-UTC (start, end) bounds covering the PHT calendar days first_day
+    through last_day, for filtering UTC DateTime columns by local dates.
+    """
+    offset = timedelta(hours=PHT_UTC_OFFSET_HOURS)
+    return (
+        datetime.combine(first_day, datetime.min.time()) - offset,
+        datetime.combine(last_day, datetime.max.time()) - offset,
+    )
+
+
+def bulk_update_by_id(session, model, rows):
+    """
+    One executemany UPDATE ... WHERE id = :id for `rows` (dicts with an "id"
+    and the same other keys). Unlike an ORM bulk UPDATE it leaves onupdate
+    columns such as Ticket.updated_at alone, so bookkeeping writes (search
+    documents, backfills) don't look like user edits.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    columns = [key for key in rows[0] if key != "id"]
+    values = {column: bindparam(f"new_{column}") for column in columns}
+    for column in table.c:
+        if column.onupdate is not None and column.name not in values:
+            values[column.name] = column  # SET col = col suppresses onupdate
+    stmt = table.update().where(table.c.id == bindparam("row_id")).values(values)
+    session.execute(
+        stmt,
+        [
+            {"row_id": row["id"], **{f"new_{key}": row[key] for key in columns}}
+            for row in rows
+        ],
+    )
@@ -0,0 +1,184 @@
+"""
+Hot/cold split of resolved tickets.
+
+`flask archive-tickets` moves tickets that were resolved (and not touched
+since) more than N days ago into the archived_* tables, together with their
+activity logs, email logs, attachment records and status history, so the
+live tables every list, count and search reads hold only the working set.
+Rows keep their ids and move with INSERT ... SELECT + DELETE, one committed
+batch at a time, so an interrupted run can simply be restarted.
+
+The archive is only read when asked for: the admin ticket search and the
+ticket report union it in with include_archived. restore_archived_ticket()
+moves a ticket back.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, literal, select, union_all
+from .. import db
+from ..models import (
+    Ticket,
+    Client,
+    TicketStatus,
+    ActivityLog,
+    EmailLog,
+    TicketAttachment,
+    TicketStatusHistory,
+    ArchivedTicket,
+    ArchivedActivityLog,
+    ArchivedEmailLog,
+    ArchivedTicketAttachment,
+    ArchivedTicketStatusHistory,
+)
+from . import events
+from .queries import ticket_list_query
+from .search import search_match
+
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_BATCH_SIZE = 500
+
+# (live model, archive model), parent table first
+ARCHIVE_TABLES = [
+    (Ticket, ArchivedTicket),
+    (ActivityLog, ArchivedActivityLog),
+    (EmailLog, ArchivedEmailLog),
+    (TicketAttachment, ArchivedTicketAttachment),
+    (TicketStatusHistory, ArchivedTicketStatusHistory),
+]
+
+
+def _of_tickets(model, ticket_ids):
+    column = model.id if model in (Ticket, ArchivedTicket) else model.ticket_id
+    return column.in_(ticket_ids)
+
+
+def _move_tickets(ticket_ids, to_archive):
+    """
+    Moves the tickets' rows between the live and archive tables: INSERT ...
+    SELECT into each target (parents first), then DELETE from the sources
+    (children first). Does not commit.
+    """
+    pairs = [
+        (live, archived) if to_archive else (archived, live)
+        for live, archived in ARCHIVE_TABLES
+    ]
+    now = datetime.utcnow()
+    for (live, _), (source, target) in zip(ARCHIVE_TABLES, pairs):
+        names = [column.name for column in live.__table__.columns]
+        columns = [source.__table__.c[name] for name in names]
+        if target is ArchivedTicket:
+            names.append("archived_at")
+            columns.append(literal(now))
+        db.session.execute(
+            target.__table__.insert().from_select(
+                names, select(*columns).where(_of_tickets(source, ticket_ids))
+            )
+        )
+    for source, _ in reversed(pairs):
+        db.session.execute(
+            delete(source)
+            .where(_of_tickets(source, ticket_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def archive_resolved_tickets(
+    older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE
+):
+    """
+    Archives tickets resolved and last updated more than `older_than_days`
+    ago, batch_size tickets per committed batch (one SELECT, then one INSERT
+    ... SELECT and one DELETE per table). Returns the number archived.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    batch_query = (
+        select(
+            Ticket.id,
+            Ticket.status,
+            Ticket.assigned_to_id,
+            Client.region_id,
+            Ticket.created_at,
+        )
+        .join(Client, Ticket.client_id == Client.id)
+        .where(
+            Ticket.status == TicketStatus.RESOLVED,
+            Ticket.resolved_at < cutoff,
+            Ticket.updated_at < cutoff,
+        )
+        .order_by(Ticket.id)
+        .limit(batch_size)
+    )
+
+    total = 0
+    while True:
+        # Archived rows leave `tickets`, so each batch starts from the top
+        batch = db.session.execute(batch_query).all()
+        if not batch:
+            break
+        events.tickets_archived([row._asdict() for row in batch])
+        _move_tickets([row.id for row in batch], to_archive=True)
+        db.session.commit()
+        total += len(batch)
+    return total
+
+
+def restore_archived_ticket(ticket_id):
+    """
+    Moves one archived ticket (and its logs, attachments and history) back
+    into the live tables and returns it, or None if it isn't archived. Its
+    updated_at is bumped, so the next archive run leaves it alone for the
+    full period. Does not commit.
+    """
+    archived = db.session.execute(
+        select(ArchivedTicket.id).where(ArchivedTicket.id == ticket_id)
+    ).first()
+    if archived is None:
+        return None
+    _move_tickets([ticket_id], to_archive=False)
+    ticket = db.session.get(Ticket, ticket_id)
+    ticket.updated_at = datetime.utcnow()
+    events.ticket_restored(ticket)
+    return ticket
+
+
+def search_tickets_with_archive(term, status=None, page=1, per_page=15):
+    """
+    Numbered page of live AND archived tickets matching `term` (see
+    tickets/search.py), best matches first, newest first among equals.
+    One UNION ALL of the two searches for the page's ids (plus its COUNT),
+    then each table's rows are loaded with ticket_list_query(). Archived
+    items have is_archived set.
+    """
+    branches = []
+    for model in (Ticket, ArchivedTicket):
+        query = db.session.query(
+            model.id.label("id"),
+            model.created_at.label("created_at"),
+            literal(model.is_archived).label("archived"),
+        )
+        if status:
+            query = query.filter(model.status == status)
+        query, score = search_match(query, term, model)
+        if score is None:
+            score = literal(0.0)
+        branches.append(query.add_columns(score.label("score")).statement)
+    matches = union_all(*branches).subquery("matches")
+
+    pagination = (
+        db.session.query(matches.c.id, matches.c.archived)
+        .order_by(
+            matches.c.score.desc(), matches.c.created_at.desc(), matches.c.id.desc()
+        )
+        .paginate(page=page, per_page=per_page, error_out=False)
+    )
+
+    loaded = {}
+    for model in (Ticket, ArchivedTicket):
+        ids = [row.id for row in pagination.items if row.archived == model.is_archived]
+        if ids:
+            for ticket in ticket_list_query(model).filter(model.id.in_(ids)):
+                loaded[(model.is_archived, ticket.id)] = ticket
+    pagination.items = [
+        loaded[(bool(row.archived), row.id)] for row in pagination.items
+    ]
+    return pagination
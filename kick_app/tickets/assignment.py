@@ -0,0 +1,186 @@
+"""
+Auto-assignment engine.
+
+New tickets go to the active TSR with the fewest open tickets (New, Open,
+In Progress), oldest assignment first on a tie. Workloads come from the
+tsr_workloads counters (kept in step by tickets/events.py), so picking a
+TSR costs the same however many tickets exist.
+
+Claiming is one UPDATE ... WHERE user_id = (SELECT ... LIMIT 1) RETURNING.
+PostgreSQL locks the chosen row (FOR UPDATE SKIP LOCKED): a concurrent
+create skips a TSR another transaction is assigning to and takes the next
+least-loaded one, instead of both reading the same "least loaded" TSR.
+SQLite serializes writers, so the single statement is already atomic there.
+
+Bulk creates (claim_tsrs) lock every active TSR's row and plan the whole
+batch in one pass, least-loaded first.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .. import db
+from ..models import Ticket, TicketStatus, TsrWorkload, User, UserRole
+
+# Statuses that count towards a TSR's workload
+WORKLOAD_STATUSES = (TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        return pg_insert
+    return sqlite_insert
+
+
+def bump_workloads(deltas):
+    """
+    Atomic counter upserts: `deltas` maps user id to a change in open
+    tickets (one executemany; missing rows are created).
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and delta}
+    if not deltas:
+        return
+    stmt = _insert()(TsrWorkload)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"open_tickets": TsrWorkload.open_tickets + stmt.excluded.open_tickets},
+    )
+    db.session.execute(
+        stmt,
+        [
+            {"user_id": user_id, "open_tickets": delta}
+            for user_id, delta in deltas.items()
+        ],
+    )
+
+
+def ensure_workloads(*user_ids):
+    """Adds empty workload rows for TSRs that don't have one yet."""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids:
+        return
+    stmt = _insert()(TsrWorkload).on_conflict_do_nothing(index_elements=["user_id"])
+    db.session.execute(
+        stmt, [{"user_id": user_id, "open_tickets": 0} for user_id in user_ids]
+    )
+
+
+def rebuild_workloads():
+    """
+    Recounts every TSR's open tickets from `tickets`, keeping the round-robin
+    timestamps. Does not commit. Returns the number of workload rows.
+    """
+    counts = dict(
+        db.session.query(Ticket.assigned_to_id, func.count(Ticket.id))
+        .filter(
+            Ticket.assigned_to_id.isnot(None), Ticket.status.in_(WORKLOAD_STATUSES)
+        )
+        .group_by(Ticket.assigned_to_id)
+    )
+    tsr_ids = [
+        user_id
+        for (user_id,) in db.session.query(User.id).filter(User.role == UserRole.TSR)
+    ]
+    ensure_workloads(*tsr_ids)
+    db.session.execute(
+        update(TsrWorkload)
+        .values(open_tickets=0)
+        .execution_options(synchronize_session=False)
+    )
+    bump_workloads(counts)
+    return db.session.query(func.count()).select_from(TsrWorkload).scalar()
+
+
+def _claim(skip_locked):
+    next_tsr = (
+        select(TsrWorkload.user_id)
+        .join(User, User.id == TsrWorkload.user_id)
+        .where(User.role == UserRole.TSR, User.is_active == True)
+        .order_by(
+            TsrWorkload.open_tickets.asc(),
+            TsrWorkload.last_assigned_at.asc().nullsfirst(),
+            TsrWorkload.user_id.asc(),
+        )
+        .limit(1)
+        .with_for_update(of=TsrWorkload, skip_locked=skip_locked)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(TsrWorkload)
+        .where(TsrWorkload.user_id == next_tsr)
+        .values(last_assigned_at=datetime.utcnow())
+        .returning(TsrWorkload.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).scalar()
+
+
+def claim_next_tsr():
+    """
+    Picks the least-loaded active TSR, stamps its last_assigned_at and
+    returns (id, full_name), or None when there is no active TSR. The caller
+    assigns the ticket and calls events.ticket_created, which counts it.
+    The chosen row stays locked until the caller commits.
+    """
+    user_id = _claim(skip_locked=True)
+    if user_id is None:
+        # Every TSR is being assigned to right now (or there are none):
+        # wait for a lock rather than leave the ticket unassigned.
+        user_id = _claim(skip_locked=False)
+    if user_id is None:
+        return None
+    full_name = db.session.execute(
+        select(User.full_name).where(User.id == user_id)
+    ).scalar()
+    return user_id, full_name
+
+
+def claim_tsrs(count):
+    """
+    Bulk form of claim_next_tsr: plans `count` assignments in one pass, each
+    ticket going to the TSR that is least loaded once the earlier tickets of
+    the batch are counted. Returns a list of `count` (id, full_name) pairs
+    (empty when there is no active TSR). Locks the active TSRs' workload
+    rows until the caller commits; events.tickets_created counts the tickets.
+    """
+    rows = db.session.execute(
+        select(
+            TsrWorkload.open_tickets,
+            TsrWorkload.last_assigned_at,
+            TsrWorkload.user_id,
+            User.full_name,
+        )
+        .join(User, User.id == TsrWorkload.user_id)
+        .where(User.role == UserRole.TSR, User.is_active == True)
+        .with_for_update(of=TsrWorkload)
+    ).all()
+    if not rows:
+        return []
+
+    # Same order as _claim: open tickets, then oldest assignment (NULL first)
+    heap = [
+        (open_tickets, last_assigned_at or datetime.min, user_id, full_name)
+        for open_tickets, last_assigned_at, user_id, full_name in rows
+    ]
+    heapq.heapify(heap)
+    now = datetime.utcnow()
+    picks = []
+    stamps = {}
+    for index in range(count):
+        open_tickets, _, user_id, full_name = heapq.heappop(heap)
+        # Distinct stamps keep the round robin going after the batch
+        stamp = now + timedelta(microseconds=index)
+        picks.append((user_id, full_name))
+        stamps[user_id] = stamp
+        heapq.heappush(heap, (open_tickets + 1, stamp, user_id, full_name))
+
+    table = TsrWorkload.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.user_id == bindparam("tsr_id"))
+        .values(last_assigned_at=bindparam("stamp")),
+        [{"tsr_id": user_id, "stamp": stamp} for user_id, stamp in stamps.items()],
+    )
+    return picks
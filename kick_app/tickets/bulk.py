@@ -0,0 +1,182 @@
+"""
+Bulk ticket creation for mass-outage events.
+
+One concern is filed for many clients at once: clients are loaded in one
+query per batch, the whole batch is assigned in one pass
+(assignment.claim_tsrs), tickets and their activity logs are written with
+executemany INSERTs, and the derived data is updated set-wise
+(events.tickets_created). The caller commits once.
+"""
+
+from datetime import datetime
+from sqlalchemy import select
+from .. import db
+from ..models import (
+    ActivityEvent,
+    ActivityLog,
+    Client,
+    Region,
+    Ticket,
+    TicketStatus,
+)
+from .assignment import claim_tsrs
+from .events import tickets_created
+from .numbering import allocate_ticket_numbers, ticket_display_name, ticket_name
+from .search import build_search_document
+
+BULK_BATCH_SIZE = 1000
+
+# Upper bound for one bulk request (keeps a single transaction reasonable)
+MAX_BULK_TICKETS = 5000
+
+ACTIVE_CLIENT_STATUS = "Active"
+
+
+def _client_query():
+    return select(
+        Client.id,
+        Client.account_number,
+        Client.account_name,
+        Client.region_id,
+        Region.name.label("region_name"),
+    ).join(Region, Client.region_id == Region.id)
+
+
+def parse_account_numbers(text):
+    """Account numbers from a pasted list (lines, commas or spaces), in order."""
+    seen = {}
+    for token in text.replace(",", " ").split():
+        seen.setdefault(token, None)
+    return list(seen)
+
+
+def load_bulk_clients(account_numbers=None, region_id=None):
+    """
+    Returns (clients, missing): client rows for the given account numbers
+    (missing lists the ones not found) or for every active client in a
+    region.
+    """
+    if region_id is not None:
+        rows = db.session.execute(
+            _client_query()
+            .where(
+                Client.region_id == region_id,
+                Client.status == ACTIVE_CLIENT_STATUS,
+            )
+            .order_by(Client.account_number)
+        ).all()
+        return rows, []
+
+    found = {}
+    for start in range(0, len(account_numbers), BULK_BATCH_SIZE):
+        batch = account_numbers[start : start + BULK_BATCH_SIZE]
+        for row in db.session.execute(
+            _client_query().where(Client.account_number.in_(batch))
+        ):
+            found[row.account_number] = row
+    clients = [found[number] for number in account_numbers if number in found]
+    missing = [number for number in account_numbers if number not in found]
+    return clients, missing
+
+
+def create_tickets_bulk(clients, concern_title, concern_details, creator):
+    """
+    Files one ticket per client row (from load_bulk_clients), auto-assigned
+    across active TSRs, with the usual creation and assignment logs.
+    Returns {TSR id: tickets assigned} (None for unassigned); ids, not
+    names, so two TSRs sharing a name are not merged. Does not commit.
+    """
+    now = datetime.utcnow()
+    numbers = allocate_ticket_numbers(len(clients))
+    picks = claim_tsrs(len(clients)) or [(None, None)] * len(clients)
+    assigned = {}
+
+    table = Ticket.__table__
+    # Ids are matched back by ticket number: asking for RETURNING rows in
+    # parameter order makes SQLite fall back to one INSERT per row.
+    insert_tickets = table.insert().returning(table.c.id, table.c.ticket_number)
+    for start in range(0, len(clients), BULK_BATCH_SIZE):
+        batch = clients[start : start + BULK_BATCH_SIZE]
+        batch_picks = picks[start : start + BULK_BATCH_SIZE]
+        batch_numbers = numbers[start : start + BULK_BATCH_SIZE]
+        rows = []
+        for client, (tsr_id, tsr_name), number in zip(
+            batch, batch_picks, batch_numbers
+        ):
+            display_name = ticket_display_name(
+                client.region_name,
+                client.account_name,
+                client.account_number,
+                concern_title,
+            )
+            name = ticket_name(display_name, number)
+            rows.append(
+                {
+                    "ticket_number": number,
+                    "display_name": display_name,
+                    "ticket_name": name,
+                    "concern_title": concern_title,
+                    "concern_details": concern_details,
+                    "client_id": client.id,
+                    "created_by_id": creator.id,
+                    "assigned_to_id": tsr_id,
+                    "status": TicketStatus.NEW,
+                    "created_at": now,
+                    "updated_at": now,
+                    "search_document": build_search_document(
+                        name,
+                        concern_title,
+                        None,
+                        client.account_name,
+                        client.account_number,
+                        client.region_name,
+                        tsr_name,
+                    ),
+                }
+            )
+            assigned[tsr_id] = assigned.get(tsr_id, 0) + 1
+
+        ids_by_number = {
+            number: ticket_id
+            for ticket_id, number in db.session.execute(insert_tickets, rows)
+        }
+        ticket_ids = [ids_by_number[row["ticket_number"]] for row in rows]
+
+        logs = []
+        for ticket_id, (tsr_id, tsr_name) in zip(ticket_ids, batch_picks):
+            logs.append(
+                {
+                    "event_type": ActivityEvent.CREATED,
+                    "to_user": None,
+                    "user_id": creator.id,
+                    "ticket_id": ticket_id,
+                    "timestamp": now,
+                }
+            )
+            if tsr_id:
+                logs.append(
+                    {
+                        "event_type": ActivityEvent.AUTO_ASSIGNED,
+                        "to_user": tsr_name,
+                        "user_id": creator.id,
+                        "ticket_id": ticket_id,
+                        "timestamp": now,
+                    }
+                )
+        db.session.execute(ActivityLog.__table__.insert(), logs)
+
+        tickets_created(
+            [
+                {
+                    "id": ticket_id,
+                    "status": row["status"],
+                    "assigned_to_id": row["assigned_to_id"],
+                    "created_by_id": creator.id,
+                    "region_id": client.region_id,
+                    "created_at": now,
+                    "search_document": row["search_document"],
+                }
+                for ticket_id, row, client in zip(ticket_ids, rows, batch)
+            ]
+        )
+    return assigned
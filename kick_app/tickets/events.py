@@ -0,0 +1,434 @@
+"""
+Bookkeeping that must move in step with ticket writes.
+
+Routes call these after changing a ticket and before committing, so the
+derived data (search index, status rollup, TSR workloads, status history) commits
+or rolls back together with the ticket itself, and cached dashboards are
+invalidated on commit.
+"""
+
+from datetime import datetime
+from sqlalchemy import func, delete, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .. import db
+from ..cache import invalidate_on_commit, ADMIN_DASHBOARD_SCOPE, tsr_dashboard_scope
+from ..models import (
+    Ticket,
+    Client,
+    TicketStatus,
+    TicketStatusRollup,
+    TicketStatusHistory,
+    ActivityLog,
+    ActivityEvent,
+)
+from ..sqlutils import bucket_to_date, bulk_update_by_id, pht_bucket, pht_date
+from .search import (
+    index_new_documents,
+    refresh_search_document,
+    remove_search_document,
+)
+from .assignment import WORKLOAD_STATUSES, bump_workloads
+
+# created_day is the PHT calendar date of created_at (pht_date / pht_bucket),
+# the same days the dashboards' date ranges and resolved counts use
+ROLLUP_KEY = ("status", "assigned_to_id", "region_id", "created_day")
+
+HISTORY_FIELDS = (
+    "ticket_id",
+    "from_status",
+    "to_status",
+    "changed_at",
+    "changed_by_id",
+)
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Client ids per IN (...) list when moving tickets between regions
+CLIENT_BATCH_SIZE = 1000
+
+
+# --- STATUS ROLLUP ---
+
+
+def _rollup_key(ticket, status, assigned_to_id):
+    client = ticket.client or db.session.get(Client, ticket.client_id)
+    return {
+        "status": status,
+        "assigned_to_id": assigned_to_id or 0,
+        "region_id": client.region_id,
+        "created_day": pht_date(ticket.created_at),
+    }
+
+
+def _bump_rollups(deltas):
+    """
+    Atomic counter upserts for many keys at once (one executemany):
+    INSERT ... ON CONFLICT DO UPDATE count = count + excluded.count.
+    `deltas` is a list of rollup-key dicts with a ticket_count delta.
+    """
+    if not deltas:
+        return
+    if db.session.get_bind().dialect.name == "postgresql":
+        insert = pg_insert
+    else:
+        insert = sqlite_insert
+    stmt = insert(TicketStatusRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "ticket_count": TicketStatusRollup.ticket_count
+            + stmt.excluded.ticket_count
+        },
+    )
+    db.session.execute(stmt, deltas)
+
+
+def _bump_rollup(key, delta):
+    _bump_rollups([{**key, "ticket_count": delta}])
+
+
+def rebuild_rollup():
+    """Recomputes the whole rollup table from `tickets`. Does not commit."""
+    db.session.execute(delete(TicketStatusRollup))
+    created_day = pht_bucket(Ticket.created_at, "day")
+    grouped = (
+        db.session.query(
+            Ticket.status,
+            func.coalesce(Ticket.assigned_to_id, 0),
+            Client.region_id,
+            created_day,
+            func.count(Ticket.id),
+        )
+        .join(Client, Ticket.client_id == Client.id)
+        .group_by(
+            Ticket.status,
+            func.coalesce(Ticket.assigned_to_id, 0),
+            Client.region_id,
+            created_day,
+        )
+    )
+    db.session.execute(
+        TicketStatusRollup.__table__.insert().from_select(
+            [*ROLLUP_KEY, "ticket_count"], grouped
+        )
+    )
+    return db.session.query(func.count()).select_from(TicketStatusRollup).scalar()
+
+
+# --- LIFECYCLE TIMESTAMPS ---
+
+
+def _stamp_lifecycle(ticket, old_status):
+    """Moves opened_at / resolved_at along with a status change."""
+    if old_status == ticket.status:
+        return
+    now = datetime.utcnow()
+    if old_status == TicketStatus.NEW and ticket.opened_at is None:
+        ticket.opened_at = now
+    if ticket.status == TicketStatus.RESOLVED:
+        ticket.resolved_at = now
+    elif old_status == TicketStatus.RESOLVED:
+        ticket.resolved_at = None  # reopened
+
+
+# Activity-log events each historic timestamp is derived from
+OPENED_LOGS = or_(
+    ActivityLog.event_type == ActivityEvent.AUTO_OPENED,
+    (ActivityLog.event_type == ActivityEvent.STATUS_CHANGED)
+    & (ActivityLog.from_status == TicketStatus.NEW),
+)
+RESPONSE_LOGS = ActivityLog.event_type.in_(
+    [
+        ActivityEvent.STATUS_CHANGED,
+        ActivityEvent.REMARK_ADDED,
+        ActivityEvent.EMAIL_LOGGED,
+    ]
+)
+RESOLVED_LOGS = (ActivityLog.event_type == ActivityEvent.STATUS_CHANGED) & (
+    ActivityLog.to_status == TicketStatus.RESOLVED
+)
+
+
+def backfill_lifecycle(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Fills missing opened_at / first_response_at / resolved_at from the activity
+    logs, batch_size tickets at a time (one grouped log query + one bulk
+    UPDATE per batch). A resolved ticket without a resolution log falls back
+    to updated_at. Values already set are kept, and each batch is committed,
+    so an interrupted run can simply be restarted. Returns tickets updated.
+    """
+    tickets_query = (
+        select(
+            Ticket.id,
+            Ticket.status,
+            Ticket.updated_at,
+            Ticket.opened_at,
+            Ticket.first_response_at,
+            Ticket.resolved_at,
+        )
+        .where(
+            or_(
+                Ticket.opened_at.is_(None),
+                Ticket.first_response_at.is_(None),
+                (Ticket.status == TicketStatus.RESOLVED) & Ticket.resolved_at.is_(None),
+            )
+        )
+        .order_by(Ticket.id)
+        .limit(batch_size)
+    )
+    logs_query = select(
+        ActivityLog.ticket_id,
+        func.min(ActivityLog.timestamp).filter(OPENED_LOGS),
+        func.min(ActivityLog.timestamp).filter(RESPONSE_LOGS),
+        func.max(ActivityLog.timestamp).filter(RESOLVED_LOGS),
+    ).group_by(ActivityLog.ticket_id)
+
+    total = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(tickets_query.where(Ticket.id > last_id)).all()
+        if not batch:
+            break
+        derived = {
+            row[0]: row[1:]
+            for row in db.session.execute(
+                logs_query.where(
+                    ActivityLog.ticket_id.between(batch[0].id, batch[-1].id)
+                )
+            )
+        }
+
+        updates = []
+        for ticket in batch:
+            opened, responded, resolved = derived.get(ticket.id, (None, None, None))
+            if ticket.status == TicketStatus.RESOLVED:
+                resolved = ticket.resolved_at or resolved or ticket.updated_at
+            else:
+                resolved = ticket.resolved_at
+            values = {
+                "id": ticket.id,
+                "opened_at": ticket.opened_at or opened,
+                "first_response_at": ticket.first_response_at or responded,
+                "resolved_at": resolved,
+            }
+            if (values["opened_at"], values["first_response_at"], resolved) != (
+                ticket.opened_at,
+                ticket.first_response_at,
+                ticket.resolved_at,
+            ):
+                updates.append(values)
+
+        bulk_update_by_id(db.session, Ticket, updates)
+        db.session.commit()
+        total += len(updates)
+        last_id = batch[-1].id
+    return total
+
+
+# --- TSR WORKLOADS ---
+
+
+def _workload_deltas(*changes):
+    """{user id: delta} for (status, assigned_to_id, sign) ticket states."""
+    deltas = {}
+    for status, assigned_to_id, sign in changes:
+        if assigned_to_id and status in WORKLOAD_STATUSES:
+            deltas[assigned_to_id] = deltas.get(assigned_to_id, 0) + sign
+    return deltas
+
+
+# --- STATUS HISTORY ---
+
+
+def _record_transitions(transitions):
+    """
+    Appends rows to ticket_status_history (one executemany). `transitions`
+    are (ticket_id, from_status, to_status, changed_at, changed_by_id).
+    """
+    if not transitions:
+        return
+    db.session.execute(
+        TicketStatusHistory.__table__.insert(),
+        [dict(zip(HISTORY_FIELDS, transition)) for transition in transitions],
+    )
+
+
+# --- TICKET EVENTS ---
+
+
+def _invalidate_dashboards(*assigned_to_ids):
+    invalidate_on_commit(
+        ADMIN_DASHBOARD_SCOPE,
+        *[tsr_dashboard_scope(tsr_id) for tsr_id in set(assigned_to_ids) if tsr_id],
+    )
+
+
+def ticket_created(ticket):
+    """A new ticket was added (and flushed, so it has an id and created_at)."""
+    _bump_rollup(_rollup_key(ticket, ticket.status, ticket.assigned_to_id), 1)
+    bump_workloads(_workload_deltas((ticket.status, ticket.assigned_to_id, 1)))
+    _record_transitions(
+        [(ticket.id, None, ticket.status, ticket.created_at, ticket.created_by_id)]
+    )
+    refresh_search_document(ticket)
+    _invalidate_dashboards(ticket.assigned_to_id)
+
+
+def tickets_created(rows):
+    """
+    Bulk form of ticket_created for tickets inserted without the ORM. `rows`
+    are dicts with the ticket's id, status, assigned_to_id, created_by_id,
+    region_id (of its client), created_at and search_document.
+    """
+    rollup = {}
+    for row in rows:
+        key = (
+            row["status"],
+            row["assigned_to_id"] or 0,
+            row["region_id"],
+            pht_date(row["created_at"]),
+        )
+        rollup[key] = rollup.get(key, 0) + 1
+    _bump_rollups(
+        [
+            {**dict(zip(ROLLUP_KEY, key)), "ticket_count": count}
+            for key, count in rollup.items()
+        ]
+    )
+    bump_workloads(
+        _workload_deltas(
+            *((row["status"], row["assigned_to_id"], 1) for row in rows)
+        )
+    )
+    _record_transitions(
+        [
+            (row["id"], None, row["status"], row["created_at"], row["created_by_id"])
+            for row in rows
+        ]
+    )
+    index_new_documents([(row["id"], row["search_document"]) for row in rows])
+    _invalidate_dashboards(*(row["assigned_to_id"] for row in rows))
+
+
+def ticket_changed(ticket, old_status, old_assigned_to_id, changed_by_id=None):
+    """
+    Status, assignee, RT number or other searchable fields were edited.
+    A status change is appended to the status history, by `changed_by_id`.
+    """
+    _stamp_lifecycle(ticket, old_status)
+    if old_status != ticket.status:
+        _record_transitions(
+            [(ticket.id, old_status, ticket.status, datetime.utcnow(), changed_by_id)]
+        )
+    if old_status != ticket.status or old_assigned_to_id != ticket.assigned_to_id:
+        _bump_rollup(_rollup_key(ticket, old_status, old_assigned_to_id), -1)
+        _bump_rollup(_rollup_key(ticket, ticket.status, ticket.assigned_to_id), 1)
+        bump_workloads(
+            _workload_deltas(
+                (old_status, old_assigned_to_id, -1),
+                (ticket.status, ticket.assigned_to_id, 1),
+            )
+        )
+        _invalidate_dashboards(old_assigned_to_id, ticket.assigned_to_id)
+    refresh_search_document(ticket)
+
+
+def ticket_responded(ticket):
+    """Someone acted on the ticket (status change, remark or email log)."""
+    if ticket.first_response_at is None:
+        ticket.first_response_at = datetime.utcnow()
+
+
+def ticket_deleted(ticket):
+    """The ticket is about to be deleted."""
+    _bump_rollup(_rollup_key(ticket, ticket.status, ticket.assigned_to_id), -1)
+    bump_workloads(_workload_deltas((ticket.status, ticket.assigned_to_id, -1)))
+    remove_search_document(ticket.id)
+    _invalidate_dashboards(ticket.assigned_to_id)
+
+
+def tickets_archived(rows):
+    """
+    Tickets are about to move to the archive (tickets/archive.py). `rows`
+    are dicts with the ticket's status, assigned_to_id, region_id (of its
+    client) and created_at. They leave the rollup and workloads; their search
+    documents travel with them.
+    """
+    rollup = {}
+    for row in rows:
+        key = (
+            row["status"],
+            row["assigned_to_id"] or 0,
+            row["region_id"],
+            pht_date(row["created_at"]),
+        )
+        rollup[key] = rollup.get(key, 0) - 1
+    _bump_rollups(
+        [
+            {**dict(zip(ROLLUP_KEY, key)), "ticket_count": count}
+            for key, count in rollup.items()
+        ]
+    )
+    bump_workloads(
+        _workload_deltas(
+            *((row["status"], row["assigned_to_id"], -1) for row in rows)
+        )
+    )
+    _invalidate_dashboards(*(row["assigned_to_id"] for row in rows))
+
+
+def ticket_restored(ticket):
+    """An archived ticket was moved back into `tickets`."""
+    _bump_rollup(_rollup_key(ticket, ticket.status, ticket.assigned_to_id), 1)
+    bump_workloads(_workload_deltas((ticket.status, ticket.assigned_to_id, 1)))
+    refresh_search_document(ticket)
+    _invalidate_dashboards(ticket.assigned_to_id)
+
+
+def client_region_changed(client_id, old_region_id, new_region_id):
+    """Moves a client's tickets between regions in the rollup (set-based)."""
+    clients_region_changed({client_id: (old_region_id, new_region_id)})
+
+
+def clients_region_changed(region_changes):
+    """
+    Bulk form of client_region_changed: `region_changes` maps client id to
+    (old_region_id, new_region_id). One grouped ticket query per
+    CLIENT_BATCH_SIZE clients, then one executemany of rollup deltas.
+    """
+    client_ids = list(region_changes)
+    created_day = pht_bucket(Ticket.created_at, "day")
+    deltas = {}
+    for start in range(0, len(client_ids), CLIENT_BATCH_SIZE):
+        batch_ids = client_ids[start : start + CLIENT_BATCH_SIZE]
+        groups = (
+            db.session.query(
+                Ticket.client_id,
+                Ticket.status,
+                Ticket.assigned_to_id,
+                created_day,
+                func.count(Ticket.id),
+            )
+            .filter(Ticket.client_id.in_(batch_ids))
+            .group_by(
+                Ticket.client_id,
+                Ticket.status,
+                Ticket.assigned_to_id,
+                created_day,
+            )
+            .all()
+        )
+        for client_id, status, assigned_to_id, day, count in groups:
+            old_region_id, new_region_id = region_changes[client_id]
+            for region_id, delta in ((old_region_id, -count), (new_region_id, count)):
+                key = (status, assigned_to_id or 0, region_id, bucket_to_date(day))
+                deltas[key] = deltas.get(key, 0) + delta
+
+    _bump_rollups(
+        [
+            dict(zip(ROLLUP_KEY, key), ticket_count=delta)
+            for key, delta in deltas.items()
+            if delta
+        ]
+    )
@@ -7,40 +7,42 @@ from wtforms import (
     SelectField,
     BooleanField,
     DateTimeField,
+    HiddenField,
 )
 from wtforms.validators import (
     DataRequired,
     Length,
     Optional,
+    ValidationError,
 )  # Ensure Optional is imported
-from wtforms_sqlalchemy.fields import QuerySelectField
-from kick_app.models import Client, TicketStatus, User, UserRole
+from kick_app import db
+from kick_app.models import Client, TicketStatus
+from kick_app.refdata import RefSelectField, active_tsrs, regions
 from datetime import datetime
 
 
-def get_clients():
-    """Helper function to query all clients, ordered by name."""
-    return Client.query.order_by(Client.account_name).all()
+class ClientField(HiddenField):
+    """
+    Client chosen with the async picker (create_ticket.html, backed by
+    /api/clients/search). Posts the client id; `data` is the Client, loaded
+    with one primary-key lookup (None for a missing or unknown id).
+    """
 
+    def _value(self):
+        return str(self.data.id) if self.data else ""
 
-def get_tsrs():
-    """Helper function to query all active TSRs."""
-    return (
-        User.query.filter(User.role == UserRole.TSR, User.is_active == True)
-        .order_by(User.full_name)
-        .all()
-    )
+    def process_formdata(self, valuelist):
+        self.data = None
+        if valuelist and valuelist[0].isdigit():
+            self.data = db.session.get(Client, int(valuelist[0]))
 
 
 class TicketForm(FlaskForm):
     """Form for Admins to create a new ticket."""
 
-    client = QuerySelectField(
+    client = ClientField(
         "Client (Search by Account Name or #)",
-        query_factory=get_clients,
-        get_label=lambda c: f"{c.account_name} ({c.account_number})",
-        allow_blank=False,
-        validators=[DataRequired()],
+        validators=[DataRequired("Choose a client from the search results.")],
     )
 
     concern_title = StringField(
@@ -55,6 +57,37 @@ class TicketForm(FlaskForm):
     submit = SubmitField("Create Ticket")
 
 
+class BulkTicketForm(FlaskForm):
+    """Form for Admins to file one concern for many clients (mass outages)."""
+
+    account_numbers = TextAreaField(
+        "Account Numbers (one per line, or comma separated)",
+        validators=[Optional()],
+        render_kw={"rows": 8},
+    )
+    region = RefSelectField(
+        "...or every active client in a Region",
+        query_factory=regions,
+        get_label="name",
+        allow_blank=True,
+        blank_text="-- No region --",
+    )
+    concern_title = StringField(
+        "Concern Title", validators=[DataRequired(), Length(max=100)]
+    )
+    concern_details = TextAreaField(
+        "Concern Details", validators=[DataRequired(), Length(max=1000)]
+    )
+    submit = SubmitField("Create Tickets")
+
+    def validate_region(self, field):
+        has_numbers = bool((self.account_numbers.data or "").strip())
+        if has_numbers and field.data:
+            raise ValidationError("Use either account numbers or a region, not both.")
+        if not has_numbers and not field.data:
+            raise ValidationError("Enter account numbers or choose a region.")
+
+
 # --- CORRECTED UpdateTicketForm ---
 class UpdateTicketForm(FlaskForm):
     """Form for TSRs/Admins to update a ticket."""
@@ -66,9 +99,9 @@ class UpdateTicketForm(FlaskForm):
     )
 
     # This field is for Admins to reassign
-    assigned_tsr = QuerySelectField(
+    assigned_tsr = RefSelectField(
         "Assign/Reassign to TSR",
-        query_factory=get_tsrs,
+        query_factory=active_tsrs,
         get_label="full_name",
         allow_blank=True,  # Allows 'Unassigned' selection
         validators=[],  # Not strictly required for the update action
@@ -0,0 +1,69 @@
+"""
+Ticket numbers and names.
+
+Every ticket gets a human number from a database sequence (ticket_number_seq
+on PostgreSQL; a counter row on SQLite, which has no sequences). Numbers are
+handed out atomically, so two tickets filed for the same
+client and concern in the same second no longer collide on the unique
+ticket_name, and creation never has to retry.
+
+The name shown in lists (display_name) is stored with the ticket; ticket_name
+is that name plus the number.
+"""
+
+from sqlalchemy import func, literal, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .. import db
+from ..models import Ticket, TicketNumberCounter
+
+TICKET_NUMBER_SEQUENCE = "ticket_number_seq"
+
+
+def allocate_ticket_numbers(count):
+    """
+    Reserves `count` new ticket numbers and returns them in ascending order
+    (one query). On PostgreSQL, numbers taken by a rolled-back transaction
+    are skipped rather than reused.
+    """
+    if count <= 0:
+        return []
+    if db.session.get_bind().dialect.name == "postgresql":
+        return sorted(
+            db.session.execute(
+                select(func.nextval(TICKET_NUMBER_SEQUENCE)).select_from(
+                    func.generate_series(1, count)
+                )
+            ).scalars()
+        )
+
+    # SQLite serializes writers, so the upsert hands out a private range.
+    # A missing counter row starts after the highest existing number.
+    stmt = sqlite_insert(TicketNumberCounter).from_select(
+        ["name", "last_value"],
+        select(
+            literal(TICKET_NUMBER_SEQUENCE),
+            func.coalesce(func.max(Ticket.ticket_number), 0) + count,
+        ).where(true()),  # WHERE keeps SQLite from reading ON CONFLICT as a join
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"last_value": TicketNumberCounter.last_value + count},
+    ).returning(TicketNumberCounter.last_value)
+    last = db.session.execute(stmt).scalar()
+    return list(range(last - count + 1, last + 1))
+
+
+def ticket_display_name(region_name, account_name, account_number, concern_title):
+    """The list label for a ticket (the old ticket_name without its timestamp)."""
+    return (
+        f"{region_name}_"
+        f"{account_name}_"
+        f"{account_number}_"
+        f"{concern_title.replace(' ', '')}"
+    )
+
+
+def ticket_name(display_name, ticket_number):
+    """The unique ticket name: the display name suffixed with the number."""
+    return f"{display_name}_{ticket_number}"
+
@@ -0,0 +1,138 @@
+from sqlalchemy.orm import aliased, contains_eager, joinedload, load_only, raiseload
+from .. import db
+from ..pagination import KeysetPagination
+from ..models import (
+    Ticket,
+    Client,
+    Region,
+    User,
+    TicketStatus,
+    ActivityLog,
+    EmailLog,
+    TicketAttachment,
+)
+
+
+# Aliases for the two User joins on a ticket row (assigned TSR and creator).
+# Routes filtering on the TSR name must use TicketAssignee, not User.
+TicketAssignee = aliased(User, name="ticket_assignee")
+TicketCreator = aliased(User, name="ticket_creator")
+
+# Work-queue order for a TSR's own list: New first, Resolved last.
+WORK_QUEUE_STATUSES = [
+    TicketStatus.NEW,
+    TicketStatus.OPEN,
+    TicketStatus.IN_PROGRESS,
+    TicketStatus.PENDING,
+    TicketStatus.RESOLVED,
+]
+STATUS_RANK = db.case(
+    *[
+        (Ticket.status == status, rank)
+        for rank, status in enumerate(WORK_QUEUE_STATUSES)
+    ],
+    else_=len(WORK_QUEUE_STATUSES),
+)
+
+# Keyset sort keys (expression, descending) for the cursor-paginated lists.
+# Each ends in the primary key so every row has a unique position.
+ALL_TICKETS_KEYS = [(Ticket.created_at, True), (Ticket.id, True)]
+# my_tickets: one seek per status in work-queue order (PartitionedKeysetPagination),
+# served by ix_tickets_assigned_to_id_status_updated_at_id
+MY_TICKETS_PARTITIONS = [Ticket.status == status for status in WORK_QUEUE_STATUSES]
+MY_TICKETS_KEYS = [(Ticket.updated_at, True), (Ticket.id, True)]
+
+# Activity timeline on view_ticket: newest first, "Load older" fetches the rest
+TIMELINE_KEYS = [(ActivityLog.timestamp, True), (ActivityLog.id, True)]
+TIMELINE_PER_PAGE = 20
+
+
+def ticket_list_query(model=Ticket):
+    """
+    Base query for the ticket list pages (all_tickets / my_tickets).
+
+    Loads each row's ticket, client, region, assigned TSR and creator in ONE
+    joined SELECT, restricted to the columns the list templates read.
+    Any other relationship access raises instead of silently lazy-loading,
+    so a page always costs a fixed number of queries (the rows, plus a COUNT
+    for numbered pages). `model` may be ArchivedTicket (archive searches).
+    """
+    return (
+        db.session.query(model)
+        .join(model.client)
+        .join(Client.region)
+        .outerjoin(model.assigned_tsr.of_type(TicketAssignee))
+        .outerjoin(model.creator.of_type(TicketCreator))
+        .options(
+            load_only(
+                model.id,
+                model.ticket_number,
+                model.display_name,
+                model.concern_title,
+                model.rt_ticket_number,
+                model.status,
+                model.created_at,
+                model.updated_at,
+                model.assigned_to_id,
+            ),
+            contains_eager(model.client)
+            .load_only(Client.account_name, Client.account_number)
+            .contains_eager(Client.region)
+            .load_only(Region.name),
+            contains_eager(model.assigned_tsr.of_type(TicketAssignee)).load_only(
+                TicketAssignee.full_name
+            ),
+            contains_eager(model.creator.of_type(TicketCreator)).load_only(
+                TicketCreator.full_name
+            ),
+            raiseload("*"),
+        )
+    )
+
+
+def ticket_detail_query():
+    """
+    Base query for view_ticket: the ticket with its client, region, assigned
+    TSR and creator in ONE joined SELECT. Filter it by id.
+    """
+    return Ticket.query.options(
+        joinedload(Ticket.client).joinedload(Client.region),
+        joinedload(Ticket.assigned_tsr),
+        joinedload(Ticket.creator),
+    )
+
+
+def ticket_timeline(ticket_id, cursor=None, per_page=TIMELINE_PER_PAGE):
+    """
+    One page of a ticket's activity log, newest first (KeysetPagination on
+    TIMELINE_KEYS, served by ix_activity_logs_ticket_id_timestamp_id).
+    view_ticket renders the first page; /api/tickets/<id>/timeline the rest.
+    """
+    query = ActivityLog.query.filter(ActivityLog.ticket_id == ticket_id).options(
+        joinedload(ActivityLog.user).load_only(User.full_name),  # for describe()
+        raiseload("*"),
+    )
+    return KeysetPagination(query, TIMELINE_KEYS, cursor=cursor, per_page=per_page)
+
+
+def ticket_detail_lists(ticket_id):
+    """
+    The first timeline page, email logs and attachments (newest first) shown
+    on view_ticket: one query each, with email authors and uploaders joined
+    in. Other relationship access raises, so the page cost doesn't grow with
+    the number of rows or distinct users.
+    """
+    timeline = ticket_timeline(ticket_id)
+    email_logs = (
+        EmailLog.query.filter(EmailLog.ticket_id == ticket_id)
+        .order_by(EmailLog.sent_at.desc())
+        .options(joinedload(EmailLog.author), raiseload("*"))
+        .all()
+    )
+    attachments = (
+        TicketAttachment.query.filter(TicketAttachment.ticket_id == ticket_id)
+        .order_by(TicketAttachment.uploaded_at.desc())
+        .options(joinedload(TicketAttachment.uploader), raiseload("*"))
+        .all()
+    )
+    return timeline, email_logs, attachments
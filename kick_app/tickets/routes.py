@@ -1,10 +1,43 @@
 import os
 from werkzeug.utils import secure_filename
-from flask import render_template, flash, redirect, url_for, request, current_app
+from flask import (
+    render_template,
+    flash,
+    redirect,
+    url_for,
+    request,
+    current_app,
+    abort,
+)
 from flask_login import login_required, current_user
-from sqlalchemy import func, or_
 from . import tickets
-from .forms import TicketForm, UpdateTicketForm, EmailLogForm, AttachmentForm
+from .forms import (
+    TicketForm,
+    BulkTicketForm,
+    UpdateTicketForm,
+    EmailLogForm,
+    AttachmentForm,
+)
+from .queries import (
+    ticket_list_query,
+    ticket_detail_query,
+    ticket_detail_lists,
+    STATUS_RANK,
+    ALL_TICKETS_KEYS,
+    MY_TICKETS_PARTITIONS,
+    MY_TICKETS_KEYS,
+)
+from .search import search_tickets
+from .archive import restore_archived_ticket, search_tickets_with_archive
+from .assignment import claim_next_tsr
+from .numbering import allocate_ticket_numbers, ticket_display_name, ticket_name
+from .bulk import (
+    MAX_BULK_TICKETS,
+    create_tickets_bulk,
+    load_bulk_clients,
+    parse_account_numbers,
+)
+from . import events
 from .. import db
 from ..models import (
     Ticket,
@@ -14,52 +47,18 @@ from ..models import (
     TicketStatus,
     UserRole,
     ActivityLog,
+    ActivityEvent,
     EmailLog,
     TicketAttachment,
+    TicketStatusHistory,
 )
 from ..decorators import admin_required
+from ..pagination import KeysetPagination, PartitionedKeysetPagination
+from ..refdata import TsrRef, active_tsr, active_tsrs
 import pytz
 from datetime import datetime
 
 
-# --- Helper Function for Auto-Assignment ---
-def get_next_tsr():
-    """
-    Smart Assignment v2:
-    1. Filter for Active TSRs only.
-    2. Count ALL active workload: NEW + OPEN + IN PROGRESS.
-       (Fixes the issue where 'New' tickets were ignored, causing assignment bursts)
-    3. TIE-BREAKER: Round Robin (Oldest 'last_assigned_at').
-    """
-    subquery = (
-        db.session.query(
-            Ticket.assigned_to_id, func.count(Ticket.id).label("ticket_count")
-        )
-        # FIX: Include TicketStatus.NEW so instant assignments count immediately!
-        .filter(
-            Ticket.status.in_(
-                [TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS]
-            )
-        )
-        .group_by(Ticket.assigned_to_id)
-        .subquery()
-    )
-
-    tsr_with_counts = (
-        db.session.query(User, func.coalesce(subquery.c.ticket_count, 0).label("count"))
-        .outerjoin(subquery, User.id == subquery.c.assigned_to_id)
-        .filter(User.role == UserRole.TSR, User.is_active == True)  # Only Active users
-        .order_by(
-            func.coalesce(
-                subquery.c.ticket_count, 0
-            ).asc(),  # Priority 1: Lowest Workload
-            User.last_assigned_at.asc().nullsfirst(),  # Priority 2: Round Robin Fairness
-        )
-        .first()
-    )
-    return tsr_with_counts[0] if tsr_with_counts else None
-
-
 # --- Ticket Routes ---
 
 
@@ -73,19 +72,18 @@ def create_ticket():
         concern_title = form.concern_title.data
         concern_details = form.concern_details.data
 
-        # Unique timestamp for ticket name
-        timestamp_str = str(int(datetime.utcnow().timestamp()))
-
-        ticket_name = (
-            f"{client.region.name}_"
-            f"{client.account_name}_"
-            f"{client.account_number}_"
-            f"{concern_title.replace(' ', '')}_"
-            f"{timestamp_str}"
+        (ticket_number,) = allocate_ticket_numbers(1)
+        display_name = ticket_display_name(
+            client.region.name,
+            client.account_name,
+            client.account_number,
+            concern_title,
         )
 
         ticket = Ticket(
-            ticket_name=ticket_name,
+            ticket_number=ticket_number,
+            display_name=display_name,
+            ticket_name=ticket_name(display_name, ticket_number),
             concern_title=concern_title,
             concern_details=concern_details,
             client_id=client.id,
@@ -94,38 +92,35 @@ def create_ticket():
         )
 
         db.session.add(ticket)
-        db.session.commit()
+        db.session.flush()  # assigns ticket.id; everything below commits together
 
         log_creation = ActivityLog(
-            action=f"Ticket created by {current_user.full_name}",
+            event_type=ActivityEvent.CREATED,
             user_id=current_user.id,
             ticket_id=ticket.id,
         )
         db.session.add(log_creation)
 
-        # --- AUTO-ASSIGNMENT LOGIC ---
-        next_tsr = get_next_tsr()
+        # --- AUTO-ASSIGNMENT (least open tickets, then round robin) ---
+        next_tsr = claim_next_tsr()
         if next_tsr:
-            ticket.assigned_to_id = next_tsr.id
-
-            # --- CRITICAL: Update the User's Timestamp ---
-            next_tsr.last_assigned_at = datetime.utcnow()
-            db.session.add(next_tsr)
-            # ---------------------------------------------
+            tsr_id, tsr_name = next_tsr
+            ticket.assigned_to_id = tsr_id
 
             log_assign = ActivityLog(
-                action=f"Ticket auto-assigned to {next_tsr.full_name}",
+                event_type=ActivityEvent.AUTO_ASSIGNED,
+                to_user=tsr_name,
                 user_id=current_user.id,
                 ticket_id=ticket.id,
             )
             db.session.add(log_assign)
 
-            db.session.commit()
-            flash(
-                f"Ticket created and auto-assigned to {next_tsr.full_name}.", "success"
-            )
+        events.ticket_created(ticket)
+        db.session.commit()
+
+        if next_tsr:
+            flash(f"Ticket created and auto-assigned to {tsr_name}.", "success")
         else:
-            db.session.commit()
             flash(
                 "Ticket created but no active TSRs available for assignment.", "warning"
             )
@@ -140,58 +135,103 @@ def create_ticket():
     return render_template("create_ticket.html", title="Create New Ticket", form=form)
 
 
+@tickets.route("/bulk", methods=["GET", "POST"])
+@login_required
+@admin_required
+def bulk_create_tickets():
+    """One concern filed for many clients at once (mass-outage events)."""
+    form = BulkTicketForm()
+    if form.validate_on_submit():
+        if form.region.data:
+            clients, missing = load_bulk_clients(region_id=form.region.data.id)
+        else:
+            clients, missing = load_bulk_clients(
+                account_numbers=parse_account_numbers(form.account_numbers.data)
+            )
+
+        if missing:
+            shown = ", ".join(missing[:20]) + (" ..." if len(missing) > 20 else "")
+            flash(f"{len(missing)} account numbers were not found: {shown}", "danger")
+        elif not clients:
+            flash("No active clients found in that region.", "warning")
+        elif len(clients) > MAX_BULK_TICKETS:
+            flash(
+                f"{len(clients):,} tickets requested; the limit is "
+                f"{MAX_BULK_TICKETS:,} per bulk create.",
+                "danger",
+            )
+        else:
+            assigned = create_tickets_bulk(
+                clients,
+                form.concern_title.data,
+                form.concern_details.data,
+                current_user,
+            )
+            db.session.commit()
+            # Breakdown is keyed by TSR id; names only for the message
+            names = {tsr.id: tsr.full_name for tsr in active_tsrs()}
+            names[None] = "Unassigned"
+            breakdown = ", ".join(
+                f"{names.get(tsr_id, f'TSR #{tsr_id}')}: {count}"
+                for tsr_id, count in assigned.items()
+            )
+            flash(f"{len(clients)} tickets created ({breakdown}).", "success")
+            return redirect(url_for("tickets.all_tickets"))
+
+    return render_template(
+        "bulk_create_tickets.html", title="Bulk Create Tickets", form=form
+    )
+
+
 @tickets.route("/all")
 @login_required
 @admin_required
 def all_tickets():
     """Admin-only view of all tickets with ADVANCED SEARCH."""
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     status_filter = request.args.get("status")
     search_query = request.args.get("search", "").strip()
+    # Searches only: also match tickets moved to the archive (tickets/archive.py)
+    include_archived = request.args.get("include_archived") == "1"
 
-    # Join Client, Region, AND outerjoin User (for assigned TSR search)
-    query = (
-        Ticket.query.join(Client)
-        .join(Region)
-        .outerjoin(
-            User, Ticket.assigned_to_id == User.id
-        )  # Join User table to search TSR names
-        .order_by(Ticket.created_at.desc())
-    )
+    # Client, Region, assigned TSR and creator are joined (and eager-loaded) here
+    query = ticket_list_query()
 
     # Apply Status Filter (Dropdown)
+    status = None
     if status_filter:
         try:
-            query = query.filter(Ticket.status == TicketStatus[status_filter.upper()])
+            status = TicketStatus[status_filter.upper()]
+            query = query.filter(Ticket.status == status)
         except KeyError:
             flash(f"Invalid status filter '{status_filter}'.", "warning")
 
     # --- SMART SEARCH ENGINE ---
-    if search_query:
-        search_term = f"%{search_query}%"
-
-        # Use ILIKE for case-insensitive search (PostgreSQL friendly)
-        query = query.filter(
-            or_(
-                Ticket.ticket_name.ilike(search_term),  # Ticket Name
-                Ticket.concern_title.ilike(search_term),  # Concern
-                Ticket.rt_ticket_number.ilike(search_term),  # RT Number
-                Client.account_name.ilike(search_term),  # Client Name
-                Client.account_number.ilike(search_term),  # Account Number
-                Region.name.ilike(search_term),  # Region
-                User.full_name.ilike(search_term),  # Assigned TSR Name
-                # Cast Enum status to string to allow searching "RESOLVED" or "OPEN"
-                db.cast(Ticket.status, db.String).ilike(search_term),
-            )
+    # Indexed search over ticket name, concern, RT#, client, account#, region
+    # and TSR; best matches first, newest first among equals.
+    if search_query and include_archived:
+        all_tickets = search_tickets_with_archive(
+            search_query, status=status, page=page, per_page=15
+        )
+    elif search_query:
+        # Ranked results: numbered pages over the (small) match set
+        query = search_tickets(query, search_query).order_by(Ticket.created_at.desc())
+        all_tickets = query.paginate(page=page, per_page=15, error_out=False)
+    else:
+        # Browsing: cursor pagination on (created_at, id), newest first
+        all_tickets = KeysetPagination(
+            query, ALL_TICKETS_KEYS, cursor=cursor, per_page=15
         )
 
-    all_tickets = query.paginate(page=page, per_page=15, error_out=False)
     return render_template(
         "all_tickets.html",
         title="All Tickets",
         tickets=all_tickets,
         statuses=TicketStatus,
         search_query=search_query,
+        status_filter=status_filter,
+        include_archived=include_archived,
     )
 
 
@@ -203,44 +243,23 @@ def my_tickets():
         return redirect(url_for("tickets.all_tickets"))
 
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     search_query = request.args.get("search", "").strip()
 
     # Base query for user's tickets
-    query = Ticket.query.filter_by(assigned_to_id=current_user.id)
+    query = ticket_list_query().filter(Ticket.assigned_to_id == current_user.id)
 
     # --- SMART SEARCH ENGINE ---
     if search_query:
-        search_term = f"%{search_query}%"
-        query = (
-            query.join(Client)
-            .join(Region)
-            .filter(
-                or_(
-                    Ticket.ticket_name.ilike(search_term),
-                    Ticket.concern_title.ilike(search_term),
-                    Ticket.rt_ticket_number.ilike(search_term),
-                    Client.account_name.ilike(search_term),
-                    Client.account_number.ilike(search_term),
-                    Region.name.ilike(search_term),
-                    db.cast(Ticket.status, db.String).ilike(search_term),
-                )
-            )
+        query = search_tickets(query, search_query).order_by(
+            STATUS_RANK, Ticket.updated_at.desc()
+        )
+        my_tickets = query.paginate(page=page, per_page=15, error_out=False)
+    else:
+        # Cursor pagination on (status rank, updated_at, id), one seek per status
+        my_tickets = PartitionedKeysetPagination(
+            query, MY_TICKETS_PARTITIONS, MY_TICKETS_KEYS, cursor=cursor, per_page=15
         )
-
-    # Apply sorting
-    query = query.order_by(
-        db.case(
-            (Ticket.status == TicketStatus.NEW, -1),
-            (Ticket.status == TicketStatus.OPEN, 0),
-            (Ticket.status == TicketStatus.IN_PROGRESS, 1),
-            (Ticket.status == TicketStatus.PENDING, 2),
-            (Ticket.status == TicketStatus.RESOLVED, 3),
-            else_=4,
-        ),
-        Ticket.updated_at.desc(),
-    )
-
-    my_tickets = query.paginate(page=page, per_page=15, error_out=False)
 
     return render_template(
         "my_tickets.html",
@@ -253,7 +272,7 @@ def my_tickets():
 @tickets.route("/<int:id>", methods=["GET", "POST"])
 @login_required
 def view_ticket(id):
-    ticket = Ticket.query.get_or_404(id)
+    ticket = ticket_detail_query().filter(Ticket.id == id).first_or_404()
     if current_user.role != UserRole.ADMIN and ticket.assigned_to_id != current_user.id:
         flash("You do not have permission to view this ticket.", "danger")
         return redirect(url_for("main.index"))
@@ -265,18 +284,39 @@ def view_ticket(id):
         and ticket.status == TicketStatus.NEW
     ):
         ticket.status = TicketStatus.OPEN
-        log_action = f"Ticket status automatically changed to Open by {current_user.full_name} viewing it."
+        events.ticket_changed(
+            ticket, TicketStatus.NEW, ticket.assigned_to_id, current_user.id
+        )
         log_open = ActivityLog(
-            action=log_action, user_id=current_user.id, ticket_id=ticket.id
+            event_type=ActivityEvent.AUTO_OPENED,
+            from_status=TicketStatus.NEW,
+            to_status=TicketStatus.OPEN,
+            user_id=current_user.id,
+            ticket_id=ticket.id,
         )
         db.session.add(log_open)
         db.session.commit()
+        # Reload the graph in one query rather than lazily after the expiry
+        ticket = (
+            ticket_detail_query().filter(Ticket.id == id).populate_existing().one()
+        )
         flash("Ticket status updated to Open.", "info")
 
     form = UpdateTicketForm()
     email_form = EmailLogForm()
     attachment_form = AttachmentForm()
 
+    # The dropdown lists active TSRs; a deactivated assignee is added to it,
+    # otherwise the field renders blank and saving would unassign the ticket
+    assignee = None
+    if ticket.assigned_to_id:
+        assignee = active_tsr(ticket.assigned_to_id)
+        if assignee is None:
+            assignee = TsrRef(
+                ticket.assigned_to_id, f"{ticket.assigned_tsr.full_name} (inactive)"
+            )
+            form.assigned_tsr.query = [*active_tsrs(), assignee]
+
     # --- NEW: Handle Attachment Upload ---
     if attachment_form.submit_attachment.data and attachment_form.validate_on_submit():
         try:
@@ -308,7 +348,8 @@ def view_ticket(id):
 
             # Log it
             log_activity = ActivityLog(
-                action=f"Uploaded attachment: {original_filename}",
+                event_type=ActivityEvent.ATTACHMENT_ADDED,
+                to_value=original_filename,
                 user_id=current_user.id,
                 ticket_id=ticket.id,
             )
@@ -342,11 +383,12 @@ def view_ticket(id):
             db.session.add(new_log)
 
             log_activity = ActivityLog(
-                action=f"Email log added by {current_user.full_name}.",
+                event_type=ActivityEvent.EMAIL_LOGGED,
                 user_id=current_user.id,
                 ticket_id=ticket.id,
             )
             db.session.add(log_activity)
+            events.ticket_responded(ticket)
 
             db.session.commit()
             flash("New email log entry has been added.", "success")
@@ -357,17 +399,23 @@ def view_ticket(id):
 
     elif form.submit.data and form.validate_on_submit():
         try:
+            old_status = ticket.status
+            old_assigned_to_id = ticket.assigned_to_id
             new_status_enum = TicketStatus[form.status.data]
-            log_action = ""
             something_changed = False
 
             if current_user.role == UserRole.ADMIN:
                 new_tsr = form.assigned_tsr.data
                 old_tsr_id = ticket.assigned_to_id
                 if new_tsr and old_tsr_id != new_tsr.id:
-                    log_reassign_action = f"Ticket reassigned from {ticket.assigned_tsr.full_name if ticket.assigned_tsr else 'Unassigned'} to {new_tsr.full_name} by {current_user.full_name}."
                     log_reassign = ActivityLog(
-                        action=log_reassign_action,
+                        event_type=ActivityEvent.REASSIGNED,
+                        from_user=(
+                            ticket.assigned_tsr.full_name
+                            if ticket.assigned_tsr
+                            else None
+                        ),
+                        to_user=new_tsr.full_name,
                         user_id=current_user.id,
                         ticket_id=ticket.id,
                     )
@@ -375,9 +423,9 @@ def view_ticket(id):
                     ticket.assigned_to_id = new_tsr.id
                     something_changed = True
                 elif not new_tsr and old_tsr_id:
-                    log_unassign_action = f"Ticket unassigned from {ticket.assigned_tsr.full_name} by {current_user.full_name}."
                     log_unassign = ActivityLog(
-                        action=log_unassign_action,
+                        event_type=ActivityEvent.UNASSIGNED,
+                        from_user=ticket.assigned_tsr.full_name,
                         user_id=current_user.id,
                         ticket_id=ticket.id,
                     )
@@ -388,68 +436,60 @@ def view_ticket(id):
             new_rt_number = form.rt_ticket_number.data.strip() or None
             old_rt_number = ticket.rt_ticket_number
             if new_rt_number != old_rt_number:
-                rt_log_action = ""
-                if old_rt_number and new_rt_number:
-                    rt_log_action = f"RT Ticket Number changed from '{old_rt_number}' to '{new_rt_number}' by {current_user.full_name}."
-                elif new_rt_number:
-                    rt_log_action = f"RT Ticket Number '{new_rt_number}' added by {current_user.full_name}."
-                elif old_rt_number:
-                    rt_log_action = f"RT Ticket Number '{old_rt_number}' removed by {current_user.full_name}."
-                if rt_log_action:
-                    log_rt = ActivityLog(
-                        action=rt_log_action,
-                        user_id=current_user.id,
-                        ticket_id=ticket.id,
-                    )
-                    db.session.add(log_rt)
+                log_rt = ActivityLog(
+                    event_type=ActivityEvent.RT_NUMBER_CHANGED,
+                    from_value=old_rt_number,
+                    to_value=new_rt_number,
+                    user_id=current_user.id,
+                    ticket_id=ticket.id,
+                )
+                db.session.add(log_rt)
                 ticket.rt_ticket_number = new_rt_number
                 something_changed = True
 
             if ticket.status != new_status_enum:
-                log_action = (
-                    f"Status changed from {ticket.status.value} to {new_status_enum.value} "
-                    f"by {current_user.full_name}."
-                )
                 ticket.status = new_status_enum
                 something_changed = True
 
             if form.remarks.data:
-                last_remark_log = (
-                    ActivityLog.query.filter(
+                last_remark = (
+                    db.session.query(ActivityLog.remark)
+                    .filter(
                         ActivityLog.ticket_id == ticket.id,
-                        ActivityLog.action.like(
-                            f"Remark added by {current_user.full_name}:%"
-                        ),
+                        ActivityLog.event_type == ActivityEvent.REMARK_ADDED,
+                        ActivityLog.user_id == current_user.id,
                     )
-                    .order_by(ActivityLog.timestamp.desc())
-                    .first()
+                    .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+                    .limit(1)
+                    .scalar()
                 )
 
-                if (
-                    not last_remark_log
-                    or last_remark_log.action
-                    != f"Remark added by {current_user.full_name}: {form.remarks.data}"
-                ):
-                    remark_log_action = (
-                        f"Remark added by {current_user.full_name}: {form.remarks.data}"
-                    )
+                if last_remark != form.remarks.data:
                     log_remark = ActivityLog(
-                        action=remark_log_action,
+                        event_type=ActivityEvent.REMARK_ADDED,
+                        remark=form.remarks.data,
                         user_id=current_user.id,
                         ticket_id=ticket.id,
                     )
                     db.session.add(log_remark)
+                    events.ticket_responded(ticket)
                     something_changed = True
 
-            if log_action:
+            if ticket.status != old_status:
                 log_status = ActivityLog(
-                    action=log_action.strip(),
+                    event_type=ActivityEvent.STATUS_CHANGED,
+                    from_status=old_status,
+                    to_status=ticket.status,
                     user_id=current_user.id,
                     ticket_id=ticket.id,
                 )
                 db.session.add(log_status)
+                events.ticket_responded(ticket)
 
             if something_changed:
+                events.ticket_changed(
+                    ticket, old_status, old_assigned_to_id, current_user.id
+                )
                 db.session.commit()
                 flash("Ticket updated successfully.", "success")
             else:
@@ -462,23 +502,18 @@ def view_ticket(id):
     if request.method == "GET" or not form.validate_on_submit():
         form.status.data = ticket.status.name
         form.rt_ticket_number.data = ticket.rt_ticket_number
-        if ticket.assigned_tsr:
-            form.assigned_tsr.data = ticket.assigned_tsr
+        form.assigned_tsr.data = assignee
 
-    logs = ticket.logs.order_by(ActivityLog.timestamp.asc()).all()
-    email_logs = ticket.email_logs.order_by(EmailLog.sent_at.desc()).all()
-    attachments = ticket.attachments.order_by(
-        TicketAttachment.uploaded_at.desc()
-    ).all()  # Get attachments
+    timeline, email_logs, attachments = ticket_detail_lists(ticket.id)
 
     return render_template(
         "view_ticket.html",
-        title=f"Ticket: {ticket.ticket_name}",
+        title=f"Ticket #{ticket.ticket_number}: {ticket.display_name}",
         ticket=ticket,
         form=form,
         email_form=email_form,
         attachment_form=attachment_form,
-        logs=logs,
+        timeline=timeline,
         email_logs=email_logs,
         attachments=attachments,
     )
@@ -500,10 +535,31 @@ def delete_ticket(id):
     # We must remove the attachments BEFORE deleting the ticket
     TicketAttachment.query.filter_by(ticket_id=ticket.id).delete()
     # ----------------------------------
+    TicketStatusHistory.query.filter_by(ticket_id=ticket.id).delete()
+
+    # 4. Update the search index / status rollup
+    events.ticket_deleted(ticket)
 
-    # 4. Finally, delete the Ticket
+    # 5. Finally, delete the Ticket
     db.session.delete(ticket)
     db.session.commit()
 
     flash(f'Ticket "{ticket.concern_title}" has been permanently deleted.', "success")
     return redirect(url_for("tickets.all_tickets"))
+
+
+@tickets.route("/restore/<int:id>", methods=["POST"])
+@login_required
+@admin_required
+def restore_ticket(id):
+    """Moves an archived ticket (with its logs) back into the live tables."""
+    ticket = restore_archived_ticket(id)
+    if ticket is None:
+        abort(404)
+    db.session.commit()
+
+    flash(
+        f'Ticket "{ticket.concern_title}" has been restored from the archive.',
+        "success",
+    )
+    return redirect(url_for("tickets.view_ticket", id=ticket.id))
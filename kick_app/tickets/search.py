@@ -0,0 +1,246 @@
+from sqlalchemy import DDL, event, func, literal, or_, select, text
+from .. import db
+from ..models import Ticket, ArchivedTicket, Client, Region, User, TicketStatus
+from ..sqlutils import bulk_update_by_id
+
+# SQLite fallback index (local runs). rowid == tickets.id.
+# The trigram tokenizer gives the same substring semantics as the old ILIKE search.
+SQLITE_FTS_TABLE = "ticket_search"
+
+# Trigram indexes can't serve patterns shorter than this.
+MIN_INDEXED_TERM_LENGTH = 3
+
+REINDEX_BATCH_SIZE = 1000
+
+
+event.listen(
+    Ticket.__table__,
+    "after_create",
+    DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} "
+        "USING fts5(document, tokenize='trigram')"
+    ).execute_if(dialect="sqlite"),
+)
+
+
+def _is_sqlite():
+    return db.session.get_bind().dialect.name == "sqlite"
+
+
+def build_search_document(
+    ticket_name, concern_title, rt_number, account_name, account_number, region, tsr_name
+):
+    """
+    Flattens the searchable fields of a ticket into one lowercase string.
+    Must stay in sync with the SQL backfill in the search_document migration.
+    """
+    parts = [
+        ticket_name,
+        concern_title,
+        rt_number,
+        account_name,
+        account_number,
+        region,
+        tsr_name,
+    ]
+    return " ".join(p or "" for p in parts).lower()
+
+
+def refresh_search_document(ticket):
+    """
+    Rebuilds the search document for one ticket (call after any change to its
+    name, concern, RT number, client or assigned TSR). Needs ticket.id, so
+    flush new tickets first. Runs inside the caller's transaction.
+    """
+    client = ticket.client or db.session.get(Client, ticket.client_id)
+    tsr = db.session.get(User, ticket.assigned_to_id) if ticket.assigned_to_id else None
+    ticket.search_document = build_search_document(
+        ticket.ticket_name,
+        ticket.concern_title,
+        ticket.rt_ticket_number,
+        client.account_name,
+        client.account_number,
+        client.region.name,
+        tsr.full_name if tsr else None,
+    )
+    if _is_sqlite():
+        _sqlite_write_documents([(ticket.id, ticket.search_document)])
+
+
+def index_new_documents(docs):
+    """
+    Adds (ticket id, search document) pairs of tickets inserted in bulk to
+    the SQLite fallback index. PostgreSQL indexes the column itself.
+    """
+    if docs and _is_sqlite():
+        db.session.execute(
+            text(
+                f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, document) VALUES (:id, :doc)"
+            ),
+            [{"id": ticket_id, "doc": doc} for ticket_id, doc in docs],
+        )
+
+
+def remove_search_document(ticket_id):
+    """Drops a deleted ticket from the SQLite fallback index."""
+    if _is_sqlite():
+        db.session.execute(
+            text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :id"), {"id": ticket_id}
+        )
+
+
+def _sqlite_write_documents(rows):
+    ids = [{"id": ticket_id} for ticket_id, _ in rows]
+    db.session.execute(text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :id"), ids)
+    db.session.execute(
+        text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, document) VALUES (:id, :doc)"),
+        [{"id": ticket_id, "doc": doc} for ticket_id, doc in rows],
+    )
+
+
+def reindex_tickets(*criteria, model=Ticket, batch_size=REINDEX_BATCH_SIZE):
+    """
+    Rebuilds search documents in batches for all tickets matching `criteria`
+    (e.g. Ticket.client_id == 5), or every ticket if none are given.
+    `model` is Ticket or ArchivedTicket (criteria must use the same model;
+    see reindex_all_tickets). Used after a client/TSR rename and by the
+    `flask reindex-tickets` command. Returns the number of tickets
+    reindexed. Does not commit.
+    """
+    rows_query = (
+        select(
+            model.id,
+            model.ticket_name,
+            model.concern_title,
+            model.rt_ticket_number,
+            Client.account_name,
+            Client.account_number,
+            Region.name,
+            User.full_name,
+        )
+        .join(Client, model.client_id == Client.id)
+        .join(Region, Client.region_id == Region.id)
+        .outerjoin(User, model.assigned_to_id == User.id)
+        .where(*criteria)
+        .order_by(model.id)
+        .limit(batch_size)
+    )
+
+    sqlite = _is_sqlite()
+    total = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(rows_query.where(model.id > last_id)).all()
+        if not batch:
+            break
+        docs = [(row[0], build_search_document(*row[1:])) for row in batch]
+        bulk_update_by_id(
+            db.session,
+            model,
+            [{"id": ticket_id, "search_document": doc} for ticket_id, doc in docs],
+        )
+        if sqlite:
+            _sqlite_write_documents(docs)
+        total += len(batch)
+        last_id = batch[-1][0]
+    return total
+
+
+def reindex_all_tickets(criteria=lambda model: ()):
+    """
+    reindex_tickets over live AND archived tickets (archived documents are
+    searched with include_archived, so they must follow renames too).
+    `criteria` builds the filter for a model, e.g.
+    lambda model: (model.client_id == 5,). Returns tickets reindexed.
+    """
+    return sum(
+        reindex_tickets(*criteria(model), model=model)
+        for model in (Ticket, ArchivedTicket)
+    )
+
+
+def _status_keyword(term):
+    """Maps a search term like 'resolved' or 'in progress' to a TicketStatus."""
+    normalized = term.strip().upper().replace(" ", "_").replace("-", "_")
+    for status in TicketStatus:
+        if normalized == status.name:
+            return status
+    return None
+
+
+def search_tickets(query, term, model=Ticket):
+    """
+    Applies the indexed ticket search to a Ticket query and orders the matches
+    by relevance. Callers append their own ORDER BY as the tie-breaker.
+
+    PostgreSQL: full-text (tsvector) OR trigram substring match, both GIN
+    indexed, ranked by ts_rank + similarity.
+    SQLite: FTS5 trigram table, ranked by bm25.
+
+    A term that names a status ('resolved', 'in progress') also matches the
+    tickets in that status; those that only match by status rank last.
+    `model` is Ticket or ArchivedTicket (same columns and indexes).
+    """
+    query, score = search_match(query, term, model)
+    if score is None:
+        return query
+    return query.order_by(score.desc())
+
+
+def search_match(query, term, model=Ticket):
+    """
+    The filtering half of search_tickets: returns (query, score), where score
+    is a higher-is-better relevance expression, or None when the term is
+    matched without ranking (short terms).
+    """
+    status = _status_keyword(term)
+    status_match = model.status == status if status else None
+    term = term.strip().lower()
+
+    def matching(document_match):
+        if status_match is None:
+            return document_match
+        return or_(document_match, status_match)
+
+    if len(term) < MIN_INDEXED_TERM_LENGTH:
+        # Too short for the trigram index; plain substring scan.
+        return query.filter(matching(model.search_document.like(f"%{term}%"))), None
+
+    if _is_sqlite():
+        # Archiving keeps a ticket's FTS row (ids are kept), so one index
+        # serves both tables.
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = (
+            text(
+                f"SELECT rowid AS ticket_id, rank AS search_rank "
+                f"FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :phrase"
+            )
+            .bindparams(phrase=phrase)
+            .columns(ticket_id=db.Integer, search_rank=db.Float)
+            .subquery("search_matches")
+        )
+        if status_match is None:
+            query = query.join(matches, model.id == matches.c.ticket_id)
+            # bm25 rank: lower is better
+            return query, -matches.c.search_rank
+        query = query.outerjoin(matches, model.id == matches.c.ticket_id).filter(
+            matching(matches.c.ticket_id.isnot(None))
+        )
+        # Status-only hits have no bm25 rank; 0 puts them after text matches
+        return query, func.coalesce(-matches.c.search_rank, 0)
+
+    # Expressions must match the GIN indexes in the search_document migration.
+    vector = func.to_tsvector("simple", func.coalesce(model.search_document, ""))
+    ts_query = func.plainto_tsquery("simple", literal(term))
+    # Zero-ish for rows matched by status alone, so they rank last
+    rank = func.ts_rank(vector, ts_query) + func.coalesce(
+        func.similarity(model.search_document, literal(term)), 0
+    )
+    return (
+        query.filter(
+            matching(
+                or_(vector.op("@@")(ts_query), model.search_document.like(f"%{term}%"))
+            )
+        ),
+        rank,
+    )
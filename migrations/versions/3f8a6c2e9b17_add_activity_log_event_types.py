@@ -0,0 +1,245 @@
+"""Add event types and structured fields to activity_logs
+
+Revision ID: 3f8a6c2e9b17
+Revises: 7c5e1b9f2d46
+Create Date: 2026-10-16 19:26:58.417306
+
+Existing entries are parsed from their text in batches of BATCH_SIZE rows.
+Parsed entries drop the text (it is rendered from the fields), except when
+their author no longer exists, where the text keeps the name. Anything that
+doesn't match a known sentence stays a NOTE with its text.
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a6c2e9b17'
+down_revision = '7c5e1b9f2d46'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 5000
+
+EVENT_VALUES = (
+    'NOTE', 'CREATED', 'AUTO_ASSIGNED', 'REASSIGNED', 'UNASSIGNED', 'AUTO_OPENED',
+    'STATUS_CHANGED', 'RT_NUMBER_CHANGED', 'REMARK_ADDED', 'EMAIL_LOGGED',
+    'ATTACHMENT_ADDED',
+)
+STATUS_VALUES = ('NEW', 'OPEN', 'IN_PROGRESS', 'RESOLVED', 'PENDING')
+STATUS_NAMES = {
+    'New': 'NEW',
+    'Open': 'OPEN',
+    'In Progress': 'IN_PROGRESS',
+    'Resolved': 'RESOLVED',
+    'Pending': 'PENDING',
+}
+STATUS_LABELS = {name: label for label, name in STATUS_NAMES.items()}
+
+PAYLOAD_FIELDS = (
+    'from_status', 'to_status', 'from_user', 'to_user', 'from_value', 'to_value',
+    'remark',
+)
+
+# Sentences written by the app before event types (see ActivityLog.describe)
+PATTERNS = [
+    ('CREATED', r"Ticket created by (?P<actor>.+)"),
+    ('AUTO_ASSIGNED', r"Ticket auto-assigned to (?P<to_user>.+)"),
+    ('REASSIGNED',
+     r"Ticket reassigned from (?P<from_user>.+?) to (?P<to_user>.+?) by (?P<actor>.+)\."),
+    ('UNASSIGNED', r"Ticket unassigned from (?P<from_user>.+?) by (?P<actor>.+)\."),
+    ('AUTO_OPENED',
+     r"Ticket status automatically changed to Open by (?P<actor>.+) viewing it\."),
+    ('STATUS_CHANGED',
+     r"Status changed from (?P<from_status>.+?) to (?P<to_status>.+?) by (?P<actor>.+)\."),
+    ('RT_NUMBER_CHANGED',
+     r"RT Ticket Number changed from '(?P<from_value>.*)' to '(?P<to_value>.*)' "
+     r"by (?P<actor>.+)\."),
+    ('RT_NUMBER_CHANGED', r"RT Ticket Number '(?P<to_value>.*)' added by (?P<actor>.+)\."),
+    ('RT_NUMBER_CHANGED',
+     r"RT Ticket Number '(?P<from_value>.*)' removed by (?P<actor>.+)\."),
+    ('REMARK_ADDED', r"Remark added by (?P<actor>.+?): (?P<remark>.*)"),
+    ('EMAIL_LOGGED', r"Email log added by (?P<actor>.+)\."),
+    ('ATTACHMENT_ADDED', r"Uploaded attachment: (?P<to_value>.+)"),
+]
+PATTERNS = [(event, re.compile(pattern, re.DOTALL)) for event, pattern in PATTERNS]
+
+activity_logs = sa.table(
+    'activity_logs',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('action', sa.String),
+    sa.column('event_type', sa.String),
+    *[sa.column(field, sa.String) for field in PAYLOAD_FIELDS],
+)
+users = sa.table('users', sa.column('id', sa.Integer), sa.column('full_name', sa.String))
+
+
+def _parse(action, user_id):
+    values = {'event_type': 'NOTE', 'action': action}
+    values.update(dict.fromkeys(PAYLOAD_FIELDS))
+    for event, pattern in PATTERNS:
+        match = pattern.fullmatch(action or '')
+        if not match:
+            continue
+        fields = match.groupdict()
+        fields.pop('actor', None)
+        for key in ('from_status', 'to_status'):
+            if key in fields:
+                fields[key] = STATUS_NAMES.get(fields[key])
+                if fields[key] is None:
+                    return values  # unknown status label: keep the text
+        if event == 'REASSIGNED' and fields['from_user'] == 'Unassigned':
+            fields['from_user'] = None
+        if event == 'AUTO_OPENED':
+            fields.update(from_status='NEW', to_status='OPEN')
+        values.update(fields, event_type=event)
+        if user_id is not None:
+            values['action'] = None
+        return values
+    return values
+
+
+def _render(row):
+    """Inverse of _parse, for downgrade (mirrors ActivityLog.describe)."""
+    if row.action:
+        return row.action
+    actor = row.full_name or 'Unknown user'
+    event = row.event_type
+    if event == 'CREATED':
+        return f"Ticket created by {actor}"
+    if event == 'AUTO_ASSIGNED':
+        return f"Ticket auto-assigned to {row.to_user}"
+    if event == 'REASSIGNED':
+        return (f"Ticket reassigned from {row.from_user or 'Unassigned'} "
+                f"to {row.to_user} by {actor}.")
+    if event == 'UNASSIGNED':
+        return f"Ticket unassigned from {row.from_user} by {actor}."
+    if event == 'AUTO_OPENED':
+        return f"Ticket status automatically changed to Open by {actor} viewing it."
+    if event == 'STATUS_CHANGED':
+        return (f"Status changed from {STATUS_LABELS[row.from_status]} "
+                f"to {STATUS_LABELS[row.to_status]} by {actor}.")
+    if event == 'RT_NUMBER_CHANGED':
+        if row.from_value and row.to_value:
+            return (f"RT Ticket Number changed from '{row.from_value}' "
+                    f"to '{row.to_value}' by {actor}.")
+        if row.to_value:
+            return f"RT Ticket Number '{row.to_value}' added by {actor}."
+        return f"RT Ticket Number '{row.from_value}' removed by {actor}."
+    if event == 'REMARK_ADDED':
+        return f"Remark added by {actor}: {row.remark}"
+    if event == 'EMAIL_LOGGED':
+        return f"Email log added by {actor}."
+    if event == 'ATTACHMENT_ADDED':
+        return f"Uploaded attachment: {row.to_value}"
+    return ''
+
+
+def _batches(bind, query):
+    """Yields the rows of `query` (ordered by activity_logs.id) BATCH_SIZE at a time."""
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            query.where(activity_logs.c.id > last_id).limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        event_type = postgresql.ENUM(*EVENT_VALUES, name='activityevent')
+        event_type.create(bind, checkfirst=True)
+        event_type = postgresql.ENUM(*EVENT_VALUES, name='activityevent', create_type=False)
+        # Reuse the existing ticketstatus type
+        status_type = postgresql.ENUM(*STATUS_VALUES, name='ticketstatus', create_type=False)
+    else:
+        event_type = sa.Enum(*EVENT_VALUES, name='activityevent')
+        status_type = sa.Enum(*STATUS_VALUES, name='ticketstatus')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('event_type', event_type, nullable=True))
+        batch_op.add_column(sa.Column('from_status', status_type, nullable=True))
+        batch_op.add_column(sa.Column('to_status', status_type, nullable=True))
+        batch_op.add_column(sa.Column('from_user', sa.String(length=150), nullable=True))
+        batch_op.add_column(sa.Column('to_user', sa.String(length=150), nullable=True))
+        batch_op.add_column(sa.Column('from_value', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('to_value', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('remark', sa.Text(), nullable=True))
+        batch_op.alter_column('action', existing_type=sa.String(length=255), nullable=True)
+
+    # ### end Alembic commands ###
+
+    update = (
+        activity_logs.update()
+        .where(activity_logs.c.id == sa.bindparam('log_id'))
+        .values(
+            event_type=sa.bindparam('event_type'),
+            action=sa.bindparam('new_action'),
+            **{field: sa.bindparam(field) for field in PAYLOAD_FIELDS},
+        )
+    )
+    query = sa.select(
+        activity_logs.c.id, activity_logs.c.action, activity_logs.c.user_id
+    ).order_by(activity_logs.c.id)
+    for batch in _batches(bind, query):
+        rows = []
+        for row in batch:
+            values = _parse(row.action, row.user_id)
+            values['new_action'] = values.pop('action')
+            values['log_id'] = row.id
+            rows.append(values)
+        bind.execute(update, rows)
+
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.alter_column('event_type', existing_type=event_type, nullable=False)
+        batch_op.create_index(batch_op.f('ix_activity_logs_event_type'), ['event_type'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    update = (
+        activity_logs.update()
+        .where(activity_logs.c.id == sa.bindparam('log_id'))
+        .values(action=sa.bindparam('new_action'))
+    )
+    query = (
+        sa.select(activity_logs, users.c.full_name)
+        .select_from(
+            activity_logs.outerjoin(users, users.c.id == activity_logs.c.user_id)
+        )
+        .order_by(activity_logs.c.id)
+    )
+    for batch in _batches(bind, query):
+        bind.execute(
+            update,
+            [{'log_id': row.id, 'new_action': _render(row)[:255]} for row in batch],
+        )
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('activity_logs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_activity_logs_event_type'))
+        batch_op.alter_column('action', existing_type=sa.String(length=255), nullable=False)
+        batch_op.drop_column('remark')
+        batch_op.drop_column('to_value')
+        batch_op.drop_column('from_value')
+        batch_op.drop_column('to_user')
+        batch_op.drop_column('from_user')
+        batch_op.drop_column('to_status')
+        batch_op.drop_column('from_status')
+        batch_op.drop_column('event_type')
+
+    # ### end Alembic commands ###
+
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(name='activityevent').drop(bind, checkfirst=True)
@@ -0,0 +1,57 @@
+"""Add ticket_status_rollup table
+
+Revision ID: 9d4c6e1f8a32
+Revises: 5e8b2d41c0a7
+Create Date: 2026-10-16 11:20:07.884310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4c6e1f8a32'
+down_revision = '5e8b2d41c0a7'
+branch_labels = None
+depends_on = None
+
+
+STATUS_VALUES = ('NEW', 'OPEN', 'IN_PROGRESS', 'RESOLVED', 'PENDING')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Reuse the existing ticketstatus type
+        status_type = postgresql.ENUM(*STATUS_VALUES, name='ticketstatus', create_type=False)
+    else:
+        status_type = sa.Enum(*STATUS_VALUES, name='ticketstatus')
+
+    op.create_table('ticket_status_rollup',
+    sa.Column('status', status_type, nullable=False),
+    sa.Column('assigned_to_id', sa.Integer(), nullable=False),
+    sa.Column('region_id', sa.Integer(), nullable=False),
+    sa.Column('created_day', sa.Date(), nullable=False),
+    sa.Column('ticket_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status', 'assigned_to_id', 'region_id', 'created_day')
+    )
+
+    # Seed from the current tickets (same grouping as `flask rebuild-rollup`);
+    # created_day is the PHT (UTC+8) date of created_at
+    if bind.dialect.name == "postgresql":
+        created_day = "date(t.created_at + interval '8 hours')"
+    else:
+        created_day = "date(t.created_at, '+8 hours')"
+    op.execute(
+        "INSERT INTO ticket_status_rollup "
+        "(status, assigned_to_id, region_id, created_day, ticket_count) "
+        "SELECT t.status, coalesce(t.assigned_to_id, 0), c.region_id, "
+        f"{created_day}, count(t.id) "
+        "FROM tickets t JOIN clients c ON c.id = t.client_id "
+        f"GROUP BY t.status, coalesce(t.assigned_to_id, 0), c.region_id, {created_day}"
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_status_rollup')
@@ -0,0 +1,70 @@
+"""Add ticket search_document with full-text / trigram indexes
+
+Revision ID: c3f1a9d27b64
+Revises: ec4017fdd9a4
+Create Date: 2026-10-16 09:12:41.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a9d27b64'
+down_revision = 'ec4017fdd9a4'
+branch_labels = None
+depends_on = None
+
+
+# Must produce the same text as tickets.search.build_search_document
+BACKFILL_SQL = """
+UPDATE tickets SET search_document = lower(
+    coalesce(ticket_name, '') || ' ' ||
+    coalesce(concern_title, '') || ' ' ||
+    coalesce(rt_ticket_number, '') || ' ' ||
+    coalesce((SELECT c.account_name || ' ' || c.account_number || ' ' || r.name
+              FROM clients c JOIN regions r ON r.id = c.region_id
+              WHERE c.id = tickets.client_id), '  ') || ' ' ||
+    coalesce((SELECT u.full_name FROM users u WHERE u.id = tickets.assigned_to_id), '')
+)
+"""
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_document', sa.Text(), nullable=True))
+
+    op.execute(BACKFILL_SQL)
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_tickets_search_document_trgm ON tickets "
+            "USING gin (search_document gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX ix_tickets_search_document_fts ON tickets "
+            "USING gin (to_tsvector('simple', coalesce(search_document, '')))"
+        )
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search "
+            "USING fts5(document, tokenize='trigram')"
+        )
+        op.execute(
+            "INSERT INTO ticket_search (rowid, document) "
+            "SELECT id, search_document FROM tickets"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_tickets_search_document_fts")
+        op.execute("DROP INDEX IF EXISTS ix_tickets_search_document_trgm")
+    elif bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS ticket_search")
+
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('search_document')
@@ -0,0 +1,44 @@
+"""Key ticket_status_rollup by PHT day
+
+Revision ID: d6a3f9c2e4b7
+Revises: c8f2d5b7a3e1
+Create Date: 2026-10-17 16:05:12.284719
+
+created_day was the UTC date of created_at, while the dashboards' ranges and
+resolved counts use PHT (UTC+8) days. Rebuilds the rollup from the live
+tickets with PHT days (same grouping as `flask rebuild-rollup`); downgrade
+rebuilds it with UTC days.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6a3f9c2e4b7'
+down_revision = 'c8f2d5b7a3e1'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_rollup(offset_hours):
+    if op.get_bind().dialect.name == "postgresql":
+        created_day = f"date(t.created_at + interval '{offset_hours} hours')"
+    else:
+        created_day = f"date(t.created_at, '+{offset_hours} hours')"
+    op.execute("DELETE FROM ticket_status_rollup")
+    op.execute(
+        "INSERT INTO ticket_status_rollup "
+        "(status, assigned_to_id, region_id, created_day, ticket_count) "
+        "SELECT t.status, coalesce(t.assigned_to_id, 0), c.region_id, "
+        f"{created_day}, count(t.id) "
+        "FROM tickets t JOIN clients c ON c.id = t.client_id "
+        f"GROUP BY t.status, coalesce(t.assigned_to_id, 0), c.region_id, {created_day}"
+    )
+
+
+def upgrade():
+    _rebuild_rollup(8)
+
+
+def downgrade():
+    _rebuild_rollup(0)
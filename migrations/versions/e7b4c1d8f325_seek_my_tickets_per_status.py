@@ -0,0 +1,53 @@
+"""Index my_tickets per-status seeks; make ticket timestamps non-null
+
+Revision ID: e7b4c1d8f325
+Revises: d6a3f9c2e4b7
+Create Date: 2026-10-17 17:41:03.118254
+
+my_tickets now seeks each status separately on (updated_at, id), served by
+(assigned_to_id, status, updated_at, id), which replaces the
+(assigned_to_id, updated_at) index. created_at / updated_at are keyset keys,
+so NULLs are backfilled (from each other, else the migration time) and the
+columns made non-null, live and archived alike.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b4c1d8f325'
+down_revision = 'd6a3f9c2e4b7'
+branch_labels = None
+depends_on = None
+
+TICKET_TABLES = ('tickets', 'archived_tickets')
+
+
+def upgrade():
+    for table in TICKET_TABLES:
+        op.execute(
+            f"UPDATE {table} SET created_at = coalesce(updated_at, CURRENT_TIMESTAMP) "
+            "WHERE created_at IS NULL"
+        )
+        op.execute(
+            f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_assigned_to_id_updated_at')
+        batch_op.create_index('ix_tickets_assigned_to_id_status_updated_at_id', ['assigned_to_id', 'status', 'updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_assigned_to_id_status_updated_at_id')
+        batch_op.create_index('ix_tickets_assigned_to_id_updated_at', ['assigned_to_id', 'updated_at'], unique=False)
+
+    for table in reversed(TICKET_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=True)
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
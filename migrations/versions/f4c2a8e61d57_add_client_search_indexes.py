@@ -0,0 +1,51 @@
+"""Add client search indexes for the async client picker
+
+Revision ID: f4c2a8e61d57
+Revises: e1a5c7d93b20
+Create Date: 2026-10-16 16:21:07.884213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2a8e61d57'
+down_revision = 'e1a5c7d93b20'
+branch_labels = None
+depends_on = None
+
+
+# Expressions must match admin.search._like
+COLUMNS = ('account_number', 'account_name')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in COLUMNS:
+            op.execute(
+                f"CREATE INDEX ix_clients_{column}_prefix ON clients "
+                f"(lower({column}) text_pattern_ops)"
+            )
+            op.execute(
+                f"CREATE INDEX ix_clients_{column}_trgm ON clients "
+                f"USING gin (lower({column}) gin_trgm_ops)"
+            )
+    elif bind.dialect.name == "sqlite":
+        for column in COLUMNS:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_clients_{column}_nocase "
+                f"ON clients ({column} COLLATE NOCASE)"
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    for column in COLUMNS:
+        if bind.dialect.name == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_clients_{column}_trgm")
+            op.execute(f"DROP INDEX IF EXISTS ix_clients_{column}_prefix")
+        elif bind.dialect.name == "sqlite":
+            op.execute(f"DROP INDEX IF EXISTS ix_clients_{column}_nocase")
@@ -1,3 +1,4 @@
+import click
 from kick_app import create_app, db
 from kick_app.models import User, Region  # This import is already here
 
@@ -16,6 +17,8 @@ def make_shell_context():
 @app.cli.command("seed-db")
 def seed_db_command():
     """Creates the initial data for the app (e.g., regions)."""
+    from kick_app.cache import invalidate_on_commit
+    from kick_app.refdata import REGIONS_SCOPE
 
     # Check if regions already exist
     if Region.query.filter_by(name="Metro").first():
@@ -28,6 +31,7 @@ def seed_db_command():
     r3 = Region(name="South")
 
     db.session.add_all([r1, r2, r3])
+    invalidate_on_commit(REGIONS_SCOPE)
     db.session.commit()
 
     print("Successfully seeded the database with regions.")
@@ -36,5 +40,85 @@ def seed_db_command():
 # --- END OF NEW CODE ---
 
 
+@app.cli.command("reindex-tickets")
+def reindex_tickets_command():
+    """Rebuilds the ticket search documents (and the SQLite FTS index)."""
+    from kick_app.tickets.search import reindex_all_tickets
+
+    count = reindex_all_tickets()
+    db.session.commit()
+    print(f"Reindexed {count} tickets.")
+
+
+@app.cli.command("rebuild-rollup")
+def rebuild_rollup_command():
+    """Rebuilds the ticket status rollup table from the tickets table."""
+    from kick_app.tickets.events import rebuild_rollup
+    from kick_app.cache import (
+        invalidate_on_commit,
+        ADMIN_DASHBOARD_SCOPE,
+        tsr_dashboard_scope,
+    )
+
+    rows = rebuild_rollup()
+    user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+    invalidate_on_commit(
+        ADMIN_DASHBOARD_SCOPE, *[tsr_dashboard_scope(uid) for uid in user_ids]
+    )
+    db.session.commit()
+    print(f"Rollup rebuilt: {rows} rows.")
+
+
+@app.cli.command("rebuild-workloads")
+def rebuild_workloads_command():
+    """Recounts each TSR's open tickets (the auto-assignment workloads)."""
+    from kick_app.tickets.assignment import rebuild_workloads
+
+    rows = rebuild_workloads()
+    db.session.commit()
+    print(f"Workloads rebuilt for {rows} TSRs.")
+
+
+@app.cli.command("backfill-ticket-timestamps")
+@click.option("--batch-size", default=1000, show_default=True)
+def backfill_ticket_timestamps_command(batch_size):
+    """Fills opened_at / first_response_at / resolved_at from activity logs."""
+    from kick_app.tickets.events import backfill_lifecycle
+
+    count = backfill_lifecycle(batch_size=batch_size)
+    print(f"Backfilled lifecycle timestamps on {count} tickets.")
+
+
+@app.cli.command("archive-tickets")
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=180,
+    show_default=True,
+    help="Archive tickets resolved (and untouched) for longer than this.",
+)
+@click.option("--batch-size", default=500, show_default=True)
+def archive_tickets_command(older_than_days, batch_size):
+    """Moves old resolved tickets and their logs into the archive tables."""
+    from kick_app.tickets.archive import archive_resolved_tickets
+
+    count = archive_resolved_tickets(older_than_days, batch_size=batch_size)
+    print(f"Archived {count} tickets resolved over {older_than_days} days ago.")
+
+
+@app.cli.command("run-jobs")
+@click.option("--workers", type=int, default=None, help="Worker processes.")
+@click.option("--poll-interval", type=float, default=None, help="Idle sleep (s).")
+@click.option("--once", is_flag=True, help="Exit when the queue is empty.")
+def run_jobs_command(workers, poll_interval, once):
+    """Runs the background job workers (imports and report exports)."""
+    from kick_app.jobs.runner import run_worker_pool
+
+    workers = workers or app.config["JOB_WORKERS"]
+    poll_interval = poll_interval or app.config["JOB_POLL_INTERVAL"]
+    print(f"Starting {workers} job worker(s).")
+    run_worker_pool(workers, poll_interval, once=once)
+
+
 if __name__ == "__main__":
     app.run(debug=True)
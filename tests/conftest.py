@@ -0,0 +1,159 @@
+"""
+Shared fixtures: a fresh file-backed SQLite app per test, seed data, a
+logged-in test client and a SQL statement counter.
+
+Requests run in their own app context (no context is kept pushed), so each
+one gets a fresh session, as in production.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from kick_app import create_app, db
+from kick_app.config import Config
+from kick_app.models import Client, Region, Ticket, TicketStatus, User, UserRole
+
+PASSWORD = "pw"
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SHARED_CACHE_PATH = str(tmp_path / "cache.sqlite3")
+        JOB_RESULTS_DIR = str(tmp_path / "job_files")
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+class SeedData:
+    """Ids of the seeded rows, plus a helper to add tickets."""
+
+    def __init__(self, app):
+        self.app = app
+        with app.app_context():
+            regions = [Region(name=name) for name in ("Metro", "North", "South")]
+            db.session.add_all(regions)
+            self.admin = self._user("A1", "Admin One", UserRole.ADMIN)
+            self.tsrs = [
+                self._user(f"T{i}", f"Tsr {i}", UserRole.TSR) for i in range(3)
+            ]
+            db.session.flush()
+            clients = [
+                Client(
+                    account_number=f"ACC{i}",
+                    account_name=f"Client {i}",
+                    region=regions[i % 3],
+                    plan_rate=1000,
+                )
+                for i in range(5)
+            ]
+            db.session.add_all(clients)
+            db.session.commit()
+            self.admin_id = self.admin.id
+            self.tsr_ids = [tsr.id for tsr in self.tsrs]
+            self.client_ids = [client.id for client in clients]
+            self.region_ids = [region.id for region in regions]
+        self._next_number = 1
+
+    @staticmethod
+    def _user(employee_id, full_name, role):
+        user = User(
+            employee_id=employee_id,
+            full_name=full_name,
+            email=f"{employee_id.lower()}@example.com",
+            role=role,
+            is_active=True,
+        )
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        return user
+
+    def add_tickets(self, count, assigned_to_id=None, status=TicketStatus.OPEN):
+        """Adds `count` tickets (round-robin over the clients); returns their ids."""
+        now = datetime.utcnow()
+        with self.app.app_context():
+            tickets = []
+            for i in range(count):
+                number = self._next_number
+                self._next_number += 1
+                client_id = self.client_ids[i % len(self.client_ids)]
+                tickets.append(
+                    Ticket(
+                        ticket_number=number,
+                        display_name=f"Metro_Client_{client_id}_Concern",
+                        ticket_name=f"Metro_Client_{client_id}_Concern_{number}",
+                        concern_title=f"Concern {number}",
+                        concern_details="Details",
+                        client_id=client_id,
+                        assigned_to_id=assigned_to_id,
+                        created_by_id=self.admin_id,
+                        status=status,
+                        created_at=now - timedelta(minutes=number),
+                    )
+                )
+            db.session.add_all(tickets)
+            db.session.commit()
+            return [ticket.id for ticket in tickets]
+
+
+@pytest.fixture
+def seed(app):
+    return SeedData(app)
+
+
+def login(client, employee_id):
+    response = client.post(
+        "/auth/login", data={"employee_id": employee_id, "password": PASSWORD}
+    )
+    assert response.status_code == 302, "login failed"
+    return client
+
+
+@pytest.fixture
+def admin_client(app, seed):
+    return login(app.test_client(), "A1")
+
+
+@pytest.fixture
+def tsr_client(app, seed):
+    return login(app.test_client(), "T0")
+
+
+class QueryCounter:
+    """Counts the SQL statements run on `engine` inside a `with` block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def count_queries(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryCounter(engine)
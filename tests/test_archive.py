@@ -0,0 +1,225 @@
+"""
+Archiving moves a resolved ticket and all its rows out of the live tables
+(leaving the rollup and workloads as a recount would have them), the
+include_archived search and report union the archive back in, and
+restoring puts every row back as it was.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from kick_app import db
+from kick_app.api.exports import ticket_report_rows
+from kick_app.models import (
+    ActivityEvent,
+    ActivityLog,
+    ArchivedTicket,
+    EmailLog,
+    Ticket,
+    TicketAttachment,
+    TicketStatus,
+    TicketStatusHistory,
+    TicketStatusRollup,
+    TsrWorkload,
+)
+from kick_app.tickets import events
+from kick_app.tickets.archive import (
+    ARCHIVE_TABLES,
+    archive_resolved_tickets,
+    restore_archived_ticket,
+    search_tickets_with_archive,
+)
+from kick_app.tickets.assignment import rebuild_workloads
+from kick_app.tickets.search import reindex_all_tickets
+
+LONG_AGO = datetime.utcnow() - timedelta(days=400)
+
+
+@pytest.fixture
+def tickets(app, seed):
+    """
+    (live ids, archivable id): three open tickets, the middle one resolved
+    long ago, each with a row in every child table.
+    """
+    tsr_id = seed.tsr_ids[0]
+    ids = seed.add_tickets(3, assigned_to_id=tsr_id)
+    old_id = ids[1]
+    with app.app_context():
+        db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == old_id)
+            .values(
+                status=TicketStatus.RESOLVED,
+                resolved_at=LONG_AGO,
+                updated_at=LONG_AGO,
+            )
+        )
+        for ticket_id in ids:
+            db.session.add_all(
+                [
+                    ActivityLog(
+                        ticket_id=ticket_id,
+                        user_id=tsr_id,
+                        event_type=ActivityEvent.NOTE,
+                        action="Called the client",
+                    ),
+                    EmailLog(
+                        ticket_id=ticket_id, user_id=tsr_id, email_content="Hello"
+                    ),
+                    TicketAttachment(
+                        ticket_id=ticket_id,
+                        uploader_id=tsr_id,
+                        filename=f"{ticket_id}.png",
+                        filepath=f"uploads/tickets/{ticket_id}.png",
+                    ),
+                    TicketStatusHistory(
+                        ticket_id=ticket_id, to_status=TicketStatus.OPEN
+                    ),
+                ]
+            )
+        reindex_all_tickets()
+        events.rebuild_rollup()
+        rebuild_workloads()
+        db.session.commit()
+    return [ids[0], ids[2]], old_id
+
+
+def _ticket_rows(ticket_id, archived=False):
+    """Every row of the ticket, per table, as column dicts."""
+    rows = {}
+    for live, archive in ARCHIVE_TABLES:
+        model = archive if archived else live
+        table = model.__table__
+        key = table.c.id if live is Ticket else table.c.ticket_id
+        names = [column.name for column in live.__table__.columns]
+        rows[live.__tablename__] = [
+            dict(row._mapping)
+            for row in db.session.execute(
+                select(*[table.c[name] for name in names])
+                .where(key == ticket_id)
+                .order_by(table.c.id)
+            )
+        ]
+    return rows
+
+
+def _counters():
+    """Tickets per status in the rollup (non-zero only), open tickets per TSR."""
+    totals = db.session.query(
+        TicketStatusRollup.status, func.sum(TicketStatusRollup.ticket_count)
+    ).group_by(TicketStatusRollup.status)
+    rollup = {status: count for status, count in totals if count}
+    workloads = dict(db.session.query(TsrWorkload.user_id, TsrWorkload.open_tickets))
+    return rollup, workloads
+
+
+def _recounted():
+    """The counters as rebuilt from the live tables."""
+    events.rebuild_rollup()
+    rebuild_workloads()
+    counters = _counters()
+    db.session.rollback()
+    return counters
+
+
+def test_archive_moves_every_row_and_restore_puts_them_back(app, tickets):
+    live_ids, old_id = tickets
+    with app.app_context():
+        before = _ticket_rows(old_id)
+        assert all(before.values())
+        rollup_before, workloads_before = _counters()
+
+        assert archive_resolved_tickets(older_than_days=180) == 1
+
+        assert not any(_ticket_rows(old_id).values())
+        assert _ticket_rows(old_id, archived=True) == before
+        for ticket_id in live_ids:
+            assert all(_ticket_rows(ticket_id).values())
+
+        rollup, workloads = _counters()
+        assert rollup_before[TicketStatus.RESOLVED] == 1
+        assert TicketStatus.RESOLVED not in rollup
+        assert rollup[TicketStatus.OPEN] == rollup_before[TicketStatus.OPEN] == 2
+        # Resolved tickets are not part of a workload
+        assert workloads == workloads_before
+        assert (rollup, workloads) == _recounted()
+
+        ticket = restore_archived_ticket(old_id)
+        db.session.commit()
+        assert ticket.id == old_id and ticket.updated_at > LONG_AGO
+
+        assert not any(_ticket_rows(old_id, archived=True).values())
+        after = _ticket_rows(old_id)
+        # Only updated_at is bumped, so the ticket isn't re-archived at once
+        after["tickets"][0]["updated_at"] = LONG_AGO
+        assert after == before
+        assert _counters() == (rollup_before, workloads_before)
+        assert _counters() == _recounted()
+
+        assert restore_archived_ticket(old_id) is None
+
+
+def test_recently_touched_resolved_ticket_stays_live(app, tickets):
+    _, old_id = tickets
+    with app.app_context():
+        db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == old_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        assert archive_resolved_tickets(older_than_days=180) == 0
+        assert db.session.get(Ticket, old_id) is not None
+
+
+@pytest.mark.parametrize("term", ["concern", "co"])
+def test_search_with_archive_unions_live_and_archived(app, tickets, term):
+    live_ids, old_id = tickets
+    with app.app_context():
+        archive_resolved_tickets(older_than_days=180)
+        created = dict(
+            db.session.query(Ticket.id, Ticket.created_at).union_all(
+                db.session.query(ArchivedTicket.id, ArchivedTicket.created_at)
+            )
+        )
+
+        page = search_tickets_with_archive(term)
+        assert page.total == 3
+        assert sorted(t.id for t in page.items) == sorted([*live_ids, old_id])
+        assert {t.id: t.is_archived for t in page.items} == {
+            live_ids[0]: False,
+            old_id: True,
+            live_ids[1]: False,
+        }
+        if len(term) < 3:
+            # Unranked (short) terms: newest first across both tables
+            newest_first = sorted(created, key=created.get, reverse=True)
+            assert [t.id for t in page.items] == newest_first
+
+        resolved = search_tickets_with_archive(term, status=TicketStatus.RESOLVED)
+        assert [(t.id, t.is_archived) for t in resolved.items] == [(old_id, True)]
+
+        second = search_tickets_with_archive(term, page=2, per_page=2)
+        assert second.total == 3 and len(second.items) == 1
+
+
+def test_report_includes_archived_in_created_order(app, tickets):
+    live_ids, old_id = tickets
+    with app.app_context():
+        archive_resolved_tickets(older_than_days=180)
+        start, end = datetime.utcnow() - timedelta(days=1), datetime.utcnow()
+
+        live_only = [row[0] for row in ticket_report_rows(start, end)]
+        assert sorted(live_only) == sorted(live_ids)
+
+        rows = list(ticket_report_rows(start, end, include_archived=True))
+        created = dict(
+            db.session.query(Ticket.id, Ticket.created_at).union_all(
+                db.session.query(ArchivedTicket.id, ArchivedTicket.created_at)
+            )
+        )
+        assert [row[0] for row in rows] == sorted(created, key=created.get)
+        archived_row = next(row for row in rows if row[0] == old_id)
+        assert archived_row[3] == TicketStatus.RESOLVED.value
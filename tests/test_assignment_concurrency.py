@@ -0,0 +1,134 @@
+"""
+Auto-assignment under concurrent ticket creation (claim_next_tsr /
+claim_tsrs): parallel single and bulk creates against one file-backed
+database must still spread tickets evenly, and the tsr_workloads counters
+must match a recount.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from kick_app import db
+from kick_app.models import Ticket, TicketStatus, TsrWorkload
+from kick_app.tickets import events
+from kick_app.tickets.assignment import (
+    claim_next_tsr,
+    ensure_workloads,
+    rebuild_workloads,
+)
+from kick_app.tickets.numbering import allocate_ticket_numbers
+
+from conftest import login
+
+THREADS = 6
+SINGLE_CREATES_PER_THREAD = 8
+BULK_CREATES = 2  # threads that also file one bulk create each
+
+
+def _create_tickets(app, worker, accounts):
+    client = login(app.test_client(), "A1")
+    statuses = []
+    for i in range(SINGLE_CREATES_PER_THREAD):
+        response = client.post(
+            "/tickets/new",
+            data={
+                "client": accounts[i % len(accounts)][0],
+                "concern_title": f"Outage {worker}-{i}",
+                "concern_details": "No internet",
+            },
+        )
+        statuses.append(response.status_code)
+    if worker < BULK_CREATES:
+        response = client.post(
+            "/tickets/bulk",
+            data={
+                "account_numbers": "\n".join(number for _, number in accounts),
+                "concern_title": f"Mass outage {worker}",
+                "concern_details": "Area down",
+            },
+        )
+        statuses.append(response.status_code)
+    return statuses
+
+
+def _assert_even_and_counted(app, tsr_ids, expected):
+    with app.app_context():
+        per_tsr = dict(
+            db.session.query(Ticket.assigned_to_id, func.count(Ticket.id))
+            .group_by(Ticket.assigned_to_id)
+            .all()
+        )
+        assert sum(per_tsr.values()) == expected
+        assert set(per_tsr) == set(tsr_ids)
+        assert max(per_tsr.values()) - min(per_tsr.values()) <= 1
+
+        counters = dict(db.session.query(TsrWorkload.user_id, TsrWorkload.open_tickets))
+        rebuild_workloads()
+        recounted = dict(
+            db.session.query(TsrWorkload.user_id, TsrWorkload.open_tickets)
+        )
+        db.session.rollback()
+        assert counters == recounted == per_tsr
+
+
+def test_parallel_creates_keep_distribution_even(app, seed):
+    with app.app_context():
+        ensure_workloads(*seed.tsr_ids)
+        db.session.commit()
+        accounts = [
+            (client_id, f"ACC{i}") for i, client_id in enumerate(seed.client_ids)
+        ]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(
+            pool.map(lambda worker: _create_tickets(app, worker, accounts), range(THREADS))
+        )
+
+    # Every create redirected back to the list (no lock errors, no 500s)
+    assert all(status == 302 for statuses in results for status in statuses)
+
+    expected = THREADS * SINGLE_CREATES_PER_THREAD + BULK_CREATES * len(accounts)
+    _assert_even_and_counted(app, seed.tsr_ids, expected)
+
+
+def _claim_and_create(app, client_id, admin_id, count):
+    # The claim is the transaction's first statement, so two workers can
+    # only agree on a TSR if claiming is not atomic.
+    with app.app_context():
+        for _ in range(count):
+            tsr_id, _ = claim_next_tsr()
+            (number,) = allocate_ticket_numbers(1)
+            ticket = Ticket(
+                ticket_number=number,
+                display_name="Metro_Client_Concern",
+                ticket_name=f"Metro_Client_Concern_{number}",
+                concern_title="Concern",
+                concern_details="Details",
+                client_id=client_id,
+                created_by_id=admin_id,
+                assigned_to_id=tsr_id,
+                status=TicketStatus.NEW,
+            )
+            db.session.add(ticket)
+            db.session.flush()
+            events.ticket_created(ticket)
+            db.session.commit()
+
+
+def test_parallel_claims_keep_distribution_even(app, seed):
+    with app.app_context():
+        ensure_workloads(*seed.tsr_ids)
+        db.session.commit()
+
+    per_worker = SINGLE_CREATES_PER_THREAD
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        for future in [
+            pool.submit(
+                _claim_and_create, app, seed.client_ids[0], seed.admin_id, per_worker
+            )
+            for _ in range(THREADS)
+        ]:
+            future.result()
+
+    _assert_even_and_counted(app, seed.tsr_ids, THREADS * per_worker)
@@ -0,0 +1,46 @@
+"""
+Bulk create reports its per-TSR breakdown by TSR id, so TSRs that share a
+full name are still counted separately.
+"""
+
+from kick_app import db
+from kick_app.models import Client, User
+from kick_app.tickets.assignment import ensure_workloads
+from kick_app.tickets.bulk import create_tickets_bulk, load_bulk_clients
+
+
+def test_breakdown_keeps_same_named_tsrs_apart(app, seed):
+    with app.app_context():
+        for user in db.session.query(User).filter(User.id.in_(seed.tsr_ids)):
+            user.full_name = "Juan Dela Cruz"
+        ensure_workloads(*seed.tsr_ids)
+        db.session.commit()
+
+        numbers = [number for (number,) in db.session.query(Client.account_number)]
+        clients, missing = load_bulk_clients(account_numbers=numbers)
+        assert not missing
+        admin = db.session.get(User, seed.admin_id)
+        assigned = create_tickets_bulk(clients, "Outage", "Area down", admin)
+        db.session.commit()
+
+    assert set(assigned) == set(seed.tsr_ids)
+    assert sorted(assigned.values()) == [1, 2, 2]
+
+
+def test_bulk_flash_names_each_tsr(app, seed, admin_client):
+    with app.app_context():
+        ensure_workloads(*seed.tsr_ids)
+        db.session.commit()
+
+    response = admin_client.post(
+        "/tickets/bulk",
+        data={
+            "account_numbers": "ACC0\nACC1\nACC2",
+            "concern_title": "Outage",
+            "concern_details": "Area down",
+        },
+    )
+    assert response.status_code == 302
+    with admin_client.session_transaction() as session:
+        messages = [message for _, message in session["_flashes"]]
+    assert "3 tickets created (Tsr 0: 1, Tsr 1: 1, Tsr 2: 1)." in messages
@@ -0,0 +1,59 @@
+"""
+ClientImporter counts each account once, however often its number repeats
+in a file: the last row for an account wins, within a batch and across
+batches.
+"""
+
+import pytest
+
+from kick_app import db
+from kick_app.admin.importer import ClientImporter
+from kick_app.models import Client
+
+
+def _row(account_number, account_name, region_name="Metro", plan_rate="1000"):
+    return {
+        "account_number": account_number,
+        "account_name": account_name,
+        "region_name": region_name,
+        "status": "Active",
+        "plan_rate": plan_rate,
+    }
+
+
+@pytest.mark.parametrize("batch_size", [1000, 2])
+def test_repeated_accounts_are_counted_once(app, seed, batch_size):
+    rows = [
+        _row("ACC0", "Renamed once"),
+        _row("ACC0", "Renamed twice"),
+        _row("ACC1", "Client 1", "North"),  # unchanged
+        _row("ACC1", "Client 1", "North"),
+        _row("NEW1", "New client"),
+        _row("NEW1", "New client, fixed"),
+        _row("ACC0", "Renamed last"),
+    ]
+    with app.app_context():
+        importer = ClientImporter(batch_size=batch_size)
+        importer.run(list(enumerate(rows, start=2)))
+        db.session.commit()
+
+        assert (importer.added, importer.updated, importer.unchanged) == (1, 1, 1)
+        names = dict(db.session.query(Client.account_number, Client.account_name))
+        assert names["ACC0"] == "Renamed last"
+        assert names["NEW1"] == "New client, fixed"
+
+
+def test_dry_run_diffs_the_last_row_of_a_repeated_account(app, seed):
+    diffs = []
+    rows = [_row("ACC0", "First"), _row("ACC0", "Second")]
+    with app.app_context():
+        importer = ClientImporter()
+        importer.run(
+            list(enumerate(rows, start=2)),
+            on_diff=lambda number, change, row, fields: diffs.append(
+                (number, change, fields)
+            ),
+            dry_run=True,
+        )
+    assert diffs == [(3, "changed", {"account_name": ("Client 0", "Second")})]
+    assert importer.updated == 1
@@ -0,0 +1,96 @@
+"""
+The "resolved in range" cards count the same PHT (UTC+8) calendar days the
+resolved line chart buckets by, so a ticket resolved just after PHT midnight
+lands on the same date in both. The "created in range" card (from the status
+rollup) uses those days too.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from kick_app import db
+from kick_app.api.stats import (
+    admin_dashboard_stats,
+    resolved_series,
+    tsr_dashboard_stats,
+)
+from kick_app.models import Ticket, TicketStatus, TicketStatusRollup
+from kick_app.tickets import events
+
+
+def _day(value):
+    return (
+        datetime.combine(value, datetime.min.time()),
+        datetime.combine(value, datetime.max.time()),
+    )
+
+
+@pytest.mark.parametrize(
+    "resolved_at, pht_day",
+    [
+        (datetime(2026, 10, 16, 16, 30), date(2026, 10, 17)),  # 00:30 PHT
+        (datetime(2026, 10, 16, 15, 30), date(2026, 10, 16)),  # 23:30 PHT
+    ],
+)
+def test_resolved_cards_match_series_days(app, seed, resolved_at, pht_day):
+    tsr_id = seed.tsr_ids[0]
+    (ticket_id,) = seed.add_tickets(
+        1, assigned_to_id=tsr_id, status=TicketStatus.RESOLVED
+    )
+    with app.app_context():
+        db.session.get(Ticket, ticket_id).resolved_at = resolved_at
+        db.session.commit()
+
+        for day, expected in ((pht_day, 1), (date(2026, 10, 15), 0)):
+            start_date, end_date = _day(day)
+            admin_stats, _, _ = admin_dashboard_stats(start_date, end_date)
+            tsr_stats = tsr_dashboard_stats(tsr_id, start_date, end_date)
+            series = resolved_series(tsr_id, start_date, end_date)
+            assert admin_stats["total_resolved"] == expected
+            assert tsr_stats["total_resolved"] == expected
+            assert series["data"] == [expected]
+
+
+def _rollup_rows():
+    return sorted(
+        db.session.query(
+            TicketStatusRollup.status,
+            TicketStatusRollup.assigned_to_id,
+            TicketStatusRollup.region_id,
+            TicketStatusRollup.created_day,
+            TicketStatusRollup.ticket_count,
+        ).filter(TicketStatusRollup.ticket_count != 0)
+    )
+
+
+def test_created_and_resolved_cards_share_pht_days(app, seed):
+    after_pht_midnight = datetime(2026, 10, 16, 16, 30)  # 00:30 PHT on the 17th
+    with app.app_context():
+        ticket = Ticket(
+            ticket_number=9001,
+            display_name="Metro_Client_Concern",
+            ticket_name="Metro_Client_Concern_9001",
+            concern_title="Concern",
+            concern_details="Details",
+            client_id=seed.client_ids[0],
+            created_by_id=seed.admin_id,
+            status=TicketStatus.RESOLVED,
+            created_at=after_pht_midnight,
+            resolved_at=after_pht_midnight,
+        )
+        db.session.add(ticket)
+        db.session.flush()
+        events.ticket_created(ticket)
+        db.session.commit()
+
+        for day, expected in ((date(2026, 10, 17), 1), (date(2026, 10, 16), 0)):
+            admin_stats, _, _ = admin_dashboard_stats(*_day(day))
+            assert admin_stats["total_created"] == expected
+            assert admin_stats["total_resolved"] == expected
+
+        # `flask rebuild-rollup` keys the days the same way
+        incremental = _rollup_rows()
+        events.rebuild_rollup()
+        db.session.commit()
+        assert _rollup_rows() == incremental
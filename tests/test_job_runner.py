@@ -0,0 +1,107 @@
+"""
+Job housekeeping: only jobs whose heartbeat went stale are failed (never
+those of the calling pool's workers), and finished jobs lose their result
+files once they are older than the retention period.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from kick_app import db
+from kick_app.jobs.runner import (
+    enqueue_job,
+    expire_job_files,
+    fail_abandoned_jobs,
+    job_files_dir,
+    run_job,
+)
+from kick_app.models import Job, JobStatus
+
+STALE_AFTER = 600
+
+
+def _job(seed, status, worker=None, heartbeat_age=None, **fields):
+    job = enqueue_job("export", {}, seed.admin_id)
+    job.status = status
+    job.worker = worker
+    if heartbeat_age is not None:
+        job.started_at = datetime.utcnow() - timedelta(hours=1)
+        job.heartbeat_at = datetime.utcnow() - timedelta(seconds=heartbeat_age)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    db.session.flush()
+    return job
+
+
+def _touch(path):
+    with open(path, "w") as f:
+        f.write("x")
+    return path
+
+
+def test_only_stale_jobs_of_other_pools_are_failed(app, seed):
+    with app.app_context():
+        stale = _job(seed, JobStatus.RUNNING, "host:aaaa1111:10", STALE_AFTER + 60)
+        alive = _job(seed, JobStatus.RUNNING, "host:bbbb2222:11", 5)
+        own = _job(seed, JobStatus.RUNNING, "host:cccc3333:12", STALE_AFTER + 60)
+        queued = _job(seed, JobStatus.QUEUED)
+        upload = _touch(os.path.join(job_files_dir(), "upload_abc_clients.csv"))
+        partial = _touch(os.path.join(job_files_dir(), f"job_{stale.id}_out.csv"))
+        stale.params = json.dumps({"path": upload})
+        db.session.commit()
+        ids = stale.id, alive.id, own.id, queued.id
+
+        assert fail_abandoned_jobs(STALE_AFTER, pool_id="cccc3333") == 1
+
+        statuses = [db.session.get(Job, job_id).status for job_id in ids]
+        assert statuses == [
+            JobStatus.FAILED,
+            JobStatus.RUNNING,
+            JobStatus.RUNNING,
+            JobStatus.QUEUED,
+        ]
+        assert not os.path.exists(upload) and not os.path.exists(partial)
+
+
+def test_finished_job_files_expire(app, seed):
+    with app.app_context():
+        files = job_files_dir()
+        old_path = _touch(os.path.join(files, "job_old.csv"))
+        new_path = _touch(os.path.join(files, "job_new.csv"))
+        now = datetime.utcnow()
+        old = _job(
+            seed,
+            JobStatus.SUCCEEDED,
+            finished_at=now - timedelta(days=8),
+            result_path=old_path,
+        )
+        new = _job(
+            seed,
+            JobStatus.SUCCEEDED,
+            finished_at=now - timedelta(hours=1),
+            result_path=new_path,
+        )
+        db.session.commit()
+
+        assert expire_job_files(7 * 24 * 3600) == 1
+        assert not os.path.exists(old_path) and os.path.exists(new_path)
+        assert db.session.get(Job, old.id).result_path is None
+        assert db.session.get(Job, new.id).result_path == new_path
+        assert expire_job_files(7 * 24 * 3600) == 0
+
+
+def test_failed_job_leaves_no_partial_result(app, seed, monkeypatch):
+    from kick_app.jobs import runner
+
+    def broken(ctx, params):
+        _touch(ctx.result_file("report.csv"))
+        raise ValueError("boom")
+
+    monkeypatch.setitem(runner.JOB_HANDLERS, "broken", broken)
+    with app.app_context():
+        job = _job(seed, JobStatus.RUNNING, kind="broken")
+        db.session.commit()
+        job = run_job(job.id)
+        assert job.status == JobStatus.FAILED
+        assert os.listdir(job_files_dir()) == []
@@ -0,0 +1,146 @@
+"""
+A cursor that decodes but does not fit the page's sort keys (wrong value
+count, a string where an id goes, a bad {"dt": ...}) is ignored: the list
+falls back to its first page instead of failing the request.
+
+my_tickets pages with one seek per status; walking its cursors forward and
+back must visit every ticket once, in work-queue order.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from kick_app import db
+from kick_app.pagination import (
+    KeysetPagination,
+    PartitionedKeysetPagination,
+    encode_cursor,
+)
+from kick_app.models import Ticket, TicketStatus
+from kick_app.tickets.queries import (
+    ALL_TICKETS_KEYS,
+    MY_TICKETS_KEYS,
+    MY_TICKETS_PARTITIONS,
+    STATUS_RANK,
+    WORK_QUEUE_STATUSES,
+)
+
+
+def _token(payload):
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+BAD_CURSORS = [
+    _token({"k": [{"dt": "2024-01-01T00:00:00"}, "abc"], "d": "next"}),
+    _token({"k": ["yesterday", 5], "d": "next"}),
+    _token({"k": [{"dt": "not a date"}, 5], "d": "next"}),
+    _token({"k": [{"dt": 5}, 5], "d": "next"}),
+    _token({"k": [{"x": 1}, 5], "d": "next"}),
+    _token({"k": [{"dt": "2024-01-01T00:00:00"}, True], "d": "next"}),
+    _token({"k": [{"dt": "2024-01-01T00:00:00"}], "d": "next"}),
+    _token({"k": [{"dt": "2024-01-01T00:00:00"}, 5, 6], "d": "prev"}),
+    _token({"k": "ab", "d": "next"}),
+    _token(["not", "a", "dict"]),
+    "%%%garbage",
+]
+
+
+@pytest.mark.parametrize("cursor", BAD_CURSORS)
+def test_mistyped_cursor_returns_first_page(app, seed, cursor):
+    seed.add_tickets(20)
+    with app.app_context():
+        page = KeysetPagination(
+            Ticket.query, ALL_TICKETS_KEYS, cursor=cursor, per_page=15
+        )
+        first = KeysetPagination(Ticket.query, ALL_TICKETS_KEYS, per_page=15)
+        assert [t.id for t in page.items] == [t.id for t in first.items]
+        assert not page.has_prev and page.has_next
+
+
+def test_valid_cursor_still_seeks(app, seed):
+    seed.add_tickets(20)
+    with app.app_context():
+        first = KeysetPagination(Ticket.query, ALL_TICKETS_KEYS, per_page=15)
+        second = KeysetPagination(
+            Ticket.query, ALL_TICKETS_KEYS, cursor=first.next_cursor, per_page=15
+        )
+        assert second.has_prev and len(second.items) == 5
+        assert not {t.id for t in first.items} & {t.id for t in second.items}
+
+
+@pytest.mark.parametrize(
+    "client_fixture, url",
+    [
+        ("admin_client", "/tickets/all"),
+        ("tsr_client", "/tickets/my"),
+        ("admin_client", "/api/tickets/{ticket_id}/timeline"),
+    ],
+)
+def test_list_routes_ignore_mistyped_cursor(request, seed, client_fixture, url):
+    client = request.getfixturevalue(client_fixture)
+    (ticket_id,) = seed.add_tickets(1, assigned_to_id=seed.tsr_ids[0])
+    url = url.format(ticket_id=ticket_id)
+    for cursor in BAD_CURSORS:
+        response = client.get(url, query_string={"cursor": cursor})
+        assert response.status_code == 200
+
+
+def _my_tickets_page(tsr_id, cursor=None):
+    query = Ticket.query.filter(Ticket.assigned_to_id == tsr_id)
+    return PartitionedKeysetPagination(
+        query, MY_TICKETS_PARTITIONS, MY_TICKETS_KEYS, cursor=cursor, per_page=4
+    )
+
+
+def test_my_tickets_cursor_walks_statuses_in_order(app, seed):
+    tsr_id = seed.tsr_ids[0]
+    # Pages straddle statuses; Pending has none
+    for status, count in [
+        (TicketStatus.RESOLVED, 3),
+        (TicketStatus.OPEN, 5),
+        (TicketStatus.NEW, 2),
+        (TicketStatus.IN_PROGRESS, 1),
+    ]:
+        seed.add_tickets(count, assigned_to_id=tsr_id, status=status)
+    seed.add_tickets(2, assigned_to_id=seed.tsr_ids[1])
+    with app.app_context():
+        # Tie on updated_at within a status: the id breaks it
+        Ticket.query.filter(Ticket.status == TicketStatus.OPEN).update(
+            {Ticket.updated_at: datetime(2026, 10, 17, 9, 0)}
+        )
+        db.session.commit()
+        expected = [
+            ticket.id
+            for ticket in Ticket.query.filter(Ticket.assigned_to_id == tsr_id).order_by(
+                STATUS_RANK, Ticket.updated_at.desc(), Ticket.id.desc()
+            )
+        ]
+
+        pages = [_my_tickets_page(tsr_id)]
+        while pages[-1].has_next:
+            pages.append(_my_tickets_page(tsr_id, pages[-1].next_cursor))
+        assert [t.id for page in pages for t in page.items] == expected
+        assert [len(page.items) for page in pages] == [4, 4, 3]
+        assert not pages[0].has_prev and pages[-1].has_prev
+
+        # Back from the last page: the same pages in reverse
+        page = pages[-1]
+        for previous in reversed(pages[:-1]):
+            page = _my_tickets_page(tsr_id, page.prev_cursor)
+            assert [t.id for t in page.items] == [t.id for t in previous.items]
+        assert not page.has_prev
+
+
+@pytest.mark.parametrize("rank", [-1, len(WORK_QUEUE_STATUSES), True, "0"])
+def test_my_tickets_cursor_with_bad_rank_returns_first_page(app, seed, rank):
+    seed.add_tickets(6, assigned_to_id=seed.tsr_ids[0])
+    with app.app_context():
+        first = _my_tickets_page(seed.tsr_ids[0])
+        cursor = encode_cursor([rank, datetime(2026, 10, 17), 1])
+        page = _my_tickets_page(seed.tsr_ids[0], cursor)
+        assert [t.id for t in page.items] == [t.id for t in first.items]
+        assert not page.has_prev
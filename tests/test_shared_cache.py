@@ -0,0 +1,56 @@
+"""
+SharedCache hits only rewrite last_access once it is older than
+LRU_TOUCH_FRACTION of the TTL; LRU eviction still keeps recently read keys.
+"""
+
+import sqlite3
+
+from kick_app import cache as cache_module
+from kick_app.cache import LRU_TOUCH_FRACTION, SharedCache, get_shared_cache
+
+
+def _last_access(shared, key):
+    with sqlite3.connect(shared.path) as conn:
+        return conn.execute(
+            "SELECT last_access FROM entries WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+
+def test_hits_within_touch_interval_do_not_write(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    shared = SharedCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    shared.set("k", {"v": 1})
+
+    clock[0] += shared.touch_interval / 2
+    assert shared.get("k") == {"v": 1}
+    assert _last_access(shared, "k") == 1000.0
+
+    clock[0] = 1000.0 + shared.touch_interval
+    assert shared.get("k") == {"v": 1}
+    assert _last_access(shared, "k") == clock[0]
+
+
+def test_recently_read_key_survives_eviction(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    shared = SharedCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2)
+    shared.set("old", 1)
+    clock[0] += 1
+    shared.set("newer", 2)
+
+    clock[0] += shared.touch_interval
+    assert shared.get("old") == 1  # touched: now the most recent
+    clock[0] += 1
+    shared.set("newest", 3)
+
+    assert shared.get("old") == 1
+    assert shared.get("newer") is None
+
+
+def test_app_cache_follows_dashboard_ttl(app):
+    with app.app_context():
+        shared = get_shared_cache()
+        ttl = app.config["DASHBOARD_CACHE_TTL"]
+    assert shared.ttl == ttl
+    assert shared.touch_interval == ttl * LRU_TOUCH_FRACTION
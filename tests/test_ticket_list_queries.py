@@ -0,0 +1,92 @@
+"""
+all_tickets / my_tickets must cost a fixed number of queries per page,
+however many rows it shows (no per-row lazy loads, see ticket_list_query).
+"""
+
+import pytest
+
+from kick_app import db
+from kick_app.models import Ticket, TicketStatus
+from kick_app.pagination import PartitionedKeysetPagination
+from kick_app.tickets.queries import (
+    MY_TICKETS_KEYS,
+    MY_TICKETS_PARTITIONS,
+    ticket_list_query,
+)
+from kick_app.tickets.search import reindex_all_tickets
+
+ROWS_PER_PAGE = 15
+
+
+def _page_queries(client, count_queries, url):
+    with count_queries() as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    return counter.count
+
+
+def _reindex(app):
+    with app.app_context():
+        reindex_all_tickets()
+        db.session.commit()
+
+
+@pytest.mark.parametrize(
+    "url", ["/tickets/all", "/tickets/all?search=concern", "/tickets/all?status=open"]
+)
+def test_all_tickets_query_count_does_not_grow_with_rows(
+    app, seed, admin_client, count_queries, url
+):
+    # Different TSRs and clients per row: each would be a lazy load if N+1
+    seed.add_tickets(1, assigned_to_id=seed.tsr_ids[0])
+    _reindex(app)
+    one_row = _page_queries(admin_client, count_queries, url)
+
+    for tsr_id in seed.tsr_ids:
+        seed.add_tickets(ROWS_PER_PAGE, assigned_to_id=tsr_id)
+    _reindex(app)
+    full_page = _page_queries(admin_client, count_queries, url)
+
+    assert full_page == one_row
+
+
+@pytest.mark.parametrize("url", ["/tickets/my", "/tickets/my?search=concern"])
+def test_my_tickets_query_count_does_not_grow_with_rows(
+    app, seed, tsr_client, count_queries, url
+):
+    seed.add_tickets(1, assigned_to_id=seed.tsr_ids[0])
+    _reindex(app)
+    one_row = _page_queries(tsr_client, count_queries, url)
+
+    seed.add_tickets(ROWS_PER_PAGE + 5, assigned_to_id=seed.tsr_ids[0])
+    _reindex(app)
+    full_page = _page_queries(tsr_client, count_queries, url)
+
+    assert full_page == one_row
+
+
+def test_my_tickets_deep_page_costs_the_same_as_the_first(
+    app, seed, tsr_client, count_queries
+):
+    tsr_id = seed.tsr_ids[0]
+    for status in (TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.RESOLVED):
+        seed.add_tickets(ROWS_PER_PAGE, assigned_to_id=tsr_id, status=status)
+    with app.app_context():
+        query = ticket_list_query().filter(Ticket.assigned_to_id == tsr_id)
+        page = PartitionedKeysetPagination(
+            query, MY_TICKETS_PARTITIONS, MY_TICKETS_KEYS, per_page=ROWS_PER_PAGE
+        )
+        page = PartitionedKeysetPagination(
+            query,
+            MY_TICKETS_PARTITIONS,
+            MY_TICKETS_KEYS,
+            cursor=page.next_cursor,
+            per_page=ROWS_PER_PAGE,
+        )
+        deep_cursor = page.next_cursor
+
+    first_page = _page_queries(tsr_client, count_queries, "/tickets/my")
+    deep_page = _page_queries(
+        tsr_client, count_queries, f"/tickets/my?cursor={deep_cursor}"
+    )
+    assert deep_page == first_page
@@ -0,0 +1,44 @@
+"""
+A search term that names a status matches the tickets in that status AND
+the tickets whose text contains it; text matches rank first.
+"""
+
+from kick_app import db
+from kick_app.models import Client, Ticket, TicketStatus
+from kick_app.tickets.search import reindex_all_tickets, search_tickets
+
+
+def test_status_word_matches_status_and_text(app, seed):
+    (open_ticket,) = seed.add_tickets(1, status=TicketStatus.OPEN)
+    (other_ticket,) = seed.add_tickets(1, status=TicketStatus.NEW)
+    (named_ticket,) = seed.add_tickets(1, status=TicketStatus.NEW)
+    with app.app_context():
+        client = Client(
+            account_number="ACC-OA",
+            account_name="Open Access",
+            region_id=seed.region_ids[0],
+            plan_rate=1000,
+        )
+        db.session.add(client)
+        db.session.flush()
+        db.session.get(Ticket, named_ticket).client_id = client.id
+        reindex_all_tickets()
+        db.session.commit()
+
+        ids = [
+            ticket.id
+            for ticket in search_tickets(Ticket.query, "open").order_by(
+                Ticket.created_at.desc()
+            )
+        ]
+    assert ids == [named_ticket, open_ticket]
+    assert other_ticket not in ids
+
+
+def test_status_word_search_in_all_tickets(app, seed, admin_client):
+    seed.add_tickets(1, status=TicketStatus.PENDING)
+    with app.app_context():
+        reindex_all_tickets()
+        db.session.commit()
+    page = admin_client.get("/tickets/all?search=pending").get_data(as_text=True)
+    assert "Concern 1" in page
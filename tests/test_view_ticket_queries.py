@@ -0,0 +1,82 @@
+"""
+view_ticket loads its whole graph in a fixed number of queries (see
+ticket_detail_query / ticket_detail_lists), whatever the number of log,
+email and attachment rows or of users who wrote them.
+"""
+
+from kick_app import db
+from kick_app.models import (
+    ActivityEvent,
+    ActivityLog,
+    EmailLog,
+    TicketAttachment,
+    TicketStatus,
+)
+
+# Login user, ticket graph, timeline page, email logs, attachments.
+# Measured with the reference-data cache warm (the TSR dropdown).
+VIEW_TICKET_BUDGET = 5
+# Auto-open on first view by the assigned TSR: the write and its bookkeeping
+AUTO_OPEN_BUDGET = 14
+
+
+def _add_activity(app, ticket_id, user_ids, rows_per_user):
+    with app.app_context():
+        for user_id in user_ids:
+            for i in range(rows_per_user):
+                db.session.add_all(
+                    [
+                        ActivityLog(
+                            ticket_id=ticket_id,
+                            user_id=user_id,
+                            event_type=ActivityEvent.REMARK_ADDED,
+                            remark=f"Remark {i}",
+                        ),
+                        EmailLog(
+                            ticket_id=ticket_id,
+                            user_id=user_id,
+                            email_content=f"Email {i}",
+                        ),
+                        TicketAttachment(
+                            ticket_id=ticket_id,
+                            uploader_id=user_id,
+                            filename=f"file_{user_id}_{i}.png",
+                            filepath=f"uploads/file_{user_id}_{i}.png",
+                        ),
+                    ]
+                )
+        db.session.commit()
+
+
+def _view_queries(client, count_queries, ticket_id):
+    with count_queries() as counter:
+        response = client.get(f"/tickets/{ticket_id}")
+    assert response.status_code == 200
+    return counter.count
+
+
+def test_view_ticket_query_budget(app, seed, admin_client, count_queries):
+    (ticket_id,) = seed.add_tickets(1, assigned_to_id=seed.tsr_ids[0])
+    admin_client.get(f"/tickets/{ticket_id}")  # warm the shared cache
+    _add_activity(app, ticket_id, [seed.admin_id], rows_per_user=1)
+    few_rows = _view_queries(admin_client, count_queries, ticket_id)
+
+    _add_activity(app, ticket_id, [seed.admin_id, *seed.tsr_ids], rows_per_user=5)
+    many_rows = _view_queries(admin_client, count_queries, ticket_id)
+
+    assert many_rows <= VIEW_TICKET_BUDGET
+    assert many_rows == few_rows
+
+
+def test_auto_open_view_query_budget(app, seed, tsr_client, count_queries):
+    warm_up, quiet, busy = seed.add_tickets(
+        3, assigned_to_id=seed.tsr_ids[0], status=TicketStatus.NEW
+    )
+    tsr_client.get(f"/tickets/{warm_up}")  # warm the shared cache
+    _add_activity(app, busy, [seed.admin_id, *seed.tsr_ids], rows_per_user=5)
+
+    few_rows = _view_queries(tsr_client, count_queries, quiet)
+    many_rows = _view_queries(tsr_client, count_queries, busy)
+
+    assert many_rows <= AUTO_OPEN_BUDGET
+    assert many_rows == few_rows
@@ -0,0 +1,58 @@
+"""
+Saving view_ticket's update form keeps the ticket on its assignee even when
+that TSR has been deactivated (the dropdown only lists active TSRs).
+"""
+
+from kick_app import db
+from kick_app.cache import invalidate_on_commit
+from kick_app.models import Ticket, TicketStatus, User
+from kick_app.refdata import TSRS_SCOPE
+
+
+def _deactivate(app, user_id):
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        invalidate_on_commit(TSRS_SCOPE)
+        db.session.commit()
+
+
+def _assigned_to(app, ticket_id):
+    with app.app_context():
+        return db.session.get(Ticket, ticket_id).assigned_to_id
+
+
+def test_inactive_assignee_is_offered_and_kept(app, seed, admin_client):
+    tsr_id = seed.tsr_ids[0]
+    (ticket_id,) = seed.add_tickets(1, assigned_to_id=tsr_id)
+    _deactivate(app, tsr_id)
+
+    page = admin_client.get(f"/tickets/{ticket_id}").get_data(as_text=True)
+    assert f'<option selected value="{tsr_id}">Tsr 0 (inactive)</option>' in page
+
+    response = admin_client.post(
+        f"/tickets/{ticket_id}",
+        data={
+            "status": TicketStatus.PENDING.name,
+            "assigned_tsr": str(tsr_id),
+            "rt_ticket_number": "",
+            "submit": "1",
+        },
+    )
+    assert response.status_code == 302
+    assert _assigned_to(app, ticket_id) == tsr_id
+
+
+def test_blank_choice_still_unassigns(app, seed, admin_client):
+    (ticket_id,) = seed.add_tickets(1, assigned_to_id=seed.tsr_ids[0])
+    _deactivate(app, seed.tsr_ids[0])
+
+    admin_client.post(
+        f"/tickets/{ticket_id}",
+        data={
+            "status": TicketStatus.OPEN.name,
+            "assigned_tsr": "__None",
+            "rt_ticket_number": "",
+            "submit": "1",
+        },
+    )
+    assert _assigned_to(app, ticket_id) is None